@@ -0,0 +1,95 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Benchmark of the parallel sentence segmentation.
+
+The :class:`ParallelSentenceSegmenter` is compared with the serial
+:class:`SentenceSegmenter` on very large texts. The script first checks that
+both give the same sentences on randomly generated texts cut into small shards
+(so that there are many cut points), and then reports the time taken to
+segment texts of several sizes with different numbers of processes.
+
+Usage::
+
+    python benchmarks/benchmark_parallel_segmentation.py [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import time
+from corpus import PARAGRAPHS
+from benchmark_sentence_segmentation import random_text
+from jizt.summaries.pipeline.text_processing.tokenization import \
+    ParallelSentenceSegmenter, SentenceSegmenter
+
+SIZES = (1_000_000, 5_000_000, 20_000_000)  # number of characters
+WORKERS = (2, 4, 8)
+
+
+def large_text(rng, size):
+    """News-like paragraphs with some noisy ones, up to a number of chars."""
+    paragraphs = []
+    length = 0
+    while length < size:
+        paragraphs.append(rng.choice(PARAGRAPHS) if rng.random() < 0.8
+                          else random_text(rng, rng.randrange(5, 80)))
+        length += len(paragraphs[-1]) + 1
+    return " ".join(paragraphs)[:size]
+
+
+def timed(function, text, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="times each text is segmented")
+    args = parser.parse_args()
+    serial = SentenceSegmenter()
+    rng = random.Random(0)
+
+    segmenter = ParallelSentenceSegmenter(max_workers=2, shard_size=100)
+    texts = [large_text(rng, 20_000) for _ in range(100)]
+    for text in texts:
+        assert segmenter.segment(text) == serial.segment(text), text
+    segmenter.close()
+    print(f"Same output on {len(texts)} random texts.")
+
+    print(f"{os.cpu_count()} CPUs available.")
+    print(f"{'chars':>11}{'serial (s)':>12}"
+          + "".join(f"{f'{n} procs (s)':>14}" for n in WORKERS))
+    segmenters = [ParallelSentenceSegmenter(max_workers=n) for n in WORKERS]
+    for size in SIZES:
+        text = large_text(rng, size)
+        row = f"{size:>11}{timed(serial.segment, text, args.repeat):>12.3f}"
+        for segmenter in segmenters:
+            segmenter.segment(text)  # start the processes
+            row += f"{timed(segmenter.segment, text, args.repeat):>14.3f}"
+        print(row)
+    for segmenter in segmenters:
+        segmenter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Benchmark of the partition of sentences into subdivisions.
+
+The linear-partition solver is compared with the previous eager division
+followed by the iterative balancing, on synthetic texts with up to 100k
+sentences. The script reports the time taken by each algorithm and the
+length of the longest and shortest subdivisions.
+
+Usage::
+
+    python benchmarks/benchmark_partition.py [--seed N]
+"""
+
+import argparse
+import random
+import statistics
+import time
+import corpus  # noqa: F401 (makes the jizt package importable)
+from jizt.summaries.pipeline.text_encoding.partition import \
+    partition_sentences
+
+MAX_LENGTH = 512  # T5 max. sequence length
+NTKS_PREFIX = 3  # tokens of "summarize: "
+SIZES = (1_000, 10_000, 100_000)
+
+
+def previous_partition(sent2ntks, ntks_prefix, max_length):
+    """Eager division and iterative balancing, as previously implemented."""
+    subdiv2ntks = []
+    split_points = [0]
+    subdiv_len = ntks_prefix + sent2ntks[0] + 1
+    for i in range(1, len(sent2ntks)):
+        subdiv_len += sent2ntks[i]
+        if subdiv_len > max_length:
+            split_points.append(i)
+            subdiv2ntks.append(subdiv_len - sent2ntks[i])
+            subdiv_len = ntks_prefix + sent2ntks[i] + 1
+    split_points.append(len(sent2ntks))
+    subdiv2ntks.append(subdiv_len)
+
+    while True:
+        prev_split_points = split_points[:]
+        for i in range(len(split_points)-1, 1, -1):
+            diff_ntks = subdiv2ntks[i-2] - subdiv2ntks[i-1]
+            while diff_ntks > 0:
+                moved_sent_ntks = sent2ntks[split_points[i-1] - 1]
+                if ((subdiv2ntks[i-1] + moved_sent_ntks <= max_length)
+                        and moved_sent_ntks <= diff_ntks):
+                    split_points[i-1] -= 1
+                    subdiv2ntks[i-1] += moved_sent_ntks
+                    subdiv2ntks[i-2] -= moved_sent_ntks
+                    diff_ntks = subdiv2ntks[i-2] - subdiv2ntks[i-1]
+                else:
+                    break
+        if split_points == prev_split_points:
+            return split_points, subdiv2ntks
+
+
+def synthetic_sentences(size, rng):
+    """Sentence lengths (in tokens) roughly following those of news texts."""
+    return [max(1, int(rng.lognormvariate(3.2, 0.5))) for _ in range(size)]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the synthetic sentence lengths")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'sentences':>10}{'algorithm':>11}{'subdivs':>9}{'time (s)':>10}"
+          f"{'longest':>9}{'shortest':>10}{'stdev':>8}")
+    for size in SIZES:
+        sent2ntks = synthetic_sentences(size, rng)
+        for name, function in (("previous", previous_partition),
+                               ("linear", partition_sentences)):
+            (_, subdiv2ntks), elapsed = timed(function, sent2ntks,
+                                              NTKS_PREFIX, MAX_LENGTH)
+            print(f"{size:>10}{name:>11}{len(subdiv2ntks):>9}"
+                  f"{elapsed:>10.3f}{max(subdiv2ntks):>9}"
+                  f"{min(subdiv2ntks):>10}"
+                  f"{statistics.pstdev(subdiv2ntks):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Benchmark of the quantized summarization model against fp32.
+
+For each quantization mode, the model is loaded in a fresh process (so that
+the memory measurements are not affected by the other modes), and the fixed
+corpus is summarized with greedy decoding. The script reports the load time,
+the summarization latency, the RSS and the drift of the outputs with respect
+to the fp32 model.
+
+Usage::
+
+    python benchmarks/benchmark_quantization.py [--repeat N]
+"""
+
+import argparse
+import multiprocessing
+import statistics
+import time
+from difflib import SequenceMatcher
+from corpus import CORPUS, current_rss_mb
+
+MODES = ("none", "dynamic-int8")
+
+
+def run_mode(quantization: str, repeat: int, results: dict):
+    """Summarize the corpus with the given quantization mode."""
+    from jizt.summaries.pipeline.text_encoding.encoding import SplitterEncoder
+    from jizt.summaries.pipeline.text_summarization.summarization import \
+        Summarizer
+
+    encoder = SplitterEncoder()
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    summarizer = Summarizer(quantization=quantization)
+    load_time = time.perf_counter() - start
+    rss_model = current_rss_mb() - rss_before
+
+    latencies, outputs = [], []
+    for text in CORPUS:
+        input_ids = encoder.encode(text)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = summarizer.summarize(input_ids, do_sample=False,
+                                          num_beams=1)
+            times.append(time.perf_counter() - start)
+        latencies.append(statistics.median(times))
+        outputs.append(output)
+
+    results[quantization] = {
+        "load_time": load_time,
+        "rss_model": rss_model,
+        "rss_total": current_rss_mb(),
+        "latencies": latencies,
+        "outputs": outputs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="times each document is summarized")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    manager = ctx.Manager()
+    results = manager.dict()
+    for mode in MODES:
+        # The first run of the quantized mode also creates the cached model
+        process = ctx.Process(target=run_mode,
+                              args=(mode, args.repeat, results))
+        process.start()
+        process.join()
+
+    reference = results["none"]
+    print(f"{'mode':<14}{'load (s)':>10}{'model RSS (MB)':>16}"
+          f"{'total RSS (MB)':>16}{'latency (s)':>13}{'speedup':>9}"
+          f"{'exact':>7}{'similarity':>12}")
+    for mode in MODES:
+        res = results[mode]
+        latency = sum(res["latencies"])
+        speedup = sum(reference["latencies"]) / latency
+        exact = sum(out == ref for out, ref
+                    in zip(res["outputs"], reference["outputs"]))
+        similarity = statistics.mean(
+            SequenceMatcher(None, out.split(), ref.split()).ratio()
+            for out, ref in zip(res["outputs"], reference["outputs"])
+        )
+        print(f"{mode:<14}{res['load_time']:>10.2f}{res['rss_model']:>16.0f}"
+              f"{res['rss_total']:>16.0f}{latency:>13.2f}{speedup:>9.2f}"
+              f"{exact:>4}/{len(CORPUS):<2}{similarity:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
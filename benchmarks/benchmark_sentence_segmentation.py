@@ -0,0 +1,140 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Benchmark of the sentence segmentation.
+
+The :class:`SentenceSegmenter` is compared with the previous implementation of
+``sentence_tokenize``, which built a new ``RegexpTokenizer`` and ran one
+``replace`` pass per punctuation mark on each call. The script first checks
+that both give the same sentences on the cases of
+``test/test_text_preprocessing.py``, the fixed corpus and randomly generated
+texts, and then reports the time taken to segment texts of several sizes.
+
+Usage::
+
+    python benchmarks/benchmark_sentence_segmentation.py [--repeat N]
+"""
+
+import argparse
+import random
+import sys
+import time
+from os.path import abspath, dirname, join
+from corpus import CORPUS, PARAGRAPHS
+from nltk.tokenize import RegexpTokenizer
+from blingfire import text_to_sentences
+
+sys.path.insert(1, abspath(join(dirname(dirname(__file__)), "test")))
+
+from test_text_preprocessing import (failing_sentences,  # noqa: E402
+                                     passing_sentences)
+from jizt.summaries.pipeline.text_processing.tokenization import \
+    SentenceSegmenter  # noqa: E402
+
+SIZES = (10, 100, 1_000)  # number of paragraphs
+
+
+def previous_sentence_tokenize(text, tokenizer=None):
+    """``sentence_tokenize``, as previously implemented."""
+    PUNCT_NO_PREV_WHITESPACE = ".,;:!?"
+    if len(text.strip()) == 0:
+        return []
+    if tokenizer is None:
+        tokenizer = RegexpTokenizer(r'[^.!?]+(?:(?:[A-Z][.])+|[.!?]+)+[^A-Z]*')
+        text = ' '.join(text.split())
+    if text[-1] not in ('.', '?', '!'):
+        text += '.'
+    sentences = ' '.join(tokenizer.tokenize(text)).replace('  ', ' ')
+    for punct in PUNCT_NO_PREV_WHITESPACE:
+        sentences = sentences.replace(' ' + punct, punct)
+    sentences = text_to_sentences(sentences).split('\n')
+    final_sentences = [sentences[0]]
+    for sent in sentences[1:]:
+        if final_sentences[-1][-1] not in ('.', '!', '?'):
+            final_sentences[-1] += (' ' + sent)
+        elif not sent[0].isalpha() and not sent[0].isdigit():
+            final_sentences[-1] += sent
+        else:
+            final_sentences.append(sent)
+    return final_sentences
+
+
+def random_text(rng, nwords=200):
+    """Text with random punctuation, spacing, acronyms and numbers."""
+    words = ["the", "Fish", "U.K.", "Mr.", "i.e.", "1.1.", "02.28.1980",
+             "don't", "\"quoted\"", "(aside)", "well", "NLP", "A", "ok"]
+    puncts = ["", "", "", ".", ",", ";", ":", "!", "?", "...", "??!", " ."]
+    spaces = [" ", " ", " ", "  ", "\n", "\t", ""]
+    return "".join(rng.choice(words) + rng.choice(puncts) + rng.choice(spaces)
+                   for _ in range(nwords))
+
+
+def check_equal(segmenter, texts):
+    for text in texts:
+        expected = previous_sentence_tokenize(text)
+        assert segmenter.segment(text) == expected, text
+        assert list(segmenter.iter_segment(text)) == expected, text
+    assert (segmenter.segment_many(texts)
+            == [previous_sentence_tokenize(text) for text in texts])
+
+
+def timed(function, text, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="times each text is segmented")
+    args = parser.parse_args()
+    segmenter = SentenceSegmenter()
+    rng = random.Random(0)
+
+    test_cases = [text for text, _ in passing_sentences + failing_sentences]
+    check_equal(segmenter, test_cases)
+    check_equal(segmenter, CORPUS)
+    random_texts = [random_text(rng) for _ in range(2_000)]
+    check_equal(segmenter, random_texts)
+    print(f"Same output on {len(test_cases)} test cases, {len(CORPUS)} corpus "
+          f"texts and {len(random_texts)} random texts.")
+
+    print(f"{'paragraphs':>11}{'chars':>10}{'previous (s)':>14}"
+          f"{'segmenter (s)':>15}{'speedup':>9}")
+    for size in SIZES:
+        text = " ".join(rng.choice(PARAGRAPHS) for _ in range(size))
+        previous = timed(previous_sentence_tokenize, text, args.repeat)
+        current = timed(segmenter.segment, text, args.repeat)
+        print(f"{size:>11}{len(text):>10}{previous:>14.4f}{current:>15.4f}"
+              f"{previous / current:>9.2f}")
+
+    short_texts = [rng.choice(PARAGRAPHS) for _ in range(1_000)]
+    previous = timed(lambda texts: [previous_sentence_tokenize(text)
+                                    for text in texts], short_texts,
+                     args.repeat)
+    current = timed(segmenter.segment_many, short_texts, args.repeat)
+    print(f"{len(short_texts)} paragraphs one by one: previous "
+          f"{previous:.4f}s, segment_many {current:.4f}s "
+          f"({previous / current:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
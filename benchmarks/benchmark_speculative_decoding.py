@@ -0,0 +1,100 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Benchmark of assisted (speculative) generation with a draft model.
+
+The subdivisions of the fixed corpus are summarized one at a time with greedy
+decoding, first with the main model alone and then assisted by the draft
+model. The script reports the throughput in generated tokens per second for
+each subdivision size, and checks that the outputs are identical.
+
+Usage::
+
+    python benchmarks/benchmark_speculative_decoding.py [--draft-model t5-small]
+"""
+
+import argparse
+import statistics
+import time
+import torch
+from corpus import CORPUS
+
+
+def generate_all(backend, subdivisions, generation_params, repeat):
+    """Generate the summary of each subdivision, timing it.
+
+    Returns:
+        :obj:`list`: A list of tuples with the number of generated tokens, the
+        median time and the output ids of each subdivision.
+    """
+    results = []
+    for ids in subdivisions:
+        input_ids = torch.LongTensor([ids])
+        attention_mask = torch.ones_like(input_ids)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with torch.no_grad():
+                output = backend.generate(input_ids, attention_mask,
+                                          **generation_params)
+            times.append(time.perf_counter() - start)
+        results.append((output.shape[-1] - 1, statistics.median(times),
+                        output[0].tolist()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--draft-model", default="t5-small",
+                        help="path or name of the draft model")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="times each subdivision is summarized")
+    args = parser.parse_args()
+
+    from jizt.summaries.pipeline.text_encoding.encoding import SplitterEncoder
+    from jizt.summaries.pipeline.text_summarization.backends.pytorch_backend \
+        import PyTorchBackend
+
+    torch.manual_seed(0)
+    encoder = SplitterEncoder()
+    subdivisions = [subdivision for text in CORPUS
+                    for subdivision in encoder.encode(text,
+                                                      return_tensors=None)]
+    generation_params = {"do_sample": False, "num_beams": 1,
+                         "max_length": 150, "min_length": 30}
+
+    baseline = generate_all(PyTorchBackend(draft_model_path=None),
+                            subdivisions, generation_params, args.repeat)
+    assisted = generate_all(PyTorchBackend(draft_model_path=args.draft_model),
+                            subdivisions, generation_params, args.repeat)
+
+    print(f"{'input tokens':>12}{'output tokens':>15}{'baseline (tok/s)':>18}"
+          f"{'assisted (tok/s)':>18}{'speedup':>9}{'same output':>13}")
+    for ids, base, assist in zip(subdivisions, baseline, assisted):
+        base_tps = base[0] / base[1]
+        assist_tps = assist[0] / assist[1]
+        print(f"{len(ids):>12}{base[0]:>15}{base_tps:>18.1f}"
+              f"{assist_tps:>18.1f}{assist_tps / base_tps:>9.2f}"
+              f"{str(base[2] == assist[2]):>13}")
+    total_base = sum(r[0] for r in baseline) / sum(r[1] for r in baseline)
+    total_assist = sum(r[0] for r in assisted) / sum(r[1] for r in assisted)
+    print(f"\nOverall: {total_base:.1f} tok/s -> {total_assist:.1f} tok/s "
+          f"({total_assist / total_base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Benchmark of the truecaser.
+
+The :class:`TrueCaser` with the pickled string-keyed distributions is
+compared with the :class:`CompiledTrueCaser` and the :class:`MappedTrueCaser`.
+The distributions are those of ``data/english.dist`` if it is available (it is
+stored with Git LFS), or synthetic ones otherwise. The script checks that the
+truecasers give the same output on the sentences, and reports the time taken
+to truecase them (also with the previous reconstruction of the sentences from
+the truecased tokens). The cache of the casings is measured on sentences with
+Zipf-distributed words, which repeat the same contexts as texts do. Then, it
+loads each model in a new process, as each of the API workers does, and
+reports the time taken and the anonymous (i.e., not shared through the page
+cache) memory of the process after loading the model and truecasing the
+sentences.
+
+Usage::
+
+    python benchmarks/benchmark_truecaser.py [--sentences N]
+"""
+
+import argparse
+import multiprocessing
+import pickle
+import random
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, join
+from pathlib import Path
+import corpus  # noqa: F401 (makes the jizt package importable)
+
+sys.path.insert(1, abspath(join(dirname(dirname(__file__)), "test")))
+
+from test_truecaser import (previous_get_true_case,  # noqa: E402
+                            train_distributions)
+from jizt.summaries.pipeline.text_processing import truecase  # noqa: E402
+from jizt.summaries.pipeline.text_processing.truecase.CompiledTrueCaser \
+    import CompiledTrueCaser, compile_model  # noqa: E402
+from jizt.summaries.pipeline.text_processing.truecase.MappedTrueCaser \
+    import MappedTrueCaser, save_mapped_model  # noqa: E402
+
+DIST_FILE = Path(truecase.__file__).parent / "data" / "english.dist"
+VOCABULARY_SIZE = 20_000
+CACHE_SIZE = 100_000  # default TRUECASER_CACHE_SIZE
+
+
+def synthetic_distributions(rng):
+    """Distributions of a corpus with Zipf-distributed words and casings."""
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz")
+                     for _ in range(rng.randint(2, 10)))
+             for _ in range(VOCABULARY_SIZE)]
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    casings = {word: [word, word.title(), word.upper()][:rng.choice((1, 1, 2,
+                                                                     3))]
+               for word in words}
+    sentences = [[rng.choice(casings[word]) for word in
+                  rng.choices(words, weights, k=rng.randint(5, 30))]
+                 for _ in range(100_000)]
+    return train_distributions(sentences), words
+
+
+def sort_alternatives(truecaser):
+    """Break the ties between casings as :class:`CompiledTrueCaser` does.
+
+    Otherwise, they depend on the iteration order of the sets of alternatives,
+    which changes with the hash seed of the process.
+    """
+    for lower, alternatives in truecaser.word_casing_lookup.items():
+        truecaser.word_casing_lookup[lower] = sorted(
+            alternatives, key=lambda alt: (-truecaser.uni_dist[alt], alt))
+
+
+def timed(truecaser, sentences):
+    start = time.perf_counter()
+    result = [truecaser.get_true_case(sentence) for sentence in sentences]
+    return result, time.perf_counter() - start
+
+
+def anonymous_memory():
+    """Anonymous memory of the current process, in MiB."""
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            if line.startswith("Anonymous:"):
+                return int(line.split()[1]) / 1024
+
+
+def load(truecaser_class, path, sentences):
+    """Load a truecaser and truecase the sentences (in a new process)."""
+    start = time.perf_counter()
+    truecaser = truecaser_class(path)
+    elapsed = time.perf_counter() - start
+    memory = anonymous_memory()
+    for sentence in sentences:
+        truecaser.get_true_case(sentence)
+    return elapsed, memory, anonymous_memory()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sentences", type=int, default=2_000,
+                        help="number of sentences to truecase")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dist_file = DIST_FILE
+        try:
+            with open(dist_file, "rb") as distributions_file:
+                words = list(pickle.load(distributions_file)
+                             ["word_casing_lookup"])
+            print(f"Distributions: {dist_file}")
+        except pickle.UnpicklingError:  # Git LFS pointer
+            dists, words = synthetic_distributions(rng)
+            dist_file = Path(tmp_dir) / "synthetic.dist"
+            with open(dist_file, "wb") as distributions_file:
+                pickle.dump(dists, distributions_file)
+            print(f"Distributions: synthetic ({VOCABULARY_SIZE} words)")
+        model_file = Path(tmp_dir) / "compiled"
+        start = time.perf_counter()
+        compile_model(dist_file, model_file)
+        print(f"Compiled in {time.perf_counter() - start:.1f}s")
+        model_dir = Path(tmp_dir) / "mapped"
+        start = time.perf_counter()
+        save_mapped_model(dist_file, model_dir)
+        print(f"Mapped in {time.perf_counter() - start:.1f}s")
+        truecaser = truecase.TrueCaser(dist_file)
+        sort_alternatives(truecaser)
+
+        sentences = [" ".join(rng.choices(words, k=rng.randint(5, 30))) + "."
+                     for _ in range(args.sentences)]
+        start = time.perf_counter()
+        expected = [previous_get_true_case(truecaser, sentence)
+                    for sentence in sentences]
+        reference = time.perf_counter() - start
+        result, previous = timed(truecaser, sentences)
+        assert result == expected
+        print(f"TrueCaser (previous reconstruction) {reference:.3f}s")
+        print(f"TrueCaser {previous:.3f}s ({reference / previous:.2f}x)")
+        truecasers = ((truecase.TrueCaser, dist_file),
+                      (CompiledTrueCaser, model_file),
+                      (MappedTrueCaser, model_dir))
+        for truecaser_class, path in truecasers[1:]:
+            result, current = timed(truecaser_class(path), sentences)
+            assert result == expected
+            print(f"{truecaser_class.__name__} {current:.3f}s "
+                  f"({previous / current:.2f}x)")
+        print(f"Same output on {len(sentences)} sentences.")
+
+        weights = [1 / (rank + 1) for rank in range(len(words))]
+        zipf_sentences = [" ".join(rng.choices(words, weights,
+                                               k=rng.randint(5, 30))) + "."
+                          for _ in range(args.sentences)]
+        mapped = MappedTrueCaser(model_dir)
+        expected, previous = timed(mapped, zipf_sentences)
+        mapped.set_cache_size(CACHE_SIZE)
+        print(f"MappedTrueCaser on Zipf-distributed words {previous:.3f}s")
+        # The cache is kept between texts, so the second pass shows the
+        # cache once the contexts have been seen
+        for name in ("first pass", "second pass"):
+            result, current = timed(mapped, zipf_sentences)
+            assert result == expected
+            cache_info = mapped.cache_info()
+            hit_rate = cache_info.hits / (cache_info.hits + cache_info.misses)
+            print(f"  with a cache of {CACHE_SIZE} casings, {name} "
+                  f"{current:.3f}s ({previous / current:.2f}x, cumulative "
+                  f"hit rate {hit_rate:.0%})")
+
+        del truecaser
+        print(f"{'':>19}{'load (s)':>10}{'loaded (MiB)':>14}"
+              f"{'truecased (MiB)':>17}")
+        context = multiprocessing.get_context("spawn")
+        for truecaser_class, path in truecasers:
+            with context.Pool(1) as pool:
+                baseline = pool.apply(anonymous_memory)
+                elapsed, loaded, used = pool.apply(
+                    load, (truecaser_class, path, sentences))
+            print(f"{truecaser_class.__name__:>19}{elapsed:>10.3f}"
+                  f"{loaded - baseline:>14.1f}{used - baseline:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Calibration of the cost model used to plan the subdivision length.
+
+Batches of subdivisions of several lengths, cut from the fixed corpus, are
+summarized with the configured summarizer (model, backend, quantization and
+max. batch size), and a :class:`SubdivisionCostModel` is fitted to the
+measured times. The script reports the measurements, the fitted model and the
+target length the planner would choose for texts of several sizes, and saves
+the model so that the encoder uses it (see ``SUMM_COST_MODEL_PATH``).
+
+The calibration must be run again whenever the model, the backend or the
+machine changes.
+
+Usage::
+
+    python benchmarks/calibrate_subdivision_cost.py [--output PATH] [--repeat N]
+"""
+
+import argparse
+from corpus import CORPUS
+
+TEXT_SIZES = (500, 2_000, 10_000, 100_000)  # tokens
+
+
+def main():
+    from jizt.config import SUMM_COST_MODEL_PATH
+    from jizt.summaries.pipeline.text_encoding.subdivision_planning import (
+        SubdivisionPlanner, calibrate)
+    from jizt.summaries.pipeline.text_summarization.summarization import \
+        Summarizer
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", default=str(SUMM_COST_MODEL_PATH),
+                        help="where to save the cost model")
+    parser.add_argument("--repeat", type=int, default=2,
+                        help="times each batch is summarized")
+    args = parser.parse_args()
+
+    summarizer = Summarizer()
+    token_ids = summarizer.tokenizer.encode(CORPUS[-1],
+                                            add_special_tokens=False)
+    cost_model, samples = calibrate(summarizer, token_ids, repeat=args.repeat)
+
+    print(f"{'batch':>6}{'length':>8}{'time (s)':>10}{'predicted':>11}")
+    for batch_size, length, elapsed in samples:
+        print(f"{batch_size:>6}{length:>8}{elapsed:>10.3f}"
+              f"{cost_model.predict(batch_size, length):>11.3f}")
+    print(cost_model)
+
+    planner = SubdivisionPlanner(
+        cost_model,
+        max_length=summarizer.tokenizer.model_max_length,
+        max_batch_size=summarizer.max_batch_size
+    )
+    ntks_prefix = len(summarizer.tokenizer.encode("summarize: ",
+                                                  add_special_tokens=False))
+    for ntks_total in TEXT_SIZES:
+        print(f"Target length for {ntks_total} tokens: "
+              f"{planner.target_length(ntks_total, ntks_prefix)}")
+    print(f"Target length for incremental encoding: "
+          f"{planner.target_length(None, ntks_prefix)}")
+
+    cost_model.save(args.output)
+    print(f"Cost model saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
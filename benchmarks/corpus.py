@@ -0,0 +1,81 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Fixed corpus and helpers shared by the benchmarks."""
+
+import os
+import sys
+from os.path import abspath, dirname, join
+
+# Make the `jizt` package importable when running the benchmarks from the
+# root of the repository, e.g., `python benchmarks/benchmark_quantization.py`
+sys.path.insert(1, abspath(join(dirname(dirname(__file__)), "src")))
+
+PARAGRAPHS = [
+    "The city council met on Tuesday to discuss the new public transport "
+    "plan. After months of consultations, the proposal includes three new "
+    "bus lines, longer opening hours for the metro and a single ticket valid "
+    "for all the services. Some members of the opposition argued that the "
+    "budget is not realistic, since the cost of the new lines has been "
+    "underestimated. The mayor replied that part of the funding will come "
+    "from the regional government, and that the plan will be implemented in "
+    "several phases. The first phase is expected to start next spring.",
+
+    "Researchers have found that bees are able to learn simple patterns and "
+    "to remember them for several days. In the experiment, the insects were "
+    "trained to associate a color with a reward of sugar water. Once the "
+    "training was over, the reward was removed, but most of the bees kept "
+    "visiting the flowers with the right color. According to the authors, "
+    "these results show that the cognitive abilities of insects have been "
+    "largely underestimated. They now plan to study whether bees can also "
+    "learn more complex rules, such as choosing the odd element in a group.",
+
+    "The company announced on Monday that its profits had fallen by twenty "
+    "percent in the last quarter. The main reasons are the increase in the "
+    "price of raw materials and the weak demand in its biggest markets. The "
+    "chief executive said that the company will reduce its costs by closing "
+    "two factories and by selling some of its less profitable brands. "
+    "However, she also stressed that the investment in research will not be "
+    "cut, since new products are key to the future of the firm. The shares "
+    "of the company dropped by five percent after the announcement.",
+
+    "Learning a new language as an adult is hard, but not impossible. "
+    "Experts recommend practicing a little every day instead of studying for "
+    "long hours once a week. Listening to podcasts, watching films with "
+    "subtitles and talking with native speakers are some of the most "
+    "effective methods. It is also important not to be afraid of making "
+    "mistakes, since they are a natural part of the learning process. "
+    "Finally, setting realistic goals helps to stay motivated over time.",
+]
+
+# Documents of increasing length, so that the encoder produces from one up to
+# several subdivisions
+CORPUS = [
+    PARAGRAPHS[0],
+    " ".join(PARAGRAPHS[:2]),
+    " ".join(PARAGRAPHS * 2),
+    " ".join(PARAGRAPHS * 6),
+]
+
+
+def current_rss_mb() -> float:
+    """Get the current resident set size of the process, in MB."""
+    with open(f"/proc/{os.getpid()}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
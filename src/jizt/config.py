@@ -37,6 +37,111 @@ ROOT_DIR: Path = Path(__file__).parent.resolve()
 # Summarization Model
 SUMM_TOKENIZER_PATH: Path = config("SUMM_TOKENIZER_PATH", cast=Path, default="t5-base")
 SUMM_MODEL_PATH: Path = config("SUMM_MODEL_PATH", cast=Path, default="t5-base")
+# Target length of the subdivisions, in tokens. If not set, it is chosen by a
+# cost model of the summarization time, loaded from SUMM_COST_MODEL_PATH (see
+# benchmarks/calibrate_subdivision_cost.py). Without a cost model, the
+# subdivisions are filled up to the model max. length.
+SUMM_SUBDIVISION_LENGTH: int = config("SUMM_SUBDIVISION_LENGTH", cast=int, default=None)
+SUMM_COST_MODEL_PATH: Path = config(
+    "SUMM_COST_MODEL_PATH",
+    cast=Path,
+    default=f"{ROOT_DIR}/summaries/models/cost_model.json"
+)
+# Maximum number of subdivisions that are padded together and passed to the
+# model in a single generate call. Lower it to bound memory usage.
+SUMM_MAX_BATCH_SIZE: int = config("SUMM_MAX_BATCH_SIZE", cast=int, default=8)
+# Whether to batch together the subdivisions of concurrent requests. If enabled,
+# a batch is flushed as soon as it reaches SUMM_MAX_BATCH_SIZE subdivisions or
+# its oldest subdivision has waited SUMM_BATCH_MAX_WAIT seconds. Subdivisions
+# are grouped in length buckets of SUMM_BATCH_BUCKET_WIDTH tokens to limit
+# padding.
+SUMM_BATCH_SCHEDULING: bool = config("SUMM_BATCH_SCHEDULING", cast=bool, default=False)
+SUMM_BATCH_MAX_WAIT: float = config("SUMM_BATCH_MAX_WAIT", cast=float, default=0.05)
+SUMM_BATCH_BUCKET_WIDTH: int = config("SUMM_BATCH_BUCKET_WIDTH", cast=int, default=64)
+# Generation engine: "static" (one generate call per batch) or "continuous"
+# (decoding steps are scheduled at token granularity). The continuous engine
+# only supports greedy decoding and sampling; beam search requests are still
+# served by the static engine. Since summaries use beam search by default
+# (num_beams=4), only the requests with num_beams=1 use the continuous engine.
+SUMM_GENERATION_ENGINE: str = config("SUMM_GENERATION_ENGINE", default="static")
+# Inference backend: "pytorch" or "onnxruntime". The ONNX Runtime backend
+# requires the onnxruntime package; the model is exported to SUMM_ONNX_DIR the
+# first time it is used, and again whenever the checkpoint changes.
+SUMM_BACKEND: str = config("SUMM_BACKEND", default="pytorch")
+SUMM_ONNX_DIR: Path = config(
+    "SUMM_ONNX_DIR",
+    cast=Path,
+    default=f"{ROOT_DIR}/summaries/models/onnx"
+)
+# Quantization applied to the model when loading it: "none" or "dynamic-int8"
+# (dynamic int8 quantization of the Linear layers, for CPU inference). The
+# quantized model is cached in SUMM_QUANTIZATION_CACHE_DIR (outside the source
+# tree, since it is generated at runtime).
+SUMM_QUANTIZATION: str = config("SUMM_QUANTIZATION", default="none")
+SUMM_QUANTIZATION_CACHE_DIR: Path = config(
+    "SUMM_QUANTIZATION_CACHE_DIR",
+    cast=Path,
+    default=f"{Path.home()}/.cache/jizt/quantized"
+)
+# Path or name of a small model sharing the vocabulary of SUMM_MODEL_PATH, e.g.,
+# "t5-small", used as draft model for assisted (speculative) generation with
+# greedy decoding and sampling. Disabled if not set.
+SUMM_DRAFT_MODEL_PATH: Path = config("SUMM_DRAFT_MODEL_PATH", cast=Path, default=None)
+# Hierarchical (map-reduce) summarization of texts with at least
+# SUMM_HIERARCHICAL_MIN_SUBDIVISIONS subdivisions: the subdivisions are
+# summarized across SUMM_HIERARCHICAL_WORKERS processes, and the partial
+# summaries are summarized again until they are at most
+# SUMM_HIERARCHICAL_TARGET_LENGTH tokens long (or SUMM_HIERARCHICAL_MAX_LEVELS
+# levels have been run). Each worker loads its own copy of the model.
+SUMM_HIERARCHICAL: bool = config("SUMM_HIERARCHICAL", cast=bool, default=False)
+SUMM_HIERARCHICAL_MIN_SUBDIVISIONS: int = config("SUMM_HIERARCHICAL_MIN_SUBDIVISIONS", cast=int, default=16)
+SUMM_HIERARCHICAL_WORKERS: int = config("SUMM_HIERARCHICAL_WORKERS", cast=int, default=2)
+SUMM_HIERARCHICAL_TARGET_LENGTH: int = config("SUMM_HIERARCHICAL_TARGET_LENGTH", cast=int, default=512)
+SUMM_HIERARCHICAL_MAX_LEVELS: int = config("SUMM_HIERARCHICAL_MAX_LEVELS", cast=int, default=4)
+# Texts of at least SUMM_INCREMENTAL_ENCODING_MIN_LENGTH characters are encoded
+# incrementally in a background thread, and their subdivisions are summarized
+# as soon as they are encoded. This is not done if hierarchical summarization
+# is enabled, since it needs all the subdivisions beforehand.
+SUMM_INCREMENTAL_ENCODING_MIN_LENGTH: int = config("SUMM_INCREMENTAL_ENCODING_MIN_LENGTH", cast=int, default=100000)
+# Load-aware degradation: under high load, the requests that do not set any
+# decoding params get fewer beams, then greedy decoding, then an extractive
+# summary. The load is computed from the number of summaries in progress
+# (relative to SUMM_DEGRADATION_QUEUE_DEPTH) and the mean latency of the recent
+# summaries, in seconds (relative to SUMM_DEGRADATION_TARGET_LATENCY).
+SUMM_DEGRADATION: bool = config("SUMM_DEGRADATION", cast=bool, default=False)
+SUMM_DEGRADATION_QUEUE_DEPTH: int = config("SUMM_DEGRADATION_QUEUE_DEPTH", cast=int, default=8)
+SUMM_DEGRADATION_TARGET_LATENCY: float = config("SUMM_DEGRADATION_TARGET_LATENCY", cast=float, default=30.0)
+
+# Texts of at least PREPROCESSING_PARALLEL_MIN_LENGTH characters are split into
+# sentences across PREPROCESSING_WORKERS processes, in shards of about
+# PREPROCESSING_SHARD_SIZE characters. PREPROCESSING_WORKERS defaults to 1,
+# i.e., the texts are always split in the serving process, since no speedup
+# has been measured yet (see benchmarks/benchmark_parallel_segmentation.py).
+PREPROCESSING_PARALLEL_MIN_LENGTH: int = config("PREPROCESSING_PARALLEL_MIN_LENGTH", cast=int, default=1000000)
+PREPROCESSING_WORKERS: int = config("PREPROCESSING_WORKERS", cast=int, default=1)
+PREPROCESSING_SHARD_SIZE: int = config("PREPROCESSING_SHARD_SIZE", cast=int, default=250000)
+
+# Sentence segmentation backend of the post-processing: "blingfire" (the same
+# segmenter as the pre-processing) or "punkt" (NLTK Punkt model, which has to
+# be downloaded beforehand with nltk.download("punkt")).
+POSTPROCESSING_SEGMENTER: str = config("POSTPROCESSING_SEGMENTER", default="blingfire")
+
+# Truecasing model: either a mapped model directory (see
+# truecase/MappedTrueCaser.py), the default, which is loaded almost instantly
+# and whose pages are shared by all the workers, so memory does not grow with
+# their number; or a compiled model file (see truecase/CompiledTrueCaser.py,
+# e.g., data/english.compiled), about 1.6 times faster per lookup but loaded
+# privately by each worker. If it does not exist, the truecaser loads the
+# original data/english.dist model.
+TRUECASER_MODEL_PATH: Path = config(
+    "TRUECASER_MODEL_PATH",
+    cast=Path,
+    default=f"{ROOT_DIR}/summaries/pipeline/text_processing/truecase/data/english.mapped"
+)
+
+# Maximum number of casings memoized by the truecaser of each worker (the least
+# recently used ones are discarded). Set it to 0 to disable the cache.
+TRUECASER_CACHE_SIZE: int = config("TRUECASER_CACHE_SIZE", cast=int, default=100000)
 
 # FastText Language Detection Model
 FASTTEXT_MODEL_PATH: Path = config(
@@ -21,7 +21,7 @@ FastText is used for langauge detection. See
 `https://pypi.org/project/fasttext/`__.
 """
 
-__version__ = '0.1.0'
+__version__ = '0.1.1'
 
 import logging
 import fasttext
@@ -55,7 +55,7 @@ class LanguageDetector:
     def model(self):
         return self._model
 
-    def detect(self, text: str) -> DetectedLanguage:
+    def detect(self, text: str, normalized: bool = False) -> DetectedLanguage:
         """Predict the language of a text.
 
         If the text contains several languages, only the main language will be
@@ -64,12 +64,18 @@ class LanguageDetector:
         Args:
             text (:obj:`str`):
                 The text to detect the language of.
+            normalized (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether the words of the text are already separated by a single
+                whitespace. Otherwise, the text is normalised, since the model
+                does not accept new lines.
 
         Returns:
             :obj:`DetectedLanguage`: The detected language, together with the
             confidence of the prediction.
         """
-        language, confidence = self._model.predict(" ".join(text.split()))
+        if not normalized:
+            text = " ".join(text.split())
+        language, confidence = self._model.predict(text)
         return DetectedLanguage(
             language=language[0].split("_")[-1],
             confidence=float(confidence[0].round(2))
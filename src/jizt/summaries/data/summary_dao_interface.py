@@ -18,7 +18,7 @@
 
 """Data Access Object (DAO) interface for summaries."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.1'
 
 from abc import ABC, abstractmethod
 from datetime import datetime
@@ -99,7 +99,8 @@ class SummaryDAOInterface(ABC):
                        status: str,
                        started_at: datetime,
                        ended_at: datetime,
-                       warnings: dict):
+                       warnings: dict,
+                       progress: dict):
         """Update an existing summary.
 
         Args:
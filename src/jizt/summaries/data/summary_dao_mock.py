@@ -18,7 +18,7 @@
 
 """Summary Data Access Object (DAO) mock implementation."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.1'
 
 import logging
 import hashlib
@@ -55,6 +55,7 @@ class SummaryItem:
     ended_at: datetime
     language_tag: str
     request_count: int
+    progress: dict = None
 
 
 @dataclass
@@ -104,7 +105,8 @@ class SummaryDAOMock(SummaryDAOInterface):
                           summary.output, SupportedModel(summary.model_name),
                           summary.params, SummaryStatus(summary.status),
                           summary.started_at, summary.ended_at,
-                          SupportedLanguage(summary.language_tag))
+                          SupportedLanguage(summary.language_tag),
+                          summary.progress)
         return summary, None
 
     def get_summary_by_request_id(
@@ -126,7 +128,8 @@ class SummaryDAOMock(SummaryDAOInterface):
                           summary.output, SupportedModel(summary.model_name),
                           summary.params, SummaryStatus(summary.status),
                           summary.started_at, summary.ended_at,
-                          SupportedLanguage(summary.language_tag))
+                          SupportedLanguage(summary.language_tag),
+                          summary.progress)
         return summary, request.warnings
 
     def increment_summary_count(self, summary_id: str):
@@ -158,7 +161,8 @@ class SummaryDAOMock(SummaryDAOInterface):
             summary.started_at,
             summary.ended_at,
             summary.language,
-            1
+            1,
+            summary.progress
         )
         self.SOURCE_TABLE[source_id] = SourceItem(summary.source,
                                                   len(summary.source))
@@ -172,7 +176,8 @@ class SummaryDAOMock(SummaryDAOInterface):
         status: str = None,
         started_at: datetime = None,
         ended_at: datetime = None,
-        warnings: dict = None
+        warnings: dict = None,
+        progress: dict = None
     ):
         """See base class."""
         if request_id in self.REQUEST_TABLE:
@@ -18,14 +18,15 @@
 
 """Schemas for '/summaries' endpoint."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.2'
 
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, PositiveFloat
 from jizt.supported_languages import SupportedLanguage
+from jizt.language_detection.models import DetectedLanguage
 from .utils.supported_models import SupportedModel
 from .utils.summary_status import SummaryStatus
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 
 class Summary():
@@ -50,6 +51,11 @@ class Summary():
             The time when the summary first finished.
         language (:obj:jizt.supported_languages.SupportedLanguage):
             The language of the summary.
+        progress (:obj:`dict`):
+            The progress of a hierarchical summary: the ``level`` being
+            summarized (starting at 0 for the map stage), the maximum number of
+            levels (``max_levels``) and the number of ``subdivisions`` of the
+            level. It is :obj:`None` for the rest of summaries.
     """
 
     def __init__(
@@ -62,7 +68,8 @@ class Summary():
         status: SummaryStatus,
         started_at: datetime,
         ended_at: datetime,
-        language: SupportedLanguage
+        language: SupportedLanguage,
+        progress: Optional[Dict[str, int]] = None
     ):  # 2020 be like
         self.id_ = id_
         self.source = source
@@ -73,6 +80,7 @@ class Summary():
         self.started_at = started_at
         self.ended_at = ended_at
         self.language = language.value
+        self.progress = progress
 
     def dict(self):
         """Return summary object as :obj:`dict`."""
@@ -83,12 +91,86 @@ class Summary():
                 f'[output]: "{self.output}", [model]: {self.model}, '
                 f'[params]: {self.params}, [status]: {self.status}, '
                 f'[started_at]: {self.started_at}, [ended_at]: {self.ended_at}, '
-                f'[language]: {self.language}')
+                f'[language]: {self.language}, [progress]: {self.progress}')
 
     def __repr__(self):
         return (f'Summary({self.id_}, {self.source}, {self.output}, '
                 f'{self.model}, {self.params}, {self.status}, {self.started_at}, '
-                f'{self.ended_at}, {self.language}')
+                f'{self.ended_at}, {self.language}, {self.progress})')
+
+
+class Document():
+    """Text of a summary request, as it goes through the summarization steps.
+
+    The source is normalised once, when the document is created, and each step
+    stores its results in the document, so that the next steps read them
+    instead of computing them again:
+
+    * The view detects the language of :attr:`normalized_text`.
+    * The pre-processor splits it into sentences (see :meth:`set_sentences`).
+    * The encoder tokenizes those sentences.
+
+    Attributes:
+        source (:obj:`str`):
+            The text to summarize, as received.
+        normalized_text (:obj:`str`):
+            The source with the words separated by a single whitespace, i.e.,
+            without characters such as ``'\n'``, ``'\t'``, etc.
+        word_count (:obj:`int`):
+            The number of words (separated by whitespaces) of the source.
+        language (:obj:`DetectedLanguage`):
+            The detected language of the text, if it has been detected.
+        text (:obj:`str`):
+            The pre-processed text, i.e., its sentences separated by a single
+            whitespace, once it has been pre-processed.
+        sentence_spans (:obj:`List[Tuple[int, int]]`):
+            The start and end offsets of each sentence in :attr:`text`, once
+            the text has been pre-processed.
+        token_ids (:obj:`List[List[int]]`):
+            The token ids of each sentence (without special tokens), once the
+            text has been encoded. They are not kept if the text is encoded
+            incrementally.
+    """
+
+    def __init__(self, source: str):
+        words = source.split()
+        self.source = source
+        self.normalized_text = " ".join(words)
+        self.word_count = len(words)
+        self.language: Optional[DetectedLanguage] = None
+        self.text: Optional[str] = None
+        self.sentence_spans: Optional[List[Tuple[int, int]]] = None
+        self.token_ids: Optional[List[List[int]]] = None
+
+    @property
+    def sentences(self) -> Optional[List[str]]:
+        """The sentences of the pre-processed text."""
+        if self.sentence_spans is None:
+            return None
+        return [self.text[start:end] for start, end in self.sentence_spans]
+
+    def set_sentences(self, sentences: List[str]):
+        """Store the sentences of the pre-processed text.
+
+        The sentences are joined with a single whitespace into :attr:`text`,
+        and their offsets are stored in :attr:`sentence_spans`.
+
+        Args:
+            sentences (:obj:`List[str]`):
+                The sentences of the text.
+        """
+        spans = []
+        start = 0
+        for sentence in sentences:
+            spans.append((start, start + len(sentence)))
+            start += len(sentence) + 1
+        self.text = " ".join(sentences)
+        self.sentence_spans = spans
+        self.token_ids = None
+
+    def __repr__(self):
+        return (f'Document({self.word_count} words, '
+                f'{len(self.sentence_spans or [])} sentences)')
 
 
 class PlainTextRequestSchema(BaseModel):
@@ -110,6 +192,11 @@ class PlainTextRequestSchema(BaseModel):
         cache (:obj:`bool`), `optional`, defaults to :obj:`True`):
             Whether the summary must be cached or not. A cached summary implies
             that it will be permanently stored in the database.
+        deadline (:obj:`float`, `optional`):
+            The maximum time, in seconds, the generation of the summary may
+            take. Once it is reached, the summary is completed with the part
+            generated so far, and a warning is added. It can also be passed
+            through the ``X-Deadline`` header, which takes precedence.
     """
 
     source: str
@@ -117,6 +204,7 @@ class PlainTextRequestSchema(BaseModel):
     params: Optional[Dict[str, Any]] = {}
     language: Optional[SupportedLanguage] = SupportedLanguage.ENGLISH
     cache: Optional[bool]
+    deadline: Optional[PositiveFloat]
 
 
 class ResponseSchema(BaseModel):
@@ -144,6 +232,10 @@ class ResponseSchema(BaseModel):
             The parameters with which the summary was generated.
         language (:obj:jizt.supported_languages.SupportedLanguage):
             The language of the summary.
+        progress (:obj:`dict`):
+            The progress of a hierarchical summary (if any), e.g.,
+            ``{"level": 1, "max_levels": 3, "subdivisions": 4}`` while the
+            partial summaries of the first level are being reduced.
         warnings (:obj:`dict`):
             The warnings derived from the client's request (if any).
     """
@@ -156,4 +248,5 @@ class ResponseSchema(BaseModel):
     model: SupportedModel
     params: Dict[str, Any] = {}
     language: SupportedLanguage
+    progress: Optional[Dict[str, int]]
     warnings: Dict[str, List[str]]
@@ -0,0 +1,165 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Load-aware degradation of the summary generation."""
+
+__version__ = '0.1.0'
+
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from jizt.config import (LOG_LEVEL, SUMM_DEGRADATION_QUEUE_DEPTH,
+                         SUMM_DEGRADATION_TARGET_LATENCY)
+from typing import Any, Dict, Iterator
+
+# Params that determine the cost of the decoding. Requests that set any of them
+# are never degraded.
+DECODING_PARAMS = ("do_sample", "early_stopping", "num_beams", "temperature",
+                   "top_k", "top_p", "num_return_sequences")
+
+
+class DegradationLevel(Enum):
+    """Steps of the degradation ladder, from the full-quality summary down.
+
+    The value of each level is the warning added to the degraded summaries.
+    """
+
+    NONE = None
+    FEWER_BEAMS = "The number of beams was reduced due to high load."
+    GREEDY = "Greedy decoding was used instead of beam search due to high load."
+    EXTRACTIVE = ("An extractive summary was generated instead of an "
+                  "abstractive one due to high load.")
+
+
+class DegradationPolicy:
+    """Policy that steps down the decoding cost under high load.
+
+    The load is measured as the maximum of two ratios: the number of summaries
+    being generated with respect to :obj:`queue_depth`, and the mean latency of
+    the most recent summaries with respect to :obj:`target_latency`. Each
+    ``0.5`` the load goes over ``1.0``, the summaries go one step down the
+    ladder: fewer beams, then greedy decoding, then an extractive summary.
+
+    Args:
+        queue_depth (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_DEGRADATION_QUEUE_DEPTH`):
+            The number of concurrent summaries above which summaries are
+            degraded.
+        target_latency (:obj:`float`, `optional`, defaults to :obj:`jizt.config.SUMM_DEGRADATION_TARGET_LATENCY`):
+            The mean latency (in seconds) above which summaries are degraded.
+        window (:obj:`int`, `optional`, defaults to 20):
+            The number of recent summaries the mean latency is computed over.
+        log_level (:obj:`int`, `optional`, defaults to :obj:`jizt.config.LOG_LEVEL`):
+            The log level.
+    """
+
+    # Load from which each level (but NONE) is applied
+    LOAD_THRESHOLDS = ((2.0, DegradationLevel.EXTRACTIVE),
+                       (1.5, DegradationLevel.GREEDY),
+                       (1.0, DegradationLevel.FEWER_BEAMS))
+
+    def __init__(
+        self,
+        queue_depth: int = SUMM_DEGRADATION_QUEUE_DEPTH,
+        target_latency: float = SUMM_DEGRADATION_TARGET_LATENCY,
+        window: int = 20,
+        log_level: int = LOG_LEVEL
+    ):
+        self._queue_depth = queue_depth
+        self._target_latency = target_latency
+        self._in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        logging.basicConfig(
+            format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
+            level=log_level,
+            datefmt='%d/%m/%Y %I:%M:%S %p'
+        )
+        self.logger = logging.getLogger("DegradationPolicy")
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Track the generation of a summary.
+
+        The summary counts towards the queue depth while the context is
+        active, and its latency is recorded when it exits.
+        """
+        with self._lock:
+            self._in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._latencies.append(time.monotonic() - start)
+
+    @property
+    def load(self) -> float:
+        """The current load (see :class:`DegradationPolicy`)."""
+        with self._lock:
+            depth_load = self._in_flight / self._queue_depth
+            latency_load = (
+                sum(self._latencies) / len(self._latencies)
+                / self._target_latency if self._latencies else 0.0
+            )
+        return max(depth_load, latency_load)
+
+    def level(self, params: Dict[str, Any]) -> DegradationLevel:
+        """Decide how much a summary must be degraded.
+
+        Args:
+            params (:obj:`Dict[str, Any]`):
+                The params of the summary, as specified by the client.
+
+        Returns:
+            :obj:`DegradationLevel`: The degradation level.
+        """
+        if any(param in params for param in DECODING_PARAMS):
+            return DegradationLevel.NONE
+        load = self.load
+        for threshold, level in self.LOAD_THRESHOLDS:
+            if load >= threshold:
+                self.logger.debug("Load %.2f: %s.", load, level.name)
+                return level
+        return DegradationLevel.NONE
+
+    @staticmethod
+    def degrade_params(
+        params: Dict[str, Any],
+        level: DegradationLevel
+    ) -> Dict[str, Any]:
+        """Apply a degradation level to the generation params.
+
+        Args:
+            params (:obj:`Dict[str, Any]`):
+                The params passed to :meth:`Summarizer.summarize`.
+            level (:obj:`DegradationLevel`):
+                The degradation level. :obj:`DegradationLevel.EXTRACTIVE` does
+                not change the params, since the summarizer is not used.
+
+        Returns:
+            :obj:`Dict[str, Any]`: The degraded params.
+        """
+        if level is DegradationLevel.FEWER_BEAMS:
+            # Halve the default number of beams of the summarizer (4)
+            return dict(params, num_beams=2)
+        if level is DegradationLevel.GREEDY:
+            return dict(params, num_beams=1, do_sample=False)
+        return params
@@ -17,17 +17,27 @@
 
 """Summarization pipeline."""
 
+import time
 import logging
 from datetime import datetime
+from functools import partial
 from .text_processing.preprocessing import TextPreprocessor
 from .text_encoding.encoding import SplitterEncoder
 from .text_summarization.summarization import Summarizer
+from .text_summarization.hierarchical import HierarchicalSummarizer
+from .text_summarization.extractive import extractive_summarize
+from .degradation import DegradationLevel, DegradationPolicy
 from .text_processing.postprocessing import TextPostprocessor
 from ..data.summary_dao_singleton import SummaryDAOSingleton
-from ..models import Summary
+from ..models import Document, Summary
 from ..utils.id_generation import generate_summary_id
 from ..utils.summary_status import SummaryStatus
-from jizt.config import LOG_LEVEL
+from ..utils.summary_stream import SummaryStream
+from ..utils.prefetching import prefetch
+from jizt.config import (LOG_LEVEL, SUMM_HIERARCHICAL,
+                         SUMM_HIERARCHICAL_MIN_SUBDIVISIONS, SUMM_DEGRADATION,
+                         SUMM_INCREMENTAL_ENCODING_MIN_LENGTH)
+from typing import Dict, Iterable, List, Optional
 
 
 class SummarizationPipeline:
@@ -36,6 +46,22 @@ class SummarizationPipeline:
     This class takes care of the different summarization steps. It also updates
     the summaries stored in the database.
 
+    If hierarchical summarization is enabled, texts with at least
+    :obj:`jizt.config.SUMM_HIERARCHICAL_MIN_SUBDIVISIONS` subdivisions are
+    summarized with a :class:`HierarchicalSummarizer`. Their text is not
+    streamed, but each reduce level is notified with a ``"reducing"`` status.
+
+    Otherwise, texts with at least
+    :obj:`jizt.config.SUMM_INCREMENTAL_ENCODING_MIN_LENGTH` characters are
+    encoded in a background thread with :meth:`SplitterEncoder.encode_iter`,
+    and the summarizer consumes their subdivisions as they are encoded.
+
+    If load-aware degradation is enabled, a :class:`DegradationPolicy` decides
+    whether the generation params of each summary must be made cheaper, and the
+    decision is recorded in the warnings of the summary. Degraded summaries are
+    stored under an id that includes the degradation level, so they are never
+    served in place of the full-quality summary.
+
     Args:
     #TODO
     """
@@ -51,28 +77,297 @@ class SummarizationPipeline:
         self.text_preprocessor = TextPreprocessor()
         self.encoder = SplitterEncoder()
         self.summarizer = Summarizer()
+        self.hierarchical_summarizer = (HierarchicalSummarizer(self.encoder)
+                                        if SUMM_HIERARCHICAL else None)
+        self.degradation_policy = (DegradationPolicy()
+                                   if SUMM_DEGRADATION else None)
         self.text_postprocessor = TextPostprocessor()
 
-    def run(self, request_id: str, summary: Summary):
-        """#TODO: document."""
-        preprocessed_text = self.text_preprocessor.preprocess(summary.source)
+    def run(
+        self,
+        request_id: str,
+        summary: Summary,
+        stream: Optional[SummaryStream] = None,
+        deadline: Optional[float] = None,
+        document: Optional[Document] = None
+    ):
+        """Run the summarization pipeline.
+
+        Args:
+            request_id (:obj:`str`):
+                The id of the request.
+            summary (:obj:`Summary`):
+                The initial summary, with ``"preprocessing"`` status.
+            stream (:obj:`SummaryStream`, `optional`):
+                If set, the status changes and the text generated by the
+                summarizer are streamed through it. The stream is closed once
+                the pipeline finishes.
+            deadline (:obj:`float`, `optional`):
+                If set, the time (as returned by :func:`time.monotonic`) by
+                which the summary must be finished. When it is reached, the
+                summary is completed with the part generated so far, and a
+                warning is added to it.
+            document (:obj:`Document`, `optional`):
+                The document of the source of the summary, as built by the
+                view. If not set, it is built from the source.
+        """
+        if document is None:
+            document = Document(summary.source)
+        try:
+            if self.degradation_policy is None:
+                self._run(request_id, summary, stream, deadline, document)
+            else:
+                with self.degradation_policy.track():
+                    self._run(request_id, summary, stream, deadline,
+                              document)
+        except Exception as exc:
+            if stream is not None:
+                stream.put_error(str(exc))
+            raise
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def _run(
+        self,
+        request_id: str,
+        summary: Summary,
+        stream: Optional[SummaryStream],
+        deadline: Optional[float],
+        document: Document
+    ):
+        """See :meth:`run`."""
+        warnings: Dict[str, List[str]] = {}
+        self.text_preprocessor.preprocess_document(document)
+        preprocessed_text = document.text
+        params = summary.params
+        summary_params = summary.params
+        level = DegradationLevel.NONE
+        if self.degradation_policy is not None:
+            level = self.degradation_policy.level(params)
+            params = self.degradation_policy.degrade_params(params, level)
+            if level is not DegradationLevel.NONE:
+                warnings.setdefault("load", []).append(level.value)
+                # The degradation level is part of the summary id, so that a
+                # degraded summary is not served to later requests expecting
+                # the full-quality one
+                summary_params = dict(summary.params, degradation=level.value)
         new_summary_id = generate_summary_id(preprocessed_text, summary.model,
-                                             summary.params)
+                                             summary_params)
         self.db.update_source(summary.source, preprocessed_text,
                               summary.id_, new_summary_id)
-        self.db.update_summary(request_id, status=SummaryStatus.ENCODING.value)
-        encoded_text = self.encoder.encode(preprocessed_text)
-        self.db.update_summary(request_id, status=SummaryStatus.SUMMARIZING.value)
-        raw_summary = self.summarizer.summarize(
-            encoded_text,
-            **summary.params
-        )
-        self.db.update_summary(request_id, status=SummaryStatus.POSTPROCESSING.value)
-        summary = self.text_postprocessor.postprocess(raw_summary)
+        if level is DegradationLevel.EXTRACTIVE:
+            self._update_status(request_id, SummaryStatus.SUMMARIZING, stream)
+            raw_summary = extractive_summarize(document.sentences, **params)
+        else:
+            skipped: List[int] = []
+            if deadline is not None:
+                params = dict(params, deadline=deadline,
+                              deadline_callback=skipped.append)
+            self._update_status(request_id, SummaryStatus.ENCODING, stream)
+            if (self.hierarchical_summarizer is None and len(preprocessed_text)
+                    >= SUMM_INCREMENTAL_ENCODING_MIN_LENGTH):
+                raw_summary = self._summarize_incrementally(
+                    request_id, document, params, stream)
+            else:
+                encoded_text = self.encoder.encode(document)
+                self._update_status(request_id, SummaryStatus.SUMMARIZING,
+                                    stream)
+                raw_summary = self._summarize(request_id, encoded_text, params,
+                                              stream)
+            # Besides skipping subdivisions, the deadline may have cut short
+            # the generation of the last ones (through max_time)
+            if skipped or (deadline is not None
+                           and time.monotonic() >= deadline):
+                self.logger.debug("Request %s reached its deadline (%d "
+                                  "subdivisions skipped).", request_id,
+                                  sum(skipped))
+                if raw_summary.strip():
+                    warning = ("The deadline was reached before the summary "
+                               "was finished, so the summary is partial.")
+                else:
+                    warning = ("The deadline was reached before any "
+                               "subdivision was summarized, so the summary is "
+                               "empty.")
+                warnings.setdefault("deadline", []).append(warning)
+                # A partial summary must not be served to later requests of
+                # the same text and params, so it is moved to an id of its own
+                partial_summary_id = generate_summary_id(
+                    preprocessed_text, summary.model,
+                    dict(summary_params, partial=request_id)
+                )
+                self.db.update_source(preprocessed_text, preprocessed_text,
+                                      new_summary_id, partial_summary_id)
+        self._update_status(request_id, SummaryStatus.POSTPROCESSING, stream)
+        if raw_summary.strip():
+            summary = self.text_postprocessor.postprocess(raw_summary)
+        else:
+            # Nothing was generated (e.g., the deadline was reached before the
+            # first subdivision), so there is nothing to postprocess
+            summary = ""
         self.db.update_summary(
             request_id,
             status=SummaryStatus.COMPLETED.value,
             output=summary,
             output_length=len(summary),
-            ended_at=datetime.now()
+            ended_at=datetime.now(),
+            warnings=warnings or None
+        )
+        if stream is not None:
+            stream.put_status(SummaryStatus.COMPLETED)
+
+    def _summarize(
+        self,
+        request_id: str,
+        encoded_text: list,
+        params: dict,
+        stream: Optional[SummaryStream]
+    ) -> str:
+        """Summarize the encoded text.
+
+        Args:
+            request_id (:obj:`str`):
+                The id of the request.
+            encoded_text (:obj:`list`):
+                The subdivisions of the text.
+            params (:obj:`dict`):
+                The params passed to the summarizer.
+            stream (:obj:`SummaryStream`):
+                The stream of the summary, if any.
+
+        Returns:
+            :obj:`str`: The raw summary.
+        """
+        if (self.hierarchical_summarizer is not None
+                and len(encoded_text) >= SUMM_HIERARCHICAL_MIN_SUBDIVISIONS):
+            return self.hierarchical_summarizer.summarize(
+                encoded_text,
+                level_callback=partial(self._update_level, request_id,
+                                       stream=stream),
+                **params
+            )
+        return self.summarizer.summarize(
+            encoded_text,
+            **params,
+            text_callback=None if stream is None else stream.put_text
         )
+
+    def _summarize_incrementally(
+        self,
+        request_id: str,
+        document: Document,
+        params: dict,
+        stream: Optional[SummaryStream]
+    ) -> str:
+        """Encode and summarize a text at the same time.
+
+        The text is encoded in a background thread, and its subdivisions are
+        summarized as soon as they are encoded.
+
+        Args:
+            request_id (:obj:`str`):
+                The id of the request.
+            document (:obj:`Document`):
+                The preprocessed document.
+            params (:obj:`dict`):
+                The params passed to the summarizer.
+            stream (:obj:`SummaryStream`):
+                The stream of the summary, if any.
+
+        Returns:
+            :obj:`str`: The raw summary.
+        """
+        # The encoder thread is stopped if the summarizer stops consuming the
+        # subdivisions, e.g., when the deadline is reached
+        encoded_text = prefetch(self.encoder.encode_iter(document))
+        try:
+            return " ".join(self.summarizer.summarize_incrementally(
+                self._notify_first(request_id, encoded_text, stream),
+                **params,
+                text_callback=None if stream is None else stream.put_text
+            ))
+        finally:
+            encoded_text.close()
+
+    def _notify_first(
+        self,
+        request_id: str,
+        encoded_text: Iterable,
+        stream: Optional[SummaryStream]
+    ):
+        """Move to ``"summarizing"`` status once the first subdivision is ready.
+
+        Args:
+            request_id (:obj:`str`):
+                The id of the request.
+            encoded_text (:obj:`Iterable`):
+                The subdivisions of the text.
+            stream (:obj:`SummaryStream`):
+                The stream of the summary, if any.
+
+        Yields:
+            The subdivisions of the text.
+        """
+        notified = False
+        for subdivision in encoded_text:
+            if not notified:
+                self._update_status(request_id, SummaryStatus.SUMMARIZING,
+                                    stream)
+                notified = True
+            yield subdivision
+
+    def _update_status(
+        self,
+        request_id: str,
+        status: SummaryStatus,
+        stream: Optional[SummaryStream]
+    ):
+        """Update the status of a summary, notifying it through the stream.
+
+        Args:
+            request_id (:obj:`str`):
+                The id of the request.
+            status (:obj:`SummaryStatus`):
+                The new status.
+            stream (:obj:`SummaryStream`):
+                The stream of the summary, if any.
+        """
+        self.db.update_summary(request_id, status=status.value)
+        if stream is not None:
+            stream.put_status(status)
+
+    def _update_level(
+        self,
+        request_id: str,
+        level: int,
+        subdivisions: int,
+        stream: Optional[SummaryStream]
+    ):
+        """Store and notify the progress of a hierarchical summary.
+
+        The first level (map stage) keeps the ``"summarizing"`` status, and the
+        next ones (reduce stage) have ``"reducing"`` status. The level, the
+        maximum number of levels and the number of subdivisions of the level
+        are stored as the progress of the summary.
+
+        Args:
+            request_id (:obj:`str`):
+                The id of the request.
+            level (:obj:`int`):
+                The level being summarized.
+            subdivisions (:obj:`int`):
+                The number of subdivisions of the level.
+            stream (:obj:`SummaryStream`):
+                The stream of the summary, if any.
+        """
+        self.logger.debug("Request %s: level %d, %d subdivisions.",
+                          request_id, level, subdivisions)
+        status = (SummaryStatus.SUMMARIZING if level == 0
+                  else SummaryStatus.REDUCING)
+        progress = {"level": level,
+                    "max_levels": self.hierarchical_summarizer.max_levels,
+                    "subdivisions": subdivisions}
+        self.db.update_summary(request_id, status=status.value,
+                               progress=progress)
+        if stream is not None:
+            stream.put_status(status, **progress)
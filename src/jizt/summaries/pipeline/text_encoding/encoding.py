@@ -17,14 +17,24 @@
 
 """Text encoding class with support for the T5 Hugging Face pretrained model."""
 
-__version__ = '0.0.4'
+__version__ = '0.1.2'
 
 import logging
 import torch
-from transformers import T5Tokenizer, tokenization_utils_base
+from collections import deque
+from itertools import accumulate, chain
+from transformers import tokenization_utils_base
 from ..text_processing.tokenization import sentence_tokenize
-from jizt.config import LOG_LEVEL, SUMM_TOKENIZER_PATH
-from typing import List, Tuple, Optional, Union
+from ..tokenizer_registry import get_tokenizer
+from ...models import Document
+from .partition import partition_sentences, partition_incrementally
+from .subdivision_buffer import SubdivisionBuffer
+from .sentence_splitting import CLAUSE_PUNCTUATION, split_oversized_sentences
+from .subdivision_planning import SubdivisionCostModel, SubdivisionPlanner
+from jizt.config import (LOG_LEVEL, SUMM_TOKENIZER_PATH, SUMM_MAX_BATCH_SIZE,
+                         SUMM_SUBDIVISION_LENGTH, SUMM_COST_MODEL_PATH)
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
 
 
 class SplitterEncoder:
@@ -33,7 +43,20 @@ class SplitterEncoder:
     This text encoder splits the input text to adapt it to the maximum input
     length of a specific model. The split is done in a balanced way so that
     each set contains roughly the same number of tokens, without splitting
-    sentences.
+    sentences (see :func:`partition.partition_sentences`). Only the sentences
+    which do not fit in a subdivision on their own are split, preferably after
+    a punctuation mark or between words (see
+    :func:`sentence_splitting.split_sentence`), so that no subdivision exceeds
+    the maximum length of the model.
+
+    The length up to which the subdivisions are filled is chosen by a
+    :class:`subdivision_planning.SubdivisionPlanner`: either
+    :obj:`subdivision_length`, the length with the lowest predicted cost
+    according to the cost model in :obj:`cost_model_path`, or, if there is no
+    cost model, the model max. length.
+
+    Large texts can also be encoded incrementally with :meth:`encode_iter`,
+    which yields each subdivision as soon as its sentences are tokenized.
 
     This encoder uses the
     `Hugging Face T5
@@ -43,14 +66,30 @@ class SplitterEncoder:
     `Hugging Face docs
     <https://huggingface.co/transformers/internal/tokenization_utils.html#transformers.tokenization_utils_base.PreTrainedTokenizerBasee>`__
     for further information on tokenization.
+
+    Args:
+        tokenizer_path (:obj:`str`, `optional`, defaults to :obj:`jizt.config.SUMM_TOKENIZER_PATH`):
+            The path or name of the pretrained tokenizer.
+        subdivision_length (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_SUBDIVISION_LENGTH`):
+            If set, the target length of the subdivisions, in tokens.
+        cost_model_path (:obj:`str` or :obj:`pathlib.Path`, `optional`, defaults to :obj:`jizt.config.SUMM_COST_MODEL_PATH`):
+            The path to the calibrated cost model of the summarizer. Ignored
+            if :obj:`subdivision_length` is set or the file does not exist.
+        max_batch_size (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_MAX_BATCH_SIZE`):
+            The max. batch size of the summarizer.
+        log_level (:obj:`int`, `optional`, defaults to :obj:`jizt.config.LOG_LEVEL`):
+            The log level.
     """
 
     def __init__(
         self,
         tokenizer_path: str = SUMM_TOKENIZER_PATH,
+        subdivision_length: Optional[int] = SUMM_SUBDIVISION_LENGTH,
+        cost_model_path: Optional[Union[str, Path]] = SUMM_COST_MODEL_PATH,
+        max_batch_size: int = SUMM_MAX_BATCH_SIZE,
         log_level: int = LOG_LEVEL
     ):
-        self._tokenizer = T5Tokenizer.from_pretrained(tokenizer_path)
+        self._tokenizer = get_tokenizer(tokenizer_path)
         if LOG_LEVEL != logging.DEBUG:
             # Deactivate warnings from the tokenizer
             logging.getLogger("transformers.tokenization_utils_base").setLevel(logging.ERROR)
@@ -60,19 +99,43 @@ class SplitterEncoder:
             datefmt='%d/%m/%Y %I:%M:%S %p'
         )
         self.logger = logging.getLogger("Encoder")
+        cost_model = None
+        if (subdivision_length is None and cost_model_path is not None
+                and Path(cost_model_path).is_file()):
+            cost_model = SubdivisionCostModel.load(cost_model_path)
+            self.logger.debug(f"Loaded {cost_model}.")
+        self._planner = SubdivisionPlanner(
+            cost_model,
+            max_length=self._tokenizer.model_max_length,
+            max_batch_size=max_batch_size,
+            target_length=subdivision_length
+        )
+        # Tokens where oversized sentences can be split
+        vocab = self._tokenizer.get_vocab()
+        self._word_start_ids = frozenset(
+            id_ for piece, id_ in vocab.items() if piece.startswith("▁")
+        )
+        self._clause_end_ids = frozenset(
+            id_ for piece, id_ in vocab.items()
+            if piece.lstrip("▁") and piece[-1] in CLAUSE_PUNCTUATION
+        )
 
     @property
     def tokenizer(self):
         return self._tokenizer
 
+    @property
+    def planner(self):
+        return self._planner
+
     def encode(
         self,
-        text: str,
+        text: Union[str, Document],
         prefix: Optional[str] = 'summarize: ',
         truncation: Optional[Union[bool, str, tokenization_utils_base.TruncationStrategy]] = False,
         max_length: Optional[int] = None,
         return_tensors: Optional[str] = 'pt'
-    ) -> Union[List[int], torch.LongTensor]:
+    ) -> Union[List[List[int]], SubdivisionBuffer]:
         """Transform a string into a sequence of ids (:obj:`int`), using the tokenizer and vocabulary.
 
         To avoid going over the maximum sequence length of the tokenizer, the
@@ -80,8 +143,12 @@ class SplitterEncoder:
         approximately the same number of tokens.
 
         Args:
-            text (:obj:`str`):
-                The text to be tokenized.
+            text (:obj:`str` or :obj:`Document`):
+                The text to be tokenized. If it is a pre-processed
+                :obj:`Document`, its sentences are used instead of splitting
+                the text again, and the token ids of the sentences are stored
+                in it (unless the sentences are truncated). If the document
+                already holds them, the sentences are not tokenized again.
             prefix (:obj:`str`, `optional`, defaults to 'summarize: '):
                 String to be added at the beginning of each subdivision.
             truncation (:obj:`bool`, :obj:`str` or :class:`~transformers.tokenization_utils_base.TruncationStrategy`,
@@ -122,7 +189,9 @@ class SplitterEncoder:
 
                 Acceptable values are:
 
-                * :obj:`'pt'`: Return PyTorch :obj:`torch.Tensor` objects.
+                * :obj:`'pt'`: Return a :obj:`SubdivisionBuffer`, i.e., the
+                  ids of all the subdivisions in a single PyTorch
+                  :obj:`torch.Tensor`, along with their offsets.
 
                 .. note::
 
@@ -130,8 +199,8 @@ class SplitterEncoder:
                    objects are not currently supported.
 
         Returns:
-            :obj:`List[int]` or :obj:`torch.Tensor`: The tokenized ids of the
-            text, split into groups, i.e.::
+            :obj:`List[List[int]]` or :obj:`SubdivisionBuffer`: The tokenized
+            ids of the text, split into groups, i.e.::
 
                 [[ids_first_subdivision],
                  [ids_second_subdivision],
@@ -150,131 +219,173 @@ class SplitterEncoder:
         # If prefix is None, take the empty string
         prefix = "" if prefix is None else prefix
 
-        sentences = sentence_tokenize(text)
-        # Tokens of each sentence. We remove the last token (EOS token).
-        sent_tks = [self.tokenizer.encode(sent,
-                                          truncation=truncation,
-                                          max_length=max_length,
-                                          return_tensors=return_tensors)[0][:-1]
-                    for sent in sentences]
-        # Number of tokens of each sentence
-        sent2ntks = [len(sent) for sent in sent_tks]
+        if (isinstance(text, Document) and text.token_ids is not None
+                and not truncation):
+            sent_tks = text.token_ids
+        else:
+            sentences = self._get_sentences(text)
+            # Tokens of each sentence, without EOS token, all encoded in a
+            # single batched call. One token is left for the EOS when
+            # truncating.
+            sent_tks = self.tokenizer(
+                sentences,
+                add_special_tokens=False,
+                truncation=truncation,
+                max_length=None if max_length is None else max_length - 1
+            )["input_ids"]
+            if isinstance(text, Document) and not truncation:
+                text.token_ids = sent_tks
         # Tokens of the prefix
-        prefix_tks = self.tokenizer.encode(prefix,
-                                           return_tensors=return_tensors)[0][:-1]
+        prefix_tks = self.tokenizer.encode(prefix, add_special_tokens=False)
         # Number of tokens of the prefix
         ntks_prefix = len(prefix_tks)
+        sent_tks = self._split_oversized(sent_tks, ntks_prefix)
+        # Number of tokens of each sentence
+        sent2ntks = [len(sent) for sent in sent_tks]
+        # Tokens of all the sentences, one after the other, and the position
+        # of the first token of each sentence
+        flat_tks = list(chain.from_iterable(sent_tks))
+        sent2offset = [0] + list(accumulate(sent2ntks))
+
+        subdiv_length = self._planner.target_length(sum(sent2ntks),
+                                                    ntks_prefix)
+        split_points, _ = partition_sentences(sent2ntks, ntks_prefix,
+                                              subdiv_length)
+
+        # The ids of all the subdivisions are gathered in a single list, which
+        # is converted to a tensor only once
+        subdivs_tks = []
+        subdiv2offset = [0]
+        for start, end in zip(split_points[:-1], split_points[1:]):
+            subdivs_tks.extend(prefix_tks)
+            subdivs_tks.extend(flat_tks[sent2offset[start]:sent2offset[end]])
+            subdivs_tks.append(self.tokenizer.eos_token_id)
+            subdiv2offset.append(len(subdivs_tks))
+
+        if return_tensors == 'pt':
+            return SubdivisionBuffer(torch.tensor(subdivs_tks),
+                                     torch.tensor(subdiv2offset))
+        return [subdivs_tks[start:end] for start, end
+                in zip(subdiv2offset[:-1], subdiv2offset[1:])]
+
+    def encode_iter(
+        self,
+        text: Union[str, Document],
+        prefix: Optional[str] = 'summarize: ',
+        truncation: Optional[Union[bool, str, tokenization_utils_base.TruncationStrategy]] = False,
+        max_length: Optional[int] = None,
+        return_tensors: Optional[str] = 'pt',
+        chunk_size: int = 256
+    ) -> Iterator[Union[List[int], torch.LongTensor]]:
+        """Encode a text incrementally, yielding each subdivision when ready.
+
+        The sentences are tokenized in chunks of :obj:`chunk_size` sentences,
+        and are divided into subdivisions as they are tokenized (see
+        :func:`partition.partition_incrementally`), so that the first
+        subdivisions can be summarized while the rest of the text is still
+        being encoded. The subdivisions are balanced within windows of a few
+        subdivisions, so they may differ slightly from those returned by
+        :meth:`encode`.
 
-        split_points, subdiv2ntks = self._divide_eagerly(sent2ntks,
-                                                         ntks_prefix)
-
-        split_points, subdiv2ntks = self._balance_subdivisions(split_points,
-                                                               subdiv2ntks,
-                                                               sent2ntks)
-
-        encoded_subdivs = [torch.cat(
-                               [prefix_tks]
-                               + sent_tks[split_points[i]:split_points[i+1]]
-                               + [torch.tensor([self.tokenizer.eos_token_id])]
-                           ).unsqueeze(0) for i in range(len(split_points) - 1)]
-
-        return encoded_subdivs
+        Args:
+            text (:obj:`str` or :obj:`Document`):
+                The text to be tokenized. If it is a pre-processed
+                :obj:`Document`, its sentences are used instead of splitting
+                the text again. The token ids are not stored in it.
+            prefix (:obj:`str`, `optional`, defaults to 'summarize: '):
+                String to be added at the beginning of each subdivision.
+            truncation (:obj:`bool`, :obj:`str` or :class:`~transformers.tokenization_utils_base.TruncationStrategy`,
+                        `optional`, defaults to :obj:`False`):
+                Activates and controls truncation. See :meth:`encode`.
+            max_length (:obj:`int`, `optional`):
+                Controls the maximum length to use by one of the
+                truncation/padding parameters. See :meth:`encode`.
+            return_tensors (:obj:`str`, `optional`, defaults to 'pt'):
+                If set to :obj:`'pt'`, each subdivision is yielded as a 1-D
+                PyTorch :obj:`torch.Tensor`. Otherwise, as a list of ids.
+            chunk_size (:obj:`int`, `optional`, defaults to 256):
+                The number of sentences tokenized in each call to the
+                tokenizer.
+
+        Yields:
+            :obj:`List[int]` or :obj:`torch.LongTensor`: The tokenized ids of
+            each of the subdivisions, in order.
+        """
+        if return_tensors is not None and return_tensors not in ('pt'):
+            raise NotImplementedError(f'{return_tensors} '
+                                      f'tensors are currently not supported.')
 
-    def _divide_eagerly(
-        self,
-        sent2ntks: List[int],
-        ntks_prefix: int
-    ) -> Tuple[List[int], List[int]]:
-        """Subdivide the text eagerly.
+        # If prefix is None, take the empty string
+        prefix = "" if prefix is None else prefix
 
-        The sentences are divided into groups, ensuring that the
-        length of any of these groups (subdivisions) is always less
-        or equal than the model max. sequence length, without splitting
-        sentences.
+        sentences = self._get_sentences(text)
+        prefix_tks = self.tokenizer.encode(prefix, add_special_tokens=False)
+        # Tokens of the sentences tokenized but not yet yielded
+        pending_tks = deque()
+
+        def tokenize_chunks():
+            for i in range(0, len(sentences), chunk_size):
+                sent_tks = self.tokenizer(
+                    sentences[i:i + chunk_size],
+                    add_special_tokens=False,
+                    truncation=truncation,
+                    max_length=None if max_length is None else max_length - 1
+                )["input_ids"]
+                sent_tks = self._split_oversized(sent_tks, len(prefix_tks))
+                pending_tks.extend(sent_tks)
+                yield [len(sent) for sent in sent_tks]
+
+        for start, end in partition_incrementally(
+                tokenize_chunks(), len(prefix_tks),
+                self._planner.target_length(ntks_prefix=len(prefix_tks))):
+            subdiv_tks = list(prefix_tks)
+            for _ in range(end - start):
+                subdiv_tks.extend(pending_tks.popleft())
+            subdiv_tks.append(self.tokenizer.eos_token_id)
+            yield (torch.tensor(subdiv_tks) if return_tensors == 'pt'
+                   else subdiv_tks)
+
+    @staticmethod
+    def _get_sentences(text: Union[str, Document]) -> List[str]:
+        """Get the sentences of a text.
 
         Args:
-            sent2ntks (:obj:`List[int]`):
-                The number of encoded tokens corresponding to each of
-                the sentences. The indexes match those from :obj:`sentences`,
-                so that the tokens corresponding to the first sentence would
-                be :ob:`sent2ntks[0]` and so on.
-            ntks_prefix (:obj:`int`):
-                The number of encoded tokens corresponding to the prefix.
+            text (:obj:`str` or :obj:`Document`):
+                The text.
 
         Returns:
-            :obj:`Tuple[List[int], List[int]]`: A tuple containing:
-
-                * The points where to split in order to form the subdivisions,
-                  e.g. ``[0. 15, 32, 51]`` means that the first subdivision
-                  contains ``sentences[0:15]``, the second ``sentences[15:32]``,
-                  and the third and last ``[sentences[32:51]``.
-                * The number of tokens in each subdivision.
+            :obj:`List[str]`: The sentences of the document, if it has been
+            pre-processed, or the text split into sentences otherwise.
         """
-        subdiv2ntks = []
-        split_points = [0]
-        subdiv_len = ntks_prefix + sent2ntks[0] + 1
-        for i in range(1, len(sent2ntks)):
-            subdiv_len += sent2ntks[i]
-            if subdiv_len > self.tokenizer.model_max_length:
-                split_points.append(i)
-                subdiv2ntks.append(subdiv_len - sent2ntks[i])
-                subdiv_len = ntks_prefix + sent2ntks[i] + 1
-        split_points.append(len(sent2ntks))
-        subdiv2ntks.append(subdiv_len)
-        return split_points, subdiv2ntks
-
-    def _balance_subdivisions(
-        self,
-        split_points: List[int],
-        subdiv2ntks: List[int],
-        sent2ntks: List[int]
-    ) -> Tuple[List[int], List[int]]:
-        """Balance the subdivisions in terms of length.
+        if isinstance(text, Document):
+            if text.sentence_spans is not None:
+                return text.sentences
+            return sentence_tokenize(text.normalized_text, normalized=True)
+        return sentence_tokenize(text)
 
-        This method is meant to be called after :meth:`_divide_eagerly`.
-        If needed, it moves sentences from one subdivision to another in
-        such way that all the subdvisions have the same length, approximately,
-        and keeping the model max. length restriction.
+    def _split_oversized(
+        self,
+        sent_tks: List[List[int]],
+        ntks_prefix: int
+    ) -> List[List[int]]:
+        """Split the sentences that do not fit in a subdivision on their own.
 
         Args:
-            split_points (:obj:`List[int]`):
-                The points where to split in order to form the subdivisions,
-                e.g. ``[0. 15, 32, 51]`` means that the first subdivision
-                contains ``sentences[0:15]``, the second ``sentences[15:32]``,
-                and the third and last ``[sentences[32:51]``.
-            subdiv2ntks (:obj:`List[int]`):
-                The number of tokens in each subdivision.
-            sent2ntks (:obj:`List[int]`):
-                The number of encoded tokens corresponding to each of
-                the sentences. The indexes match those from :obj:`sentences`,
-                so that the tokens corresponding to the first sentence would
-                be :ob:`sent2ntks[0]` and so on.
+            sent_tks (:obj:`List[List[int]]`):
+                The tokens of each of the sentences, without EOS token.
+            ntks_prefix (:obj:`int`):
+                The number of encoded tokens of the prefix.
 
         Returns:
-            :obj:`Tuple[List[int], List[int]]`: A tuple containing:
-
-                * The balanced points where to split in order to form the
-                  subdivisions, being these of approximately the same length
-                  in number of encoded tokens.
-                * The number of tokens in each subdivision.
+            :obj:`List[List[int]]`: The tokens of each of the sentences, with
+            the oversized ones split into several pieces.
         """
-        balanced_split_points = split_points[:]
-        balanced_subdiv2ntks = subdiv2ntks[:]
-
-        while True:  # do while
-            prev_balanced_split_points = balanced_split_points[:]
-            for i in range(len(balanced_split_points)-1, 1, -1):
-                diff_ntks = balanced_subdiv2ntks[i-2] - balanced_subdiv2ntks[i-1]
-                while diff_ntks > 0:
-                    moved_sent_ntks = sent2ntks[balanced_split_points[i-1] - 1]
-                    if ((balanced_subdiv2ntks[i-1]
-                            + moved_sent_ntks <= self.tokenizer.model_max_length)
-                            and moved_sent_ntks <= diff_ntks):
-                        balanced_split_points[i-1] -= 1
-                        balanced_subdiv2ntks[i-1] += moved_sent_ntks
-                        balanced_subdiv2ntks[i-2] -= moved_sent_ntks
-                        diff_ntks = balanced_subdiv2ntks[i-2] - balanced_subdiv2ntks[i-1]
-                    else:
-                        break
-            if balanced_split_points == prev_balanced_split_points:
-                return balanced_split_points, balanced_subdiv2ntks
+        # The prefix and the EOS token are added to each subdivision
+        max_ntks = self.tokenizer.model_max_length - ntks_prefix - 1
+        split_sent_tks = split_oversized_sentences(sent_tks, max_ntks,
+                                                   self._clause_end_ids,
+                                                   self._word_start_ids)
+        if len(split_sent_tks) > len(sent_tks):
+            self.logger.debug("Oversized sentences split into %d pieces.",
+                              len(split_sent_tks) - len(sent_tks))
+        return split_sent_tks
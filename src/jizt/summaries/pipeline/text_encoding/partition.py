@@ -0,0 +1,239 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Partition of the sentences of a text into subdivisions."""
+
+__version__ = '0.1.1'
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Tuple
+
+
+def partition_sentences(
+    sent2ntks: List[int],
+    ntks_prefix: int,
+    max_length: int
+) -> Tuple[List[int], List[int]]:
+    """Divide the sentences into balanced subdivisions.
+
+    Each subdivision is made up of the prefix, consecutive sentences, and the
+    EOS token. The sentences are divided into the minimum number of
+    subdivisions that do not exceed :obj:`max_length` tokens, and, among the
+    partitions with that number of subdivisions, the one which minimises the
+    length of the longest subdivision is chosen. A sentence which does not fit
+    in :obj:`max_length` on its own forms a subdivision by itself (and is not
+    taken into account when minimising the longest subdivision).
+
+    The minimum length of the longest subdivision is found by binary search,
+    checking whether each candidate length is feasible by filling the
+    subdivisions greedily. Thanks to the prefix sums of the sentence lengths,
+    each check takes :math:`O(k \\log n)`, :math:`k` being the number of
+    subdivisions and :math:`n` the number of sentences. Then, each split point
+    is placed as close as possible to where an even split would put it, within
+    the range of positions that keep the longest subdivision at its minimum.
+
+    Args:
+        sent2ntks (:obj:`List[int]`):
+            The number of encoded tokens of each of the sentences.
+        ntks_prefix (:obj:`int`):
+            The number of encoded tokens of the prefix.
+        max_length (:obj:`int`):
+            The maximum number of tokens of a subdivision, e.g., the model
+            max. sequence length.
+
+    Returns:
+        :obj:`Tuple[List[int], List[int]]`: A tuple containing:
+
+            * The points where to split in order to form the subdivisions,
+              e.g. ``[0. 15, 32, 51]`` means that the first subdivision
+              contains ``sentences[0:15]``, the second ``sentences[15:32]``,
+              and the third and last ``[sentences[32:51]``.
+            * The number of tokens in each subdivision.
+    """
+    if not sent2ntks:
+        return [0], []
+    overhead = ntks_prefix + 1  # prefix and EOS token
+    prefix_sums = [0] + list(accumulate(sent2ntks))
+    # Minimum number of subdivisions
+    nsubdivs = len(_split_greedily(prefix_sums, max_length - overhead)) - 1
+    # The longest subdivision is at least as long as the longest sentence
+    # which fits in a subdivision (the rest form subdivisions on their own)
+    lower = max((ntks for ntks in sent2ntks if ntks + overhead <= max_length),
+                default=0) + overhead
+    upper = max(max_length, lower)
+    while lower < upper:
+        middle = (lower + upper) // 2
+        if len(_split_greedily(prefix_sums, middle - overhead)) - 1 <= nsubdivs:
+            upper = middle
+        else:
+            lower = middle + 1
+
+    split_points = _spread_split_points(prefix_sums, upper - overhead,
+                                        nsubdivs)
+    subdiv2ntks = [prefix_sums[end] - prefix_sums[start] + overhead
+                   for start, end in zip(split_points[:-1], split_points[1:])]
+    return split_points, subdiv2ntks
+
+
+def partition_incrementally(
+    sent2ntks_chunks: Iterable[List[int]],
+    ntks_prefix: int,
+    max_length: int,
+    window: int = 4
+) -> Iterator[Tuple[int, int]]:
+    """Divide the sentences into balanced subdivisions as they arrive.
+
+    The number of tokens of the sentences is received in chunks, e.g., as the
+    sentences are tokenized. Once the pending sentences fill at least
+    :obj:`window` subdivisions, they are divided with
+    :func:`partition_sentences`, and all the subdivisions but the last one are
+    emitted. The sentences of the last subdivision are kept, and are divided
+    again together with the next chunks. The rest of the sentences are divided
+    once all the chunks have been received.
+
+    The subdivisions are therefore balanced within windows of (at least)
+    :obj:`window` subdivisions, instead of across the whole text, but the
+    first ones are available before all the sentences have been received.
+
+    Args:
+        sent2ntks_chunks (:obj:`Iterable[List[int]]`):
+            The number of encoded tokens of each of the sentences, in chunks
+            of consecutive sentences.
+        ntks_prefix (:obj:`int`):
+            The number of encoded tokens of the prefix.
+        max_length (:obj:`int`):
+            The maximum number of tokens of a subdivision, e.g., the model
+            max. sequence length.
+        window (:obj:`int`, `optional`, defaults to 4):
+            The minimum number of subdivisions that are divided at once. It
+            must be at least 2.
+
+    Yields:
+        :obj:`Tuple[int, int]`: The index of the first sentence of each
+        subdivision and the index after its last sentence, in order.
+    """
+    if window < 2:
+        raise ValueError(f'window must be at least 2 (got {window}).')
+    # Number of sentence tokens that fill the window
+    window_ntks = window * (max_length - ntks_prefix - 1)
+    pending = []  # number of tokens of the pending sentences
+    pending_ntks = 0
+    first = 0  # index of the first pending sentence
+    for chunk in sent2ntks_chunks:
+        pending.extend(chunk)
+        pending_ntks += sum(chunk)
+        if pending_ntks < window_ntks:
+            continue
+        split_points, _ = partition_sentences(pending, ntks_prefix, max_length)
+        for start, end in zip(split_points[:-2], split_points[1:-1]):
+            yield first + start, first + end
+        del pending[:split_points[-2]]
+        pending_ntks = sum(pending)
+        first += split_points[-2]
+    if pending:
+        split_points, _ = partition_sentences(pending, ntks_prefix, max_length)
+        for start, end in zip(split_points[:-1], split_points[1:]):
+            yield first + start, first + end
+
+
+def _spread_split_points(
+    prefix_sums: List[int],
+    bound: int,
+    nsubdivs: int
+) -> List[int]:
+    """Place the split points as evenly as the bound allows.
+
+    The ``j``-th split point can be anywhere between the position it has when
+    filling the subdivisions greedily from the end (the earliest) and from the
+    beginning (the latest), as long as the subdivision it closes does not
+    exceed the bound. Within that range, the position closest to ``j / k`` of
+    the tokens is chosen.
+
+    Args:
+        prefix_sums (:obj:`List[int]`):
+            The prefix sums of the number of tokens of the sentences, starting
+            with ``0``.
+        bound (:obj:`int`):
+            The maximum number of sentence tokens of a subdivision. It must
+            allow splitting the sentences into :obj:`nsubdivs` subdivisions.
+        nsubdivs (:obj:`int`):
+            The number of subdivisions.
+
+    Returns:
+        :obj:`List[int]`: The split points (see :func:`partition_sentences`).
+    """
+    nsents = len(prefix_sums) - 1
+    latest = _split_greedily(prefix_sums, bound)
+    earliest = [nsents]
+    while len(earliest) < nsubdivs + 1:
+        end = earliest[-1]
+        start = bisect_left(prefix_sums, prefix_sums[end] - bound, 0, end)
+        earliest.append(min(start, end - 1))
+    earliest.reverse()
+
+    split_points = [0]
+    for j in range(1, nsubdivs):
+        target = bisect_left(prefix_sums, prefix_sums[-1] * j / nsubdivs)
+        if (target > 0 and prefix_sums[-1] * j / nsubdivs - prefix_sums[target-1]
+                < prefix_sums[target] - prefix_sums[-1] * j / nsubdivs):
+            target -= 1
+        lower = max(earliest[j], split_points[-1] + 1)
+        upper = min(latest[j], _reach(prefix_sums, split_points[-1], bound))
+        split_points.append(min(max(target, lower), upper))
+    split_points.append(nsents)
+    return split_points
+
+
+def _reach(prefix_sums: List[int], start: int, bound: int) -> int:
+    """Get the end of the longest subdivision starting at a sentence.
+
+    Args:
+        prefix_sums (:obj:`List[int]`):
+            The prefix sums of the number of tokens of the sentences, starting
+            with ``0``.
+        start (:obj:`int`):
+            The index of the first sentence of the subdivision.
+        bound (:obj:`int`):
+            The maximum number of sentence tokens of a subdivision.
+
+    Returns:
+        :obj:`int`: The index after the last sentence of the subdivision.
+        Sentences longer than the bound form a subdivision on their own.
+    """
+    end = bisect_right(prefix_sums, prefix_sums[start] + bound, start) - 1
+    return max(end, start + 1)
+
+
+def _split_greedily(prefix_sums: List[int], bound: int) -> List[int]:
+    """Fill the subdivisions greedily up to a number of sentence tokens.
+
+    Args:
+        prefix_sums (:obj:`List[int]`):
+            The prefix sums of the number of tokens of the sentences, starting
+            with ``0``.
+        bound (:obj:`int`):
+            The maximum number of sentence tokens of a subdivision.
+
+    Returns:
+        :obj:`List[int]`: The split points (see :func:`partition_sentences`).
+    """
+    nsents = len(prefix_sums) - 1
+    split_points = [0]
+    while split_points[-1] < nsents:
+        split_points.append(_reach(prefix_sums, split_points[-1], bound))
+    return split_points
@@ -0,0 +1,116 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Splitting of sentences that do not fit in a subdivision."""
+
+__version__ = '0.1.0'
+
+from typing import Container, List
+
+# Punctuation after which an oversized sentence is preferably split
+CLAUSE_PUNCTUATION = ".!?,;:"
+
+
+def split_oversized_sentences(
+    sent_tks: List[List[int]],
+    max_ntks: int,
+    clause_end_ids: Container[int],
+    word_start_ids: Container[int]
+) -> List[List[int]]:
+    """Split the sentences which are longer than a number of tokens.
+
+    Sentences with up to :obj:`max_ntks` tokens are left untouched. The rest
+    are split with :func:`split_sentence`.
+
+    Args:
+        sent_tks (:obj:`List[List[int]]`):
+            The tokens of each of the sentences.
+        max_ntks (:obj:`int`):
+            The maximum number of tokens of a sentence.
+        clause_end_ids (:obj:`Container[int]`):
+            The ids of the tokens that end a clause, e.g., commas.
+        word_start_ids (:obj:`Container[int]`):
+            The ids of the tokens that start a word.
+
+    Returns:
+        :obj:`List[List[int]]`: The tokens of each of the sentences, with the
+        oversized ones replaced by their pieces.
+    """
+    if all(len(tks) <= max_ntks for tks in sent_tks):
+        return sent_tks
+    split_sent_tks = []
+    for tks in sent_tks:
+        if len(tks) <= max_ntks:
+            split_sent_tks.append(tks)
+        else:
+            split_sent_tks.extend(split_sentence(tks, max_ntks, clause_end_ids,
+                                                 word_start_ids))
+    return split_sent_tks
+
+
+def split_sentence(
+    tks: List[int],
+    max_ntks: int,
+    clause_end_ids: Container[int],
+    word_start_ids: Container[int]
+) -> List[List[int]]:
+    """Split a sentence into pieces of at most a number of tokens.
+
+    Each piece is made as long as possible, but it is ended, in order of
+    preference:
+
+    * After the last token that ends a clause (e.g., a comma).
+    * Before the last token that starts a word.
+    * After :obj:`max_ntks` tokens, splitting a word, if there are no such
+      tokens.
+
+    Only the tokens in the second half of each piece are considered, so that
+    the pieces are not too short. Each token is visited at most twice, so the
+    sentence is split in linear time.
+
+    Args:
+        tks (:obj:`List[int]`):
+            The tokens of the sentence.
+        max_ntks (:obj:`int`):
+            The maximum number of tokens of a piece. It must be at least 1.
+        clause_end_ids (:obj:`Container[int]`):
+            The ids of the tokens that end a clause, e.g., commas.
+        word_start_ids (:obj:`Container[int]`):
+            The ids of the tokens that start a word.
+
+    Returns:
+        :obj:`List[List[int]]`: The tokens of each of the pieces.
+    """
+    if max_ntks < 1:
+        raise ValueError(f'max_ntks must be at least 1 (got {max_ntks}).')
+    pieces = []
+    start = 0
+    while len(tks) - start > max_ntks:
+        end = start + max_ntks
+        word_end = None
+        # Candidate ends, from the longest piece to half of it
+        for i in range(end, start + max_ntks // 2, -1):
+            if tks[i - 1] in clause_end_ids:
+                break
+            if word_end is None and tks[i] in word_start_ids:
+                word_end = i
+        else:
+            i = end if word_end is None else word_end
+        pieces.append(tks[start:i])
+        start = i
+    pieces.append(tks[start:])
+    return pieces
@@ -0,0 +1,133 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Contiguous buffer of encoded subdivisions."""
+
+__version__ = '0.1.0'
+
+import torch
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Union
+
+
+class SubdivisionBuffer:
+    """Encoded subdivisions stored in a single contiguous buffer.
+
+    The ids of all the subdivisions are stored one after the other in a 1-D
+    tensor, and an offset table marks where each subdivision starts and ends,
+    i.e., the ``i``-th subdivision is ``ids[offsets[i]:offsets[i+1]]``.
+
+    The buffer behaves as a sequence of 1-D tensors: indexing it returns a view
+    of the subdivision (no ids are copied), and slicing it returns another
+    buffer which shares the same ids. Since the whole buffer is backed by a
+    single storage, it can be moved to shared memory with
+    :meth:`share_memory_`, so that it can be handed over to other processes
+    without copying it.
+
+    Args:
+        ids (:obj:`torch.LongTensor`):
+            The ids of the subdivisions, as a 1-D tensor.
+        offsets (:obj:`torch.LongTensor`):
+            The offsets of the subdivisions in :obj:`ids`. It has one more
+            element than subdivisions.
+    """
+
+    def __init__(self, ids: torch.LongTensor, offsets: torch.LongTensor):
+        self._ids = ids
+        self._offsets = offsets
+
+    @classmethod
+    def from_sequences(
+        cls,
+        sequences: Iterable[Union[List[int], torch.LongTensor]]
+    ) -> "SubdivisionBuffer":
+        """Build a buffer from separate subdivisions.
+
+        Args:
+            sequences (:obj:`Iterable[List[int]]` or :obj:`Iterable[torch.LongTensor]`):
+                The ids of each of the subdivisions.
+
+        Returns:
+            :obj:`SubdivisionBuffer`: The buffer.
+        """
+        if isinstance(sequences, cls):
+            return sequences
+        sequences = [torch.as_tensor(seq).view(-1) for seq in sequences]
+        ids = (torch.cat(sequences) if sequences
+               else torch.empty(0, dtype=torch.long))
+        offsets = torch.tensor([0] + list(accumulate(len(seq)
+                                                     for seq in sequences)))
+        return cls(ids, offsets)
+
+    @property
+    def ids(self) -> torch.LongTensor:
+        """The ids of the subdivisions of this buffer, as a 1-D view."""
+        return self._ids[self._offsets[0]:self._offsets[-1]]
+
+    @property
+    def offsets(self) -> torch.LongTensor:
+        """The offsets of the subdivisions, relative to :attr:`ids`."""
+        return self._offsets - self._offsets[0]
+
+    @property
+    def lengths(self) -> torch.LongTensor:
+        """The number of ids of each of the subdivisions."""
+        return self._offsets[1:] - self._offsets[:-1]
+
+    def share_memory_(self) -> "SubdivisionBuffer":
+        """Move the buffer to shared memory (see
+        :meth:`torch.Tensor.share_memory_`).
+
+        Returns:
+            :obj:`SubdivisionBuffer`: The buffer itself.
+        """
+        self._ids.share_memory_()
+        self._offsets.share_memory_()
+        return self
+
+    def tolist(self) -> List[List[int]]:
+        """Get the ids of each of the subdivisions as lists."""
+        return [subdiv.tolist() for subdiv in self]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(
+        self,
+        index: Union[int, slice]
+    ) -> Union[torch.LongTensor, "SubdivisionBuffer"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Slices of a SubdivisionBuffer must be "
+                                 "contiguous.")
+            stop = max(start, stop)
+            return SubdivisionBuffer(self._ids, self._offsets[start:stop + 1])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("SubdivisionBuffer index out of range.")
+        return self._ids[self._offsets[index]:self._offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[torch.LongTensor]:
+        offsets = self._offsets.tolist()
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            yield self._ids[start:end]
+
+    def __repr__(self):
+        return (f'SubdivisionBuffer({len(self)} subdivisions, '
+                f'{self.ids.numel()} ids)')
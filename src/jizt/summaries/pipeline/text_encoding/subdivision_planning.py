@@ -0,0 +1,316 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Planning of the length of the subdivisions."""
+
+__version__ = '0.1.0'
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+
+class SubdivisionCostModel:
+    """Cost model of the summarization of a batch of subdivisions.
+
+    The time taken to summarize a batch of :math:`b` subdivisions of
+    :math:`L` tokens each is modelled as:
+
+    .. math::
+
+        t(b, L) = c_0 + b \\, (c_1 L + c_2 L^2)
+
+    where :math:`c_0` is the fixed cost of a generate call, :math:`c_1` the
+    cost which grows linearly with the length (feed-forward layers, decoding
+    steps) and :math:`c_2` the cost which grows quadratically (attention).
+    The coefficients depend on the CPU and the model, so they are fitted to
+    measured times (see :func:`calibrate`).
+
+    Args:
+        fixed (:obj:`float`):
+            The fixed cost :math:`c_0`, in seconds.
+        linear (:obj:`float`):
+            The linear coefficient :math:`c_1`, in seconds per token.
+        quadratic (:obj:`float`):
+            The quadratic coefficient :math:`c_2`, in seconds per squared
+            token.
+    """
+
+    def __init__(self, fixed: float, linear: float, quadratic: float):
+        self.fixed = fixed
+        self.linear = linear
+        self.quadratic = quadratic
+
+    def predict(self, batch_size: int, length: int) -> float:
+        """Predict the time taken to summarize a batch of subdivisions.
+
+        Args:
+            batch_size (:obj:`int`):
+                The number of subdivisions of the batch.
+            length (:obj:`int`):
+                The number of tokens of each subdivision.
+
+        Returns:
+            :obj:`float`: The predicted time, in seconds.
+        """
+        return (self.fixed
+                + batch_size * (self.linear * length
+                                + self.quadratic * length**2))
+
+    @classmethod
+    def fit(
+        cls,
+        samples: Sequence[Tuple[int, int, float]]
+    ) -> "SubdivisionCostModel":
+        """Fit the coefficients to measured times by least squares.
+
+        Args:
+            samples (:obj:`Sequence[Tuple[int, int, float]]`):
+                The batch size, subdivision length and measured time (in
+                seconds) of each measurement. At least three measurements
+                with different batch sizes or lengths are needed.
+
+        Returns:
+            :obj:`SubdivisionCostModel`: The fitted cost model.
+        """
+        rows = [(1.0, b * length, b * length**2) for b, length, _ in samples]
+        times = [t for _, _, t in samples]
+        # Normal equations: (X^T X) c = X^T t
+        xtx = [[sum(row[i] * row[j] for row in rows) for j in range(3)]
+               for i in range(3)]
+        xtt = [sum(row[i] * t for row, t in zip(rows, times))
+               for i in range(3)]
+        return cls(*_solve(xtx, xtt))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SubdivisionCostModel":
+        """Load a cost model saved with :meth:`save`."""
+        with open(path) as cost_model_file:
+            return cls(**json.load(cost_model_file))
+
+    def save(self, path: Union[str, Path]):
+        """Save the cost model as JSON."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as cost_model_file:
+            json.dump({"fixed": self.fixed, "linear": self.linear,
+                       "quadratic": self.quadratic}, cost_model_file, indent=2)
+
+    def __repr__(self):
+        return (f'SubdivisionCostModel(fixed={self.fixed:.4g}, '
+                f'linear={self.linear:.4g}, quadratic={self.quadratic:.4g})')
+
+
+class SubdivisionPlanner:
+    """Planner of the target length of the subdivisions.
+
+    Filling the subdivisions up to the model max. length minimises their
+    number, but the cost of attention grows quadratically with the length,
+    and shorter subdivisions can fill the batches better. Given a
+    :class:`SubdivisionCostModel`, the planner chooses the length (among
+    multiples of :obj:`step` between :obj:`min_length` and :obj:`max_length`)
+    which minimises the predicted time to summarize a text. On ties, the
+    longest length is chosen, since longer subdivisions give the model more
+    context.
+
+    Args:
+        cost_model (:obj:`SubdivisionCostModel`, `optional`):
+            The cost model. If not set, the subdivisions are filled up to
+            :obj:`max_length`.
+        max_length (:obj:`int`, `optional`, defaults to 512):
+            The maximum number of tokens of a subdivision, e.g., the model
+            max. sequence length.
+        max_batch_size (:obj:`int`, `optional`, defaults to 8):
+            The maximum number of subdivisions summarized together.
+        min_length (:obj:`int`, `optional`, defaults to 128):
+            The minimum target length.
+        step (:obj:`int`, `optional`, defaults to 16):
+            The granularity of the candidate lengths.
+        target_length (:obj:`int`, `optional`):
+            If set, this length (capped to :obj:`max_length`) is always
+            used, regardless of the cost model.
+    """
+
+    def __init__(
+        self,
+        cost_model: Optional[SubdivisionCostModel] = None,
+        max_length: int = 512,
+        max_batch_size: int = 8,
+        min_length: int = 128,
+        step: int = 16,
+        target_length: Optional[int] = None
+    ):
+        self.cost_model = cost_model
+        self.max_length = max_length
+        self.max_batch_size = max_batch_size
+        self.min_length = min(min_length, max_length)
+        self.step = step
+        self._target_length = target_length
+
+    def target_length(
+        self,
+        ntks_total: Optional[int] = None,
+        ntks_prefix: int = 0
+    ) -> int:
+        """Get the target length of the subdivisions of a text.
+
+        Args:
+            ntks_total (:obj:`int`, `optional`):
+                The number of tokens of the sentences of the text. If not set
+                (e.g., if the text is encoded incrementally), the length with
+                the lowest cost per token is chosen.
+            ntks_prefix (:obj:`int`, `optional`, defaults to 0):
+                The number of tokens of the prefix.
+
+        Returns:
+            :obj:`int`: The maximum number of tokens of the subdivisions,
+            including the prefix and the EOS token.
+        """
+        if self._target_length is not None:
+            return min(self._target_length, self.max_length)
+        if self.cost_model is None:
+            return self.max_length
+        overhead = ntks_prefix + 1  # prefix and EOS token
+        candidates = list(range(self.max_length,
+                                max(self.min_length, overhead + 1) - 1,
+                                -self.step))
+        if ntks_total is None:
+            return min(candidates, key=lambda length: (
+                self.cost_model.predict(self.max_batch_size, length)
+                / (self.max_batch_size * (length - overhead))
+            ))
+        return min(candidates, key=lambda length: self._predict_total(
+            ntks_total, length, overhead
+        ))
+
+    def _predict_total(
+        self,
+        ntks_total: int,
+        max_length: int,
+        overhead: int
+    ) -> float:
+        """Predict the time taken to summarize a text.
+
+        The sentences are divided into the minimum number of subdivisions of
+        up to :obj:`max_length` tokens, which are assumed to be balanced (see
+        :func:`partition.partition_sentences`).
+
+        Args:
+            ntks_total (:obj:`int`):
+                The number of tokens of the sentences of the text.
+            max_length (:obj:`int`):
+                The maximum number of tokens of each subdivision.
+            overhead (:obj:`int`):
+                The number of tokens added to each subdivision (prefix and EOS
+                token).
+
+        Returns:
+            :obj:`float`: The predicted time, in seconds.
+        """
+        nsubdivs = max(1, math.ceil(ntks_total / (max_length - overhead)))
+        length = overhead + math.ceil(ntks_total / nsubdivs)
+        full_batches, rest = divmod(nsubdivs, self.max_batch_size)
+        total = full_batches * self.cost_model.predict(self.max_batch_size,
+                                                       length)
+        if rest:
+            total += self.cost_model.predict(rest, length)
+        return total
+
+
+def calibrate(
+    summarizer: Any,
+    token_ids: List[int],
+    lengths: Sequence[int] = (64, 128, 256, 384, 512),
+    batch_sizes: Optional[Sequence[int]] = None,
+    repeat: int = 2,
+    **params
+) -> Tuple[SubdivisionCostModel, List[Tuple[int, int, float]]]:
+    """Measure the summarization time and fit a :class:`SubdivisionCostModel`.
+
+    For each length and batch size, a batch of subdivisions cut from
+    :obj:`token_ids` is summarized :obj:`repeat` times, and the best time is
+    kept.
+
+    Args:
+        summarizer (:obj:`Summarizer`):
+            The summarizer to calibrate.
+        token_ids (:obj:`List[int]`):
+            The ids of a text, used to build the subdivisions. It is repeated
+            if it is not long enough.
+        lengths (:obj:`Sequence[int]`, `optional`, defaults to ``(64, 128, 256, 384, 512)``):
+            The lengths of the subdivisions measured.
+        batch_sizes (:obj:`Sequence[int]`, `optional`):
+            The batch sizes measured. Defaults to ``1`` and the max. batch size
+            of the summarizer.
+        repeat (:obj:`int`, `optional`, defaults to 2):
+            The number of times each measurement is repeated.
+        params:
+            The params passed to :meth:`Summarizer.summarize_subdivisions`.
+
+    Returns:
+        :obj:`Tuple[SubdivisionCostModel, List[Tuple[int, int, float]]]`: The
+        fitted cost model and the measurements it was fitted to.
+    """
+    if batch_sizes is None:
+        batch_sizes = sorted({1, summarizer.max_batch_size})
+    eos_token_id = summarizer.tokenizer.eos_token_id
+    samples = []
+    for batch_size in batch_sizes:
+        for length in lengths:
+            ntks = batch_size * (length - 1)
+            ids = token_ids * math.ceil(ntks / len(token_ids))
+            batch = [ids[i*(length-1):(i+1)*(length-1)] + [eos_token_id]
+                     for i in range(batch_size)]
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                summarizer.summarize_subdivisions(batch, **params)
+                times.append(time.perf_counter() - start)
+            samples.append((batch_size, length, min(times)))
+    return SubdivisionCostModel.fit(samples), samples
+
+
+def _solve(a: List[List[float]], b: List[float]) -> List[float]:
+    """Solve a small linear system by Gaussian elimination.
+
+    Args:
+        a (:obj:`List[List[float]]`):
+            The (square) matrix of coefficients.
+        b (:obj:`List[float]`):
+            The right-hand side.
+
+    Returns:
+        :obj:`List[float]`: The solution.
+    """
+    n = len(b)
+    m = [row[:] + [b_i] for row, b_i in zip(a, b)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda row: abs(m[row][col]))
+        if m[pivot][col] == 0:
+            raise ValueError("The cost model cannot be fitted to these "
+                             "measurements.")
+        m[col], m[pivot] = m[pivot], m[col]
+        for row in range(col + 1, n):
+            factor = m[row][col] / m[col][col]
+            for k in range(col, n + 1):
+                m[row][k] -= factor * m[col][k]
+    x = [0.0] * n
+    for row in range(n - 1, -1, -1):
+        x[row] = (m[row][n] - sum(m[row][k] * x[k]
+                                  for k in range(row + 1, n))) / m[row][row]
+    return x
@@ -17,12 +17,16 @@
 
 """Text post-processor class."""
 
-__version__ = '0.1.1'
+__version__ = '0.1.7'
 
 import logging
+from pathlib import Path
 from .truecase.TrueCaser import TrueCaser
-from nltk import sent_tokenize
-from jizt.config import LOG_LEVEL
+from .truecase.CompiledTrueCaser import CompiledTrueCaser
+from .truecase.MappedTrueCaser import MappedTrueCaser
+from .tokenization import create_segmenter
+from jizt.config import (LOG_LEVEL, POSTPROCESSING_SEGMENTER,
+                         TRUECASER_CACHE_SIZE, TRUECASER_MODEL_PATH)
 
 
 class TextPostprocessor:
@@ -35,10 +39,48 @@ class TextPostprocessor:
     * Performs truecasing over the text. See `this paper
       <https://www.cs.cmu.edu/~llita/papers/lita.truecasing-acl2003.pdf>`__
       for more details.
+
+    The summaries are split into sentences with the same segmenter as the
+    source texts (see :mod:`tokenization`), but splitting the sentences which
+    start with a lowercase letter, since the summaries are mostly in
+    lowercase.
+
+    The truecasing uses the compiled model (see :mod:`CompiledTrueCaser`) or
+    the mapped model (see :mod:`MappedTrueCaser`) if it exists, which give the
+    same results as the original model. The compiled model is the fastest,
+    while the mapped model is loaded almost instantly and shared by all the
+    processes.
+
+    Args:
+        log_level (:obj:`int`, `optional`, defaults to :obj:`jizt.config.LOG_LEVEL`):
+            The log level.
+        segmenter (:obj:`str`, `optional`, defaults to :obj:`jizt.config.POSTPROCESSING_SEGMENTER`):
+            The sentence segmentation backend. One of
+            :obj:`tokenization.SEGMENTERS`.
+        truecaser_model_path (:obj:`Path`, `optional`, defaults to :obj:`jizt.config.TRUECASER_MODEL_PATH`):
+            The path of the mapped truecasing model (a directory) or of the
+            compiled one (a file).
+        truecaser_cache_size (:obj:`int`, `optional`, defaults to :obj:`jizt.config.TRUECASER_CACHE_SIZE`):
+            The maximum number of casings memoized by the truecaser (see
+            :meth:`TrueCaser.set_cache_size`). If ``0``, the casings are not
+            memoized.
     """
 
-    def __init__(self, log_level: int = LOG_LEVEL):
-        self.truecaser = TrueCaser()
+    def __init__(
+        self,
+        log_level: int = LOG_LEVEL,
+        segmenter: str = POSTPROCESSING_SEGMENTER,
+        truecaser_model_path: Path = TRUECASER_MODEL_PATH,
+        truecaser_cache_size: int = TRUECASER_CACHE_SIZE
+    ):
+        if Path(truecaser_model_path).is_dir():
+            self.truecaser = MappedTrueCaser(truecaser_model_path)
+        elif Path(truecaser_model_path).is_file():
+            self.truecaser = CompiledTrueCaser(truecaser_model_path)
+        else:
+            self.truecaser = TrueCaser()
+        self.truecaser.set_cache_size(truecaser_cache_size)
+        self.segmenter = create_segmenter(segmenter, split_lowercase=True)
         logging.basicConfig(
             format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
             level=log_level,
@@ -59,8 +101,15 @@ class TextPostprocessor:
         if not text:
             return text   # if text is empty just return it
 
-        sentences = sent_tokenize(text)
-        truecased_sents = list(map(self.truecaser.get_true_case, sentences))
+        sentences = self.segmenter.segment(text)
+        truecased_sents = self.truecaser.get_true_case_many(sentences)
+        cache_info = self.truecaser.cache_info()
+        if cache_info is not None:
+            self.logger.debug(
+                "Truecasing cache: %d hits, %d misses, %d/%d casings.",
+                cache_info.hits, cache_info.misses, cache_info.currsize,
+                cache_info.maxsize
+            )
         return ' '.join(map(self._capitalize_first_letter, truecased_sents))
 
     @classmethod
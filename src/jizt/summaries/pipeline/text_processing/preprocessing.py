@@ -17,11 +17,13 @@
 
 """Text pre-processor class."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.2'
 
 import logging
-from .tokenization import sentence_tokenize
-from jizt.config import LOG_LEVEL
+from .tokenization import ParallelSentenceSegmenter, sentence_tokenize
+from jizt.config import (LOG_LEVEL, PREPROCESSING_PARALLEL_MIN_LENGTH,
+                         PREPROCESSING_SHARD_SIZE, PREPROCESSING_WORKERS)
+from ...models import Document
 from typing import List, Union
 
 
@@ -45,15 +47,44 @@ class TextPreprocessor:
       - "Hello.Goodbye.", "Seriously??!That can't be true.": these sentences
         are split into: :code:`['Hello.', 'Goodbye.']` and
         :code:`['Seriously??!', 'That can't be true.']`, respectively.
+
+    The documents of at least :obj:`parallel_min_length` characters are split
+    into sentences across several processes (see
+    :class:`tokenization.ParallelSentenceSegmenter`).
+
+    Args:
+        log_level (:obj:`int`, `optional`, defaults to :obj:`jizt.config.LOG_LEVEL`):
+            The log level.
+        parallel_min_length (:obj:`int`, `optional`, defaults to :obj:`jizt.config.PREPROCESSING_PARALLEL_MIN_LENGTH`):
+            The minimum number of characters of the documents which are split
+            in parallel.
+        workers (:obj:`int`, `optional`, defaults to :obj:`jizt.config.PREPROCESSING_WORKERS`):
+            The number of processes. If ``1``, the documents are never split in
+            parallel.
+        shard_size (:obj:`int`, `optional`, defaults to :obj:`jizt.config.PREPROCESSING_SHARD_SIZE`):
+            The approximate number of characters of each of the pieces the
+            documents are cut into to be split in parallel.
     """
 
-    def __init__(self, log_level: int = LOG_LEVEL):
+    def __init__(
+        self,
+        log_level: int = LOG_LEVEL,
+        parallel_min_length: int = PREPROCESSING_PARALLEL_MIN_LENGTH,
+        workers: int = PREPROCESSING_WORKERS,
+        shard_size: int = PREPROCESSING_SHARD_SIZE
+    ):
         logging.basicConfig(
             format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
             level=log_level,
             datefmt='%d/%m/%Y %I:%M:%S %p'
         )
         self.logger = logging.getLogger("TextPreprocessor")
+        self.parallel_min_length = parallel_min_length
+        self.parallel_segmenter = (
+            ParallelSentenceSegmenter(max_workers=workers,
+                                      shard_size=shard_size)
+            if workers > 1 else None
+        )
 
     @classmethod
     def preprocess(
@@ -76,3 +107,27 @@ class TextPreprocessor:
         """
         sentences = sentence_tokenize(text)
         return sentences if return_as_list else ' '.join(sentences)
+
+    def preprocess_document(self, document: Document) -> Document:
+        """Pre-process a document.
+
+        The normalised text of the document is split into sentences, which are
+        stored in the document (see :meth:`models.Document.set_sentences`).
+        Long documents are split in parallel.
+
+        Args:
+            document (:obj:`Document`):
+                The document to be pre-processed.
+
+        Returns:
+            :obj:`Document`: The same document, pre-processed.
+        """
+        text = document.normalized_text
+        if (self.parallel_segmenter is not None
+                and len(text) >= self.parallel_min_length):
+            self.logger.debug(f"Splitting {len(text)} characters in parallel.")
+            sentences = self.parallel_segmenter.segment(text, normalized=True)
+        else:
+            sentences = sentence_tokenize(text, normalized=True)
+        document.set_sentences(sentences)
+        return document
@@ -17,88 +17,800 @@
 
 """Tokenization utilities."""
 
-__version__ = '0.0.4'
+__version__ = '0.1.3'
 
+import re
+import threading
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from nltk.tokenize import RegexpTokenizer
 from blingfire import text_to_sentences
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+# Preliminary split of the sentences. If next letter after period is lowercase,
+# consider it part of the same sentence. E.g.: "As we can see in Figure 1.1.
+# the sentence will not be split." Also, take acronyms as groups, e.g., U.K.,
+# U.S., B.C., D.C., etc.
+PRESPLIT_PATTERN = re.compile(r'[^.!?]+(?:(?:[A-Z][.])+|[.!?]+)+[^A-Z]*')
+# Whitespace before punctuation that shouldn't be preceeded by a whitespace
+SPACE_BEFORE_PUNCT_PATTERN = re.compile(r' ([.,;:!?])')
+# Characters that end a sentence
+SENTENCE_TERMINATORS = ('.', '!', '?')
+# Points where a normalised text can be cut into shards: a sentence terminator
+# followed by a whitespace and an uppercase letter
+SHARD_CUT_PATTERN = re.compile(r'[.!?] (?=[A-Z])')
+# Closing quotes and brackets, which may follow a sentence terminator
+CLOSING_PUNCTUATION = '"\')]'
+# Lowercase letter that starts a sentence: a word ending with a sentence
+# terminator, optionally followed by closing quotes or brackets, whitespaces,
+# and optionally opening quotes or brackets
+LOWERCASE_SENTENCE_START_PATTERN = re.compile(
+    r'(\S*)([.!?]["\')\]]*\s+["\'(\[]*)([a-z])'
+)
+# Lowercase abbreviations which are usually followed by a name
+LOWERCASE_ABBREVIATIONS = frozenset(('mr', 'mrs', 'ms', 'dr', 'prof', 'sr',
+                                     'jr', 'st', 'vs', 'fig'))
+# Supported sentence segmentation backends
+SEGMENTERS = ("blingfire", "punkt")
 
-def sentence_tokenize(
-    text: str,
-    tokenizer: RegexpTokenizer = None
-) -> List[str]:
-    r"""Divide the text into sentences.
+
+class BaseSentenceSegmenter(ABC):
+    """Interface of the sentence segmenters."""
+
+    def segment(self, text: str, normalized: bool = False) -> List[str]:
+        """Divide a text into sentences.
+
+        Args:
+            text (:obj:`str`):
+                Text to be split in sentences.
+            normalized (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether the words of the text are already separated by a single
+                whitespace (see :attr:`models.Document.normalized_text`), in
+                which case the text is not normalised again.
+
+        Returns:
+            :obj:`List[str]`: The sentences.
+        """
+        return list(self.iter_segment(text, normalized))
+
+    def segment_many(
+        self,
+        texts: Iterable[str],
+        normalized: bool = False
+    ) -> List[List[str]]:
+        """Divide several texts into sentences.
+
+        Args:
+            texts (:obj:`Iterable[str]`):
+                Texts to be split in sentences.
+            normalized (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether the texts are already normalised. See :meth:`segment`.
+
+        Returns:
+            :obj:`List[List[str]]`: The sentences of each of the texts.
+        """
+        return [self.segment(text, normalized) for text in texts]
+
+    @abstractmethod
+    def iter_segment(
+        self,
+        text: str,
+        normalized: bool = False
+    ) -> Iterator[str]:
+        """Divide a text into sentences, yielding them one by one.
+
+        Args:
+            text (:obj:`str`):
+                Text to be split in sentences.
+            normalized (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether the text is already normalised. See :meth:`segment`.
+
+        Yields:
+            :obj:`str`: The sentences.
+        """
+
+
+class SentenceSegmenter(BaseSentenceSegmenter):
+    r"""Sentence segmenter.
 
     The steps followed are:
 
         * Remove characters such as '\n', '\t', etc.
         * Splits the text into sentences, taking into account Named Entities and
-        special cases such as:
+          special cases such as:
 
             - "I was born in 02.26.1980 in New York", "As we can see in Figure
-            1.1.  the model will not fail.": despite the periods in the date and
-            the Figure number, these texts will not be split into different
-            sentences.
+              1.1.  the model will not fail.": despite the periods in the date
+              and the Figure number, these texts will not be split into
+              different sentences.
             - "Mr. Elster looked worried.", "London, capital of U.K., is famous
-            for its red telephone boxes": the pre-processor applies Named Entity
-            Recognition and does not split the previous sentences.
+              for its red telephone boxes": the pre-processor applies Named
+              Entity Recognition and does not split the previous sentences.
             - "Hello.Goodbye.", "Seriously??!That can't be true.": these
-            sentences are split into: ['Hello.', 'Goodbye.'] and
-            ['Seriously??!', 'That can't be true.'], respectively.
+              sentences are split into: ['Hello.', 'Goodbye.'] and
+              ['Seriously??!', 'That can't be true.'], respectively.
+
+    A sentence starting with a lowercase letter is not split from the
+    previous one, unless :obj:`split_lowercase` is set. This is intended for
+    texts which are mostly in lowercase, e.g., the summaries generated by the
+    model: the letters that follow a sentence terminator are capitalised
+    before the text is split, and the sentences are then taken from the
+    original text, as it is (without removing whitespaces before punctuation
+    or adding a final period).
+
+    The regular expressions are compiled once, so the same segmenter should be
+    reused to segment several texts.
 
     Args:
-        text (:obj:`str`):
-            Text to be split in sentences.
         tokenizer (:obj:`nltk.tokenize.RegexpTokenizer`, `optional`, defaults to :obj:`None`):
             Regular expression to carry out a preliminar split (the text will be
             afterwards split once again by the :mod:`blingfire`
-            :func:`text_to_sentences` function).
+            :func:`text_to_sentences` function). If set, the text is not
+            normalised, i.e., characters such as '\n' or '\t' are kept.
+        split_lowercase (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            Whether to split sentences starting with a lowercase letter.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Optional[RegexpTokenizer] = None,
+        split_lowercase: bool = False
+    ):
+        self._tokenizer = tokenizer
+        self.split_lowercase = split_lowercase
+
+    def iter_segment(
+        self,
+        text: str,
+        normalized: bool = False
+    ) -> Iterator[str]:
+        """Divide a text into sentences, yielding them one by one.
+
+        The text is split by :mod:`blingfire` all at once, but the sentences
+        are fixed up and yielded lazily, so that the whole list of sentences
+        of a very large text is never built.
+
+        Args:
+            text (:obj:`str`):
+                Text to be split in sentences.
+            normalized (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether the text is already normalised. See :meth:`segment`.
+
+        Yields:
+            :obj:`str`: The sentences.
+        """
+        # Check if text is empty or contains only non-printable
+        # characters, e.g., whitespaces
+        if len(text.strip()) == 0:
+            return
+        if self.split_lowercase:
+            yield from self._iter_segment_lowercase(text, normalized)
+            return
+        presplit_text = self._presplit(text, normalized)
+        yield from _merge_sentences(_iter_lines(text_to_sentences(presplit_text)))
+
+    def _iter_segment_lowercase(
+        self,
+        text: str,
+        normalized: bool
+    ) -> Iterator[str]:
+        """Divide a text into sentences, splitting those starting with a
+        lowercase letter (see :obj:`split_lowercase`).
+
+        Args:
+            text (:obj:`str`):
+                The text, which must not be empty.
+            normalized (:obj:`bool`):
+                Whether the text is already normalised.
+
+        Yields:
+            :obj:`str`: The sentences.
+        """
+        if self._tokenizer is None and not normalized:
+            text = ' '.join(text.split())
+        cased_text = LOWERCASE_SENTENCE_START_PATTERN.sub(
+            _capitalize_sentence_start, text
+        )
+        presplit_text = self._presplit(cased_text, normalized=True)
+        sentences = _merge_sentences(
+            _iter_lines(text_to_sentences(presplit_text)),
+            closing=CLOSING_PUNCTUATION
+        )
+        if cased_text[-1] not in SENTENCE_TERMINATORS:
+            cased_text += '.'  # added by the pre-split
+        start = 0
+        for end in _iter_line_ends(cased_text, sentences):
+            yield text[start:end].strip()
+            start = end
+
+    def _presplit(self, text: str, normalized: bool) -> str:
+        """Prepare the text to be split by :mod:`blingfire`.
+
+        The text is normalised (unless a custom tokenizer is used), split with
+        the preliminary regular expression, and the whitespaces before
+        punctuation are removed.
+
+        Args:
+            text (:obj:`str`):
+                The text, which must not be empty.
+            normalized (:obj:`bool`):
+                Whether the text is already normalised.
+
+        Returns:
+            :obj:`str`: The text with its sentences separated by whitespaces.
+        """
+        if self._tokenizer is None and not normalized:
+            text = ' '.join(text.split())  # remove '\n', '\t', etc.
+
+        # If there's no final period, add it (this makes the assumption that
+        # the last sentence is not interrogative or exclamative, i.e., ends
+        # with '?' or '!')
+        if text[-1] not in SENTENCE_TERMINATORS:
+            text += '.'
+
+        pieces = (PRESPLIT_PATTERN.findall(text) if self._tokenizer is None
+                  else self._tokenizer.tokenize(text))
+        # Split sentences with the regexp and ensure there's 1 whitespace at
+        # most
+        presplit_text = ' '.join(pieces).replace('  ', ' ')
+        # Remove whitespaces before punctuation, in a single pass
+        return SPACE_BEFORE_PUNCT_PATTERN.sub(r'\1', presplit_text)
+
+
+class PunktSentenceSegmenter(BaseSentenceSegmenter):
+    """Sentence segmenter based on the :mod:`nltk` Punkt model.
+
+    The model has to be downloaded beforehand with
+    ``nltk.download("punkt")``. It is loaded when the segmenter is created.
+
+    Args:
+        language (:obj:`str`, `optional`, defaults to ``"english"``):
+            The language of the Punkt model.
+    """
+
+    def __init__(self, language: str = "english"):
+        # Imported here since the Punkt model is optional
+        from nltk.data import load
+        self._tokenizer = load(f"tokenizers/punkt/{language}.pickle")
+
+    def iter_segment(
+        self,
+        text: str,
+        normalized: bool = False
+    ) -> Iterator[str]:
+        """Divide a text into sentences, yielding them one by one.
+
+        Args:
+            text (:obj:`str`):
+                Text to be split in sentences.
+            normalized (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether the text is already normalised. See :meth:`segment`.
+
+        Yields:
+            :obj:`str`: The sentences.
+        """
+        if not normalized:
+            text = ' '.join(text.split())
+        yield from self._tokenizer.tokenize(text)
+
+
+class ParallelSentenceSegmenter(BaseSentenceSegmenter):
+    """Sentence segmenter which splits very large texts across processes.
+
+    The normalised text is cut into shards of about :obj:`shard_size`
+    characters after a sentence terminator followed by an uppercase letter
+    (see :data:`SHARD_CUT_PATTERN`). The preliminary split of
+    :class:`SentenceSegmenter` never spans such a point, so the shards can be
+    pre-split and passed to :mod:`blingfire` independently, in a pool of
+    processes.
+
+    However, :mod:`blingfire` might not end a sentence at a cut point, e.g.,
+    in "Mr. Elster", and its split depends on the surrounding sentences, so
+    the sentences around each cut point are split again together: the last
+    :obj:`window` sentences of a shard and the first :obj:`window` of the next
+    one (see :func:`_stitch_lines`). Then, the sentences are merged as in
+    :meth:`SentenceSegmenter.iter_segment`, so the output is the same as with
+    the serial segmenter.
+
+    The processes are started the first time they are needed.
+
+    Args:
+        max_workers (:obj:`int`, `optional`, defaults to 2):
+            The number of processes.
+        shard_size (:obj:`int`, `optional`, defaults to 250000):
+            The approximate number of characters of each shard.
+        window (:obj:`int`, `optional`, defaults to 4):
+            The initial number of sentences at each side of a cut point which
+            are split again.
+        max_window (:obj:`int`, `optional`, defaults to 64):
+            The maximum number of sentences at each side of a cut point which
+            are split again. It bounds the work done at each cut point, at the
+            cost of a split which might differ from the serial one.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        shard_size: int = 250_000,
+        window: int = 4,
+        max_window: int = 64
+    ):
+        self.max_workers = max_workers
+        self.shard_size = shard_size
+        self.window = window
+        self.max_window = max(window, max_window)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def segment(self, text: str, normalized: bool = False) -> List[str]:
+        """Divide a text into sentences.
+
+        Args:
+            text (:obj:`str`):
+                Text to be split in sentences.
+            normalized (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether the text is already normalised. See
+                :meth:`SentenceSegmenter.segment`.
+
+        Returns:
+            :obj:`List[str]`: The sentences.
+        """
+        if len(text.strip()) == 0:
+            return []
+        if not normalized:
+            text = ' '.join(text.split())
+        shards = _cut_shards(text, self.shard_size)
+        if len(shards) == 1:
+            return _default_segmenter.segment(text, normalized=True)
+        with self._lock:
+            if self._executor is None:
+                # Spawned (not forked) processes, since the server is
+                # multithreaded
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            executor = self._executor
+        shard_lines = executor.map(_split_shard, shards)
+        lines, separators = next(shard_lines)
+        for next_lines, next_separators in shard_lines:
+            separators[-1] = ' '  # dropped at the cut point
+            _stitch_lines(lines, separators, next_lines, next_separators,
+                          self.window, self.max_window)
+        return list(_merge_sentences(lines))
+
+    def iter_segment(
+        self,
+        text: str,
+        normalized: bool = False
+    ) -> Iterator[str]:
+        """Divide a text into sentences, yielding them one by one.
+
+        The whole text is split before the first sentence is yielded.
+
+        Args:
+            text (:obj:`str`):
+                Text to be split in sentences.
+            normalized (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether the text is already normalised. See :meth:`segment`.
+
+        Yields:
+            :obj:`str`: The sentences.
+        """
+        yield from self.segment(text, normalized)
+
+    def close(self):
+        """Shut down the processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def _cut_shards(text: str, shard_size: int) -> List[str]:
+    """Cut a normalised text into shards at :data:`SHARD_CUT_PATTERN`.
+
+    The whitespace at each cut point is dropped, so each shard but the last
+    one ends with a sentence terminator.
+
+    Args:
+        text (:obj:`str`):
+            The normalised text.
+        shard_size (:obj:`int`):
+            The minimum number of characters of each shard (but the last one).
+
+    Returns:
+        :obj:`List[str]`: The shards.
+    """
+    shards = []
+    start = 0
+    pos = start + shard_size
+    while len(text) - start > shard_size:
+        match = SHARD_CUT_PATTERN.search(text, pos)
+        if match is None:
+            break
+        # A shard made only of terminators would not be pre-split as in the
+        # whole text (this can only happen at its beginning)
+        if not text[start:match.start() + 1].strip('.!?'):
+            pos = match.end()
+            continue
+        shards.append(text[start:match.start() + 1])
+        start = match.end()
+        pos = start + shard_size
+    shards.append(text[start:])
+    return shards
+
+
+def _split_shard(shard: str) -> Tuple[List[str], List[str]]:
+    """Pre-split a shard and split it with :mod:`blingfire` (worker).
+
+    Args:
+        shard (:obj:`str`):
+            The shard, as cut by :func:`_cut_shards`.
+
+    Returns:
+        :obj:`Tuple[List[str], List[str]]`: The sentences and their
+        separators (see :func:`_split_lines`).
+    """
+    return _split_lines(_default_segmenter._presplit(shard, normalized=True))
+
+
+def _split_lines(text: str) -> Tuple[List[str], List[str]]:
+    """Split a pre-split text with :mod:`blingfire`, keeping the separators.
+
+    :mod:`blingfire` may split a sentence where there is no whitespace, e.g.,
+    "Mr..A.", and it may also add whitespaces, so the separator that follows
+    each sentence in the text is located by matching its non-whitespace
+    characters. This way, the text can be put back together with
+    :func:`_join_lines`.
+
+    Args:
+        text (:obj:`str`):
+            The pre-split text.
+
+    Returns:
+        :obj:`Tuple[List[str], List[str]]`: The sentences, and whether each
+        of them was followed by a whitespace (``' '``) or not (``''``).
+    """
+    lines = text_to_sentences(text).split('\n')
+    separators = [' ' if text.startswith(' ', end) else ''
+                  for end in _iter_line_ends(text, lines)]
+    return lines, separators
+
+
+def _iter_line_ends(text: str, lines: Iterable[str]) -> Iterator[int]:
+    """Locate where the sentences split by :mod:`blingfire` end in the text.
+
+    :mod:`blingfire` only adds or removes whitespaces, so the sentences are
+    located by matching their non-whitespace characters.
+
+    Args:
+        text (:obj:`str`):
+            The text which was split.
+        lines (:obj:`Iterable[str]`):
+            Its sentences (or consecutive groups of them), in order.
+
+    Yields:
+        :obj:`int`: The position after the last character of each sentence.
+    """
+    pos = 0
+    for line in lines:
+        if text.startswith(' ', pos):
+            pos += 1
+        if text.startswith(line, pos):
+            pos += len(line)
+        else:
+            for char in line:
+                if not char.isspace():
+                    pos = text.index(char, pos) + 1
+        yield pos
+
+
+def _join_lines(lines: List[str], separators: List[str]) -> str:
+    """Put back together the text of some sentences (see
+    :func:`_split_lines`)."""
+    return ''.join(line + separator
+                   for line, separator in zip(lines, separators)).rstrip(' ')
+
+
+def _stitch_lines(
+    lines: List[str],
+    separators: List[str],
+    next_lines: List[str],
+    next_separators: List[str],
+    window: int,
+    max_window: int
+):
+    """Append the sentences of a shard, splitting again around the cut point.
+
+    :mod:`blingfire` does not split a sentence regardless of the text around
+    it, so the sentences next to the cut point are split again with a window
+    of sentences at each side (see :func:`_resplit`). How far the context
+    reaches varies, so the new split is only taken once it does not change
+    when the window is doubled. Otherwise, the window is doubled until it
+    does, or until it would exceed :obj:`max_window` (then, the last split is
+    taken).
+
+    Args:
+        lines (:obj:`List[str]`):
+            The sentences of the previous shards, as split by
+            :mod:`blingfire`. The sentences of the next shard are appended to
+            it.
+        separators (:obj:`List[str]`):
+            The separators of :obj:`lines` (see :func:`_split_lines`). The
+            separators of the next shard are appended to it.
+        next_lines (:obj:`List[str]`):
+            The sentences of the next shard, as split by :mod:`blingfire`.
+        next_separators (:obj:`List[str]`):
+            The separators of :obj:`next_lines`.
+        window (:obj:`int`):
+            The initial number of sentences at each side of the cut point
+            which are split again.
+        max_window (:obj:`int`):
+            The maximum number of sentences at each side of the cut point
+            which are split again.
+    """
+    resplit = _resplit(lines, separators, next_lines, next_separators, window,
+                       max_window)
+    while 2 * window <= max_window:
+        wider_resplit = _resplit(lines, separators, next_lines,
+                                 next_separators, 2 * window, max_window)
+        # Compare both splits over the sentences covered by the wider window
+        nleft = len(lines) - min(2 * window, len(lines))
+        nright = min(2 * window, len(next_lines))
+        if (_apply_resplit(lines, separators, next_lines, next_separators,
+                           resplit, nleft, nright)
+                == _apply_resplit(lines, separators, next_lines,
+                                  next_separators, wider_resplit, nleft,
+                                  nright)):
+            break
+        resplit = wider_resplit
+        window *= 2
+    nkept, window_lines, window_separators, nskipped = resplit
+    del lines[nkept:]
+    del separators[nkept:]
+    lines.extend(window_lines)
+    separators.extend(window_separators)
+    lines.extend(next_lines[nskipped:])
+    separators.extend(next_separators[nskipped:])
+
+
+def _resplit(
+    lines: List[str],
+    separators: List[str],
+    next_lines: List[str],
+    next_separators: List[str],
+    window: int,
+    max_window: int
+) -> Tuple[int, List[str], List[str], int]:
+    """Split again the sentences around a cut point.
+
+    The last :obj:`window` sentences of the previous shards and the first
+    :obj:`window` sentences of the next shard are split again together, and
+    the new split is to replace the sentences of the shards between two points
+    where both splits agree. These points must be at least half a window away
+    from the cut point, where the split of the shards lacks the context of the
+    whole text, and from the ends of the window (unless the window reaches the
+    ends of the text), where the new split lacks it. If there are not such
+    points, the window is doubled, as long as it does not exceed
+    :obj:`max_window`. Otherwise, the split of the shards is kept as is.
+
+    The points are compared by their offset in non-whitespace characters,
+    since :mod:`blingfire` may add whitespaces.
+
+    Args:
+        lines (:obj:`List[str]`):
+            The sentences of the previous shards.
+        separators (:obj:`List[str]`):
+            The separators of :obj:`lines`.
+        next_lines (:obj:`List[str]`):
+            The sentences of the next shard.
+        next_separators (:obj:`List[str]`):
+            The separators of :obj:`next_lines`.
+        window (:obj:`int`):
+            The number of sentences at each side of the cut point which are
+            split again.
+        max_window (:obj:`int`):
+            The maximum size the window can be doubled to.
+
+    Returns:
+        :obj:`Tuple[int, List[str], List[str], int]`: The number of sentences
+        of the previous shards which are kept, the sentences (and their
+        separators) that follow them, and the number of sentences of the next
+        shard which they replace.
+    """
+    while True:
+        nleft = min(window, len(lines))
+        nright = min(window, len(next_lines))
+        window_lines, window_separators = _split_lines(_join_lines(
+            lines[-nleft:] + next_lines[:nright],
+            separators[-nleft:] + next_separators[:nright]
+        ))
+        left_offsets = _offsets(lines[-nleft:])
+        cut = left_offsets[-1]
+        right_offsets = _offsets(next_lines[:nright], cut)
+        window_offsets = _offsets(window_lines)
+        margin = window // 2
+        first = 0 if nleft == len(lines) else margin
+        last = (len(window_lines) if nright == len(next_lines)
+                else len(window_lines) - margin)
+        # Last agreeing point before the cut and first one after it. The
+        # sentences of the shards next to the cut point lack context as well
+        left_points = set(left_offsets[:max(nleft - margin, 0) + 1])
+        right_points = set(right_offsets[min(margin, nright):])
+        start = next((i for i in range(last, first - 1, -1)
+                      if window_offsets[i] <= cut
+                      and window_offsets[i] in left_points), None)
+        end = next((i for i in range(max(first, 0), last + 1)
+                    if window_offsets[i] >= cut
+                    and window_offsets[i] in right_points), None)
+        if start is not None and end is not None:
+            nkept = len(lines) - nleft + left_offsets.index(
+                window_offsets[start])
+            nskipped = right_offsets.index(window_offsets[end])
+            window_separators = window_separators[start:end]
+            if start < end == len(window_lines):
+                # The trailing separator of the window was stripped
+                window_separators[-1] = next_separators[nskipped - 1]
+            return (nkept, window_lines[start:end], window_separators,
+                    nskipped)
+        if 2 * window > max_window:
+            return len(lines), [], [], 0
+        window *= 2
+
+
+def _apply_resplit(
+    lines: List[str],
+    separators: List[str],
+    next_lines: List[str],
+    next_separators: List[str],
+    resplit: Tuple[int, List[str], List[str], int],
+    start: int,
+    end: int
+) -> Tuple[List[str], List[str]]:
+    """Get the sentences from ``lines[start]`` to ``next_lines[end]``, once
+    split again (see :func:`_resplit`)."""
+    nkept, window_lines, window_separators, nskipped = resplit
+    return (lines[start:nkept] + window_lines + next_lines[nskipped:end],
+            separators[start:nkept] + window_separators
+            + next_separators[nskipped:end])
+
+
+def _offsets(lines: List[str], start: int = 0) -> List[int]:
+    """Get the offsets in non-whitespace characters where sentences start.
+
+    Args:
+        lines (:obj:`List[str]`):
+            The sentences.
+        start (:obj:`int`, `optional`, defaults to ``0``):
+            The offset of the first sentence.
+
+    Returns:
+        :obj:`List[int]`: The offset of each sentence, followed by the offset
+        where the last one ends.
     """
-    # Punctuation that shouldn't be preceeded by a whitespace
-    PUNCT_NO_PREV_WHITESPACE = ".,;:!?"
+    offsets = [start]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) - line.count(' '))
+    return offsets
 
-    # Check if text is empty or contains only non-printable
-    # characters, e.g., whitespaces
-    if len(text.strip()) == 0:
-        return []
 
-    if tokenizer is None:
-        # If next letter after period is lowercase, consider it part of the same
-        # sentence. E.g.: "As we can see in Figure 1.1. the sentence will not be
-        # split." Also, take acronyms as groups, e.g., U.K., U.S., B.C., D.C.,
-        # etc.
-        tokenizer = RegexpTokenizer(r'[^.!?]+(?:(?:[A-Z][.])+|[.!?]+)+[^A-Z]*')
+def _capitalize_sentence_start(match: re.Match) -> str:
+    """Capitalise the first letter of a sentence (see
+    :data:`LOWERCASE_SENTENCE_START_PATTERN`), unless the previous word is an
+    abbreviation, e.g., "mr." or "i.e.", or a number such as "1.1.".
 
-        text = ' '.join(text.split())  # remove '\n', '\t', etc.
+    Only ASCII letters are capitalised, so the length of the text does not
+    change.
+    """
+    word, separator, letter = match.groups()
+    if '.' in word or word.lower() in LOWERCASE_ABBREVIATIONS:
+        return match.group(0)
+    return f'{word}{separator}{letter.upper()}'
 
-    # If there's no final period, add it (this makes the assumption that the
-    # last sentence is not interrogative or exclamative, i.e., ends with '?' or
-    # '!')
-    if text[-1] not in ('.', '?', '!'):
-        text += '.'
 
-    # Split sentences with the regexp and ensure there's 1 whitespace at most
-    sentences = ' '.join(tokenizer.tokenize(text)).replace('  ', ' ')
+def _iter_lines(text: str) -> Iterator[str]:
+    """Iterate over the lines of a text without splitting it all at once."""
+    start = 0
+    end = text.find('\n')
+    while end != -1:
+        yield text[start:end]
+        start = end + 1
+        end = text.find('\n', start)
+    yield text[start:]
 
-    # Remove whitespaces before PUNCT_WITHOUT_PREV_WHITESPACE
-    for punct in PUNCT_NO_PREV_WHITESPACE:
-        sentences = sentences.replace(' ' + punct, punct)
 
-    sentences = text_to_sentences(sentences).split('\n')
+def _merge_sentences(
+    sentences: Iterable[str],
+    closing: str = ''
+) -> Iterator[str]:
+    """Merge the sentences wrongly split by :mod:`blingfire`.
 
-    final_sentences = [sentences[0]]
+    Args:
+        sentences (:obj:`Iterable[str]`):
+            The sentences, as split by :mod:`blingfire`.
+        closing (:obj:`str`, `optional`, defaults to ``''``):
+            Characters, e.g., closing quotes, which are ignored after a
+            sentence terminator when deciding whether a sentence ends.
 
-    for sent in sentences[1:]:
+    Yields:
+        :obj:`str`: The sentences, once merged.
+    """
+    sentences = iter(sentences)
+    parts = [next(sentences)]
+    # Last character of the current sentence
+    last_char = parts[0].rstrip(closing)[-1:] or ' '
+    for sent in sentences:
         # If the previous sentence doesn't end with a '.', '!' or '?',
         # we concatenate the current sentence to it
-        if final_sentences[-1][-1] not in ('.', '!', '?'):
-            final_sentences[-1] += (' ' + sent)
+        if last_char not in SENTENCE_TERMINATORS:
+            parts.extend((' ', sent))
         # If the next sentence doesn't start with a letter or a number,
         # we concatenate it to the previous
         elif not sent[0].isalpha() and not sent[0].isdigit():
-            final_sentences[-1] += sent
+            parts.append(sent)
         else:
-            final_sentences.append(sent)
+            yield ''.join(parts)
+            parts = [sent]
+        last_char = sent.rstrip(closing)[-1:] or ' '
+    yield ''.join(parts)
+
+
+# Segmenter used by :func:`sentence_tokenize`
+_default_segmenter = SentenceSegmenter()
+
+
+def create_segmenter(
+    backend: str = "blingfire",
+    split_lowercase: bool = False
+) -> BaseSentenceSegmenter:
+    """Create a sentence segmenter.
+
+    Args:
+        backend (:obj:`str`, `optional`, defaults to ``"blingfire"``):
+            The segmentation backend. One of :obj:`SEGMENTERS`.
+        split_lowercase (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            Whether to split sentences starting with a lowercase letter (see
+            :class:`SentenceSegmenter`). The Punkt model always splits them.
 
-    return final_sentences
+    Returns:
+        :obj:`BaseSentenceSegmenter`: The segmenter.
+
+    Raises:
+        :class:`ValueError`: If the backend is not supported.
+    """
+    if backend == "blingfire":
+        if not split_lowercase:
+            return _default_segmenter
+        return SentenceSegmenter(split_lowercase=True)
+    if backend == "punkt":
+        return PunktSentenceSegmenter()
+    raise ValueError(f'Unknown segmenter: {backend}. '
+                     f'Supported segmenters: {", ".join(SEGMENTERS)}.')
+
+
+def sentence_tokenize(
+    text: str,
+    tokenizer: RegexpTokenizer = None,
+    normalized: bool = False
+) -> List[str]:
+    r"""Divide the text into sentences.
+
+    See :class:`SentenceSegmenter`.
+
+    Args:
+        text (:obj:`str`):
+            Text to be split in sentences.
+        tokenizer (:obj:`nltk.tokenize.RegexpTokenizer`, `optional`, defaults to :obj:`None`):
+            Regular expression to carry out a preliminar split (the text will be
+            afterwards split once again by the :mod:`blingfire`
+            :func:`text_to_sentences` function).
+        normalized (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            Whether the words of the text are already separated by a single
+            whitespace (see :attr:`models.Document.normalized_text`), in which
+            case the text is not normalised again.
+    """
+    segmenter = (_default_segmenter if tokenizer is None
+                 else SentenceSegmenter(tokenizer))
+    return segmenter.segment(text, normalized)
@@ -0,0 +1,381 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Truecaser backed by a compiled model.
+
+The distributions of :class:`TrueCaser` (``data/english.dist``) are keyed by
+strings such as ``"prev_possible_next"``, so scoring each candidate casing
+builds several temporary strings, and the denominators of the scores are
+summed again over all the alternative casings for every candidate.
+
+The compiled model interns the tokens as integer ids, keys the n-grams by
+integers which pack their ids, and stores the denominators already summed for
+each context (e.g., the previous token and the lowercase form), so that each
+score only takes a few dictionary lookups with integer keys. The scores are
+computed with the same floating point operations as :meth:`TrueCaser.get_score`,
+so the chosen casings are the same.
+
+The model is compiled from the distributions with::
+
+    python -m jizt.summaries.pipeline.text_processing.truecase.CompiledTrueCaser \
+        data/english.dist data/english.compiled
+"""
+
+__version__ = '0.1.2'
+
+import sys
+import math
+import pickle
+from pathlib import Path
+from .TrueCaser import TrueCaser
+from typing import Dict, List, Optional, Tuple, Union
+
+# Pseudo count added to each count (see :meth:`TrueCaser.get_score`)
+PSEUDO_COUNT = 5.0
+# Format version of the compiled models
+MODEL_VERSION = 1
+
+
+def build_model(dist_file_path: Union[str, Path]) -> Dict:
+    """Build the compiled model from the distributions of a :class:`TrueCaser`.
+
+    The ids of the tokens follow the lexicographical order of their UTF-8
+    encodings, so that they do not depend on the iteration order of the
+    distributions.
+
+    Args:
+        dist_file_path (:obj:`str` or :obj:`pathlib.Path`):
+            The path of the pickled distributions, e.g.,
+            ``data/english.dist``.
+
+    Returns:
+        :obj:`Dict`: The model, with the same keys as the compiled models.
+    """
+    with open(dist_file_path, "rb") as distributions_file:
+        dists = pickle.load(distributions_file)
+
+    ngrams = {}
+    for name, order in (("backward_bi_dist", 2), ("forward_bi_dist", 2),
+                        ("trigram_dist", 3)):
+        ngrams[name] = {}
+        for key, count in dists[name].items():
+            ngram = tuple(key.split("_"))
+            # Tokens never contain "_" when scoring, so the keys which do
+            # cannot be looked up
+            if len(ngram) == order and count:
+                ngrams[name][ngram] = count
+
+    vocabulary = set(dists["uni_dist"])
+    for lower, alternatives in dists["word_casing_lookup"].items():
+        vocabulary.add(lower)
+        vocabulary.update(alternatives)
+    for counts in ngrams.values():
+        for ngram in counts:
+            vocabulary.update(ngram)
+    tokens = sorted(vocabulary, key=lambda token: token.encode("utf-8"))
+    token_ids = {token: token_id for token_id, token in enumerate(tokens)}
+
+    # The alternatives are sorted so that ties are broken deterministically
+    casings = {}
+    lower_ids = {}  # lowercase form of each casing
+    for lower, alternatives in dists["word_casing_lookup"].items():
+        alternatives = sorted(alternatives,
+                              key=lambda alt: (-dists["uni_dist"][alt], alt))
+        lower_id = token_ids[lower]
+        casings[lower_id] = tuple(token_ids[alt] for alt in alternatives)
+        for alt_id in casings[lower_id]:
+            lower_ids[alt_id] = lower_id
+    unigrams = {token_ids[token]: count
+                for token, count in dists["uni_dist"].items() if count}
+
+    size = len(tokens)
+    model = {
+        "version": MODEL_VERSION,
+        "tokens": tokens,
+        "casings": casings,
+        "unigrams": unigrams,
+        "backward_bigrams": {},
+        "forward_bigrams": {},
+        "trigrams": {},
+        "unigram_sums": {},
+        "backward_bigram_sums": {},
+        "forward_bigram_sums": {},
+        "trigram_sums": {}
+    }
+    for lower_id, alt_ids in casings.items():
+        model["unigram_sums"][lower_id] = sum(unigrams.get(alt_id, 0)
+                                              for alt_id in alt_ids)
+    # Sum the counts of the alternatives of the possible token in each context
+    for name, ngram_key, sum_key in (
+            ("backward_bi_dist", "backward_bigrams", "backward_bigram_sums"),
+            ("forward_bi_dist", "forward_bigrams", "forward_bigram_sums"),
+            ("trigram_dist", "trigrams", "trigram_sums")):
+        counts = model[ngram_key]
+        sums = model[sum_key]
+        for ngram, count in ngrams[name].items():
+            ngram = [token_ids[token] for token in ngram]
+            counts[_pack(ngram, size)] = count
+            possible_idx = 0 if name == "forward_bi_dist" else 1
+            lower_id = lower_ids.get(ngram[possible_idx])
+            if lower_id is None:
+                continue  # not an alternative of any lowercase form
+            ngram[possible_idx] = lower_id
+            context = _pack(ngram, size)
+            sums[context] = sums.get(context, 0) + count
+    return model
+
+
+def compile_model(
+    dist_file_path: Union[str, Path],
+    model_path: Union[str, Path]
+):
+    """Compile the distributions of a :class:`TrueCaser`.
+
+    Args:
+        dist_file_path (:obj:`str` or :obj:`pathlib.Path`):
+            The path of the pickled distributions, e.g.,
+            ``data/english.dist``.
+        model_path (:obj:`str` or :obj:`pathlib.Path`):
+            The path where the compiled model is saved.
+    """
+    model = build_model(dist_file_path)
+    with open(model_path, "wb") as model_file:
+        pickle.dump(model, model_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class CompiledTrueCaser(TrueCaser):
+    """Truecaser backed by a compiled model (see :func:`compile_model`).
+
+    It chooses the same casings as :class:`TrueCaser` with the distributions
+    the model was compiled from. The only difference is that the ties between
+    alternatives with the same score are broken in favour of the most frequent
+    one, instead of depending on the iteration order of a set.
+
+    Args:
+        model_path (:obj:`str` or :obj:`pathlib.Path`):
+            The path of the compiled model.
+    """
+
+    def __init__(self, model_path: Union[str, Path]):
+        with open(model_path, "rb") as model_file:
+            model = pickle.load(model_file)
+        if model.get("version") != MODEL_VERSION:
+            raise ValueError(f"Unsupported truecaser model version: "
+                             f"{model.get('version')}.")
+        self.tokens = model["tokens"]
+        self.token_ids: Dict[str, int] = {token: token_id for token_id, token
+                                          in enumerate(self.tokens)}
+        self._size = len(self.tokens)
+        self.casings = model["casings"]
+        self.unigrams = model["unigrams"]
+        self.backward_bigrams = model["backward_bigrams"]
+        self.forward_bigrams = model["forward_bigrams"]
+        self.trigrams = model["trigrams"]
+        self.unigram_sums = model["unigram_sums"]
+        self.backward_bigram_sums = model["backward_bigram_sums"]
+        self.forward_bigram_sums = model["forward_bigram_sums"]
+        self.trigram_sums = model["trigram_sums"]
+
+    def get_score(
+        self,
+        prev_token: Optional[str],
+        possible_token: str,
+        next_token: Optional[str]
+    ) -> float:
+        """Get the score of a casing of a token (see
+        :meth:`TrueCaser.get_score`).
+
+        Args:
+            prev_token (:obj:`str`, `optional`):
+                The previous token, as cased, if any.
+            possible_token (:obj:`str`):
+                The casing of the token.
+            next_token (:obj:`str`, `optional`):
+                The next token, if any.
+
+        Returns:
+            :obj:`float`: The log-probability of the casing.
+        """
+        lower_id = self.token_ids.get(possible_token.lower())
+        if lower_id not in self.casings:
+            raise KeyError(possible_token.lower())
+        possible_id = self.token_ids.get(possible_token)
+        if possible_id is None:
+            # A casing out of vocabulary has no counts
+            possible_id = self._size
+        return self._score_casings(prev_token, lower_id, (possible_id,),
+                                   len(self.casings[lower_id]), next_token)[0]
+
+    def get_token_case(
+        self,
+        prev_token: Optional[str],
+        token: str,
+        next_token: Optional[str]
+    ) -> Optional[str]:
+        """Get the most likely casing of a lowercase token.
+
+        Args:
+            prev_token (:obj:`str`, `optional`):
+                The previous token, as cased, if any.
+            token (:obj:`str`):
+                The token, in lowercase.
+            next_token (:obj:`str`, `optional`):
+                The next token, if any.
+
+        Returns:
+            :obj:`str`: The casing, or :obj:`None` if the token is out of
+            vocabulary.
+        """
+        lower_id = self.token_ids.get(token)
+        alt_ids = self.casings.get(lower_id)
+        if alt_ids is None:
+            return None
+        if len(alt_ids) == 1:
+            return self.tokens[alt_ids[0]]
+        return self._get_best_case(prev_token, lower_id, next_token)
+
+    def _get_best_case(
+        self,
+        prev_token: Optional[str],
+        lower_id: int,
+        next_token: Optional[str]
+    ) -> str:
+        """Get the casing of a token with the highest score among its
+        alternatives (memoized, see :meth:`TrueCaser.set_cache_size`).
+
+        Args:
+            prev_token (:obj:`str`, `optional`):
+                The previous token, as cased, if any.
+            lower_id (:obj:`int`):
+                The id of the token, in lowercase.
+            next_token (:obj:`str`, `optional`):
+                The next token, if any.
+
+        Returns:
+            :obj:`str`: The casing.
+        """
+        alt_ids = self.casings[lower_id]
+        scores = self._score_casings(prev_token, lower_id, alt_ids,
+                                     len(alt_ids), next_token)
+        best = max(range(len(alt_ids)), key=scores.__getitem__)
+        return self.tokens[alt_ids[best]]
+
+    def _score_casings(
+        self,
+        prev_token: Optional[str],
+        lower_id: int,
+        candidate_ids: Tuple[int, ...],
+        nalternatives: int,
+        next_token: Optional[str]
+    ) -> List[float]:
+        """Score some casings of a token in its context.
+
+        The denominators only depend on the context, so they are looked up
+        once for all the casings. The terms are computed and added in the same
+        order as in :meth:`TrueCaser.get_score`, so that the scores are exactly
+        the same.
+
+        Args:
+            prev_token (:obj:`str`, `optional`):
+                The previous token, as cased, if any.
+            lower_id (:obj:`int`):
+                The id of the lowercase form of the token.
+            candidate_ids (:obj:`Tuple[int, ...]`):
+                The ids of the casings to score. An id out of the vocabulary
+                (e.g., the number of tokens) stands for a casing without
+                counts.
+            nalternatives (:obj:`int`):
+                The number of alternative casings of the lowercase form.
+            next_token (:obj:`str`, `optional`):
+                The next token, if any.
+
+        Returns:
+            :obj:`List[float]`: The score of each casing.
+        """
+        log = math.log
+        size = self._size
+        pseudo_counts = PSEUDO_COUNT * nalternatives
+        # Term of an n-gram without counts (e.g., out of vocabulary)
+        no_counts = log(PSEUDO_COUNT / pseudo_counts)
+        prev_id = (self.token_ids.get(prev_token) if prev_token is not None
+                   else None)
+        next_id = (self.token_ids.get(next_token.lower())
+                   if next_token is not None else None)
+
+        # Each packed key is an offset plus the id of the casing times a scale
+        unigram_denominator = (self.unigram_sums.get(lower_id, 0)
+                               + pseudo_counts)
+        if prev_id is not None:
+            backward_offset = prev_id * size
+            backward_denominator = (self.backward_bigram_sums.get(
+                backward_offset + lower_id, 0) + pseudo_counts)
+        if next_id is not None:
+            forward_denominator = (self.forward_bigram_sums.get(
+                lower_id * size + next_id, 0) + pseudo_counts)
+        if prev_id is not None and next_id is not None:
+            trigram_offset = prev_id * size * size + next_id
+            trigram_denominator = (self.trigram_sums.get(
+                trigram_offset + lower_id * size, 0) + pseudo_counts)
+        unigrams = self.unigrams.get
+        backward_bigrams = self.backward_bigrams.get
+        forward_bigrams = self.forward_bigrams.get
+        trigrams = self.trigrams.get
+
+        scores = []
+        for token_id in candidate_ids:
+            # Ids out of the vocabulary might collide with other packed keys
+            known = token_id < size
+            score = log(((unigrams(token_id, 0) if known else 0)
+                         + PSEUDO_COUNT) / unigram_denominator)
+            if prev_token is not None:
+                if prev_id is None or not known:
+                    score += (no_counts if prev_id is None else
+                              log(PSEUDO_COUNT / backward_denominator))
+                else:
+                    score += log((backward_bigrams(backward_offset + token_id,
+                                                   0) + PSEUDO_COUNT)
+                                 / backward_denominator)
+            if next_token is not None:
+                if next_id is None or not known:
+                    score += (no_counts if next_id is None else
+                              log(PSEUDO_COUNT / forward_denominator))
+                else:
+                    score += log((forward_bigrams(token_id * size + next_id, 0)
+                                  + PSEUDO_COUNT) / forward_denominator)
+            if prev_token is not None and next_token is not None:
+                if prev_id is None or next_id is None or not known:
+                    score += (no_counts if prev_id is None or next_id is None
+                              else log(PSEUDO_COUNT / trigram_denominator))
+                else:
+                    score += log((trigrams(trigram_offset + token_id * size, 0)
+                                  + PSEUDO_COUNT) / trigram_denominator)
+            scores.append(score)
+        return scores
+
+
+def _pack(ids, size: int) -> int:
+    """Pack the ids of an n-gram into a single integer key."""
+    key = 0
+    for token_id in ids:
+        key = key * size + token_id
+    return key
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(f"Usage: python -m {__spec__.name} DIST_FILE MODEL_FILE")
+    compile_model(sys.argv[1], sys.argv[2])
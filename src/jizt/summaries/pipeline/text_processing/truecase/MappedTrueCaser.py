@@ -0,0 +1,332 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Truecaser backed by a memory-mapped model.
+
+Loading the distributions of :class:`TrueCaser` (or a compiled model, see
+:mod:`CompiledTrueCaser`) unpickles several large dictionaries, which takes
+a few seconds and a private copy of the model in each of the processes that
+serve the API.
+
+The mapped model stores the compiled model as NumPy arrays instead, in a
+directory with one ``.npy`` file per array. The dictionaries of the compiled
+model are stored as hash tables with open addressing (linear probing), so
+that looking a key up usually takes one or two reads:
+
+* ``vocabulary.npy`` and ``vocabulary_offsets.npy``: the UTF-8 encoded
+  tokens, one after the other, i.e., the token with id ``i`` is
+  ``vocabulary[vocabulary_offsets[i]:vocabulary_offsets[i+1]]``.
+* ``vocabulary_slots.npy``: the hash table of the ids of the tokens (``-1``
+  in the empty slots), hashed by the CRC-32 of the encoded tokens.
+* ``casing_offsets.npy`` and ``casing_ids.npy``: the ids of the alternative
+  casings of each token, i.e., those of the token with id ``i`` are
+  ``casing_ids[casing_offsets[i]:casing_offsets[i+1]]``.
+* ``<table>_keys.npy`` and ``<table>_counts.npy`` for each of the counts and
+  sums of the compiled model: the hash table of the packed keys, and their
+  counts (``-1`` in the empty slots).
+
+The arrays are memory-mapped read-only, so loading the model is almost
+instant, and all the processes share the same pages through the page cache,
+instead of each one having its own copy.
+
+The model is built from the distributions with::
+
+    python -m jizt.summaries.pipeline.text_processing.truecase.MappedTrueCaser \
+        data/english.dist data/english.mapped
+"""
+
+__version__ = '0.1.1'
+
+import sys
+import json
+import zlib
+import numpy as np
+from pathlib import Path
+from .CompiledTrueCaser import CompiledTrueCaser, build_model
+from typing import Optional, Tuple, Union
+
+# Format version of the mapped models
+MAPPED_MODEL_VERSION = 2
+# Counts and sums of the compiled models, stored as hash tables
+TABLES = ("unigrams", "backward_bigrams", "forward_bigrams", "trigrams",
+          "unigram_sums", "backward_bigram_sums", "forward_bigram_sums",
+          "trigram_sums")
+# Multiplier of the (Fibonacci) hashing of the keys into the slots
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+UINT64_MASK = 2**64 - 1
+
+
+def save_mapped_model(
+    dist_file_path: Union[str, Path],
+    model_dir: Union[str, Path]
+):
+    """Build a mapped model from the distributions of a :class:`TrueCaser`.
+
+    Args:
+        dist_file_path (:obj:`str` or :obj:`pathlib.Path`):
+            The path of the pickled distributions, e.g.,
+            ``data/english.dist``.
+        model_dir (:obj:`str` or :obj:`pathlib.Path`):
+            The directory where the model is saved. It is created if it does
+            not exist.
+
+    Raises:
+        :class:`ValueError`: If the vocabulary is too large for the trigrams
+        to be packed into 64-bit keys.
+    """
+    model = build_model(dist_file_path)
+    size = len(model["tokens"])
+    if (size + 1)**3 > 2**64:
+        raise ValueError(f"The vocabulary is too large to be mapped "
+                         f"({size} tokens).")
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    encoded = [token.encode("utf-8") for token in model["tokens"]]
+    np.save(model_dir / "vocabulary.npy",
+            np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(model_dir / "vocabulary_offsets.npy",
+            np.cumsum([0] + [len(token) for token in encoded],
+                      dtype=np.int64))
+    np.save(model_dir / "vocabulary_slots.npy", _hash_slots(
+        np.array([zlib.crc32(token) for token in encoded], dtype=np.uint64)))
+    lengths = np.zeros(size + 1, dtype=np.int64)
+    for lower_id, alt_ids in model["casings"].items():
+        lengths[lower_id + 1] = len(alt_ids)
+    np.save(model_dir / "casing_offsets.npy", np.cumsum(lengths))
+    np.save(model_dir / "casing_ids.npy",
+            np.array([alt_id for lower_id in sorted(model["casings"])
+                      for alt_id in model["casings"][lower_id]],
+                     dtype=np.int64))
+    for table in TABLES:
+        keys = np.fromiter(model[table], dtype=np.uint64,
+                           count=len(model[table]))
+        counts = np.fromiter(model[table].values(), dtype=np.int64,
+                             count=len(model[table]))
+        slots = _hash_slots(keys)
+        occupied = slots >= 0
+        slot_keys = np.zeros(len(slots), dtype=np.uint64)
+        slot_keys[occupied] = keys[slots[occupied]]
+        slot_counts = np.full(len(slots), -1, dtype=np.int64)
+        slot_counts[occupied] = counts[slots[occupied]]
+        np.save(model_dir / f"{table}_keys.npy", slot_keys)
+        np.save(model_dir / f"{table}_counts.npy", slot_counts)
+    # Written last, so that an incomplete model is not loaded
+    with open(model_dir / "model.json", "w") as header_file:
+        json.dump({"version": MAPPED_MODEL_VERSION, "size": size}, header_file)
+
+
+def _hash_slots(hashes: np.ndarray) -> np.ndarray:
+    """Place entries in a hash table with linear probing.
+
+    The table has a power of two of slots, at least twice as many as entries.
+    Instead of inserting the entries one by one, they are sorted by their
+    home slot, so that each entry goes to the first slot after the previous
+    one which is not before its home slot. The entries which do not fit
+    before the end of the table wrap around to the first free slots.
+
+    Args:
+        hashes (:obj:`np.ndarray`):
+            The hash of each of the entries (``uint64``).
+
+    Returns:
+        :obj:`np.ndarray`: The index of the entry in each slot, or ``-1`` if
+        the slot is empty.
+    """
+    bits = max(1, (2 * len(hashes)).bit_length())
+    homes = ((hashes * np.uint64(HASH_MULTIPLIER))
+             >> np.uint64(64 - bits)).astype(np.int64)
+    order = np.argsort(homes, kind="stable")
+    ranks = np.arange(len(order))
+    positions = ranks + np.maximum.accumulate(homes[order] - ranks)
+    slots = np.full(2**bits, -1, dtype=np.int64)
+    fit = positions < len(slots)
+    slots[positions[fit]] = order[fit]
+    wrapped = order[~fit]
+    slots[np.flatnonzero(slots < 0)[:len(wrapped)]] = wrapped
+    return slots
+
+
+class MappedTrueCaser(CompiledTrueCaser):
+    """Truecaser backed by a memory-mapped model (see
+    :func:`save_mapped_model`).
+
+    It chooses the same casings as :class:`CompiledTrueCaser`, looking the
+    tokens and the counts up in the hash tables of the mapped arrays.
+
+    Args:
+        model_dir (:obj:`str` or :obj:`pathlib.Path`):
+            The directory of the mapped model.
+    """
+
+    def __init__(self, model_dir: Union[str, Path]):
+        model_dir = Path(model_dir)
+        with open(model_dir / "model.json") as header_file:
+            header = json.load(header_file)
+        if header.get("version") != MAPPED_MODEL_VERSION:
+            raise ValueError(f"Unsupported truecaser model version: "
+                             f"{header.get('version')}.")
+
+        def load(name: str) -> np.ndarray:
+            return np.load(model_dir / f"{name}.npy", mmap_mode="r")
+
+        self.tokens = _Vocabulary(load("vocabulary"),
+                                  load("vocabulary_offsets"),
+                                  load("vocabulary_slots"))
+        self.token_ids = self.tokens
+        self._size = header["size"]
+        self.casings = _Casings(load("casing_offsets"), load("casing_ids"))
+        for table in TABLES:
+            setattr(self, table, _HashTable(load(f"{table}_keys"),
+                                            load(f"{table}_counts")))
+
+
+def _as_view(array: np.ndarray, format: str) -> memoryview:
+    """View a mapped array as a memoryview of Python integers.
+
+    Indexing a memoryview is faster than indexing a NumPy array, which wraps
+    each element in a scalar.
+
+    Args:
+        array (:obj:`np.ndarray`):
+            A 1-D array of integers, in the native byte order.
+        format (:obj:`str`):
+            The format of the elements, e.g., ``"q"`` (64-bit, signed) or
+            ``"Q"`` (64-bit, unsigned).
+
+    Returns:
+        :obj:`memoryview`: The view.
+    """
+    return memoryview(array).cast("B").cast(format)
+
+
+class _Vocabulary:
+    """Mapped tokens, which behave both as the list of the tokens and as the
+    dictionary from the tokens to their ids of the compiled models.
+
+    Args:
+        data (:obj:`np.ndarray`):
+            The UTF-8 encoded tokens, one after the other.
+        offsets (:obj:`np.ndarray`):
+            The offsets of the tokens in :obj:`data`.
+        slots (:obj:`np.ndarray`):
+            The hash table of the ids of the tokens.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray,
+                 slots: np.ndarray):
+        self._data = _as_view(data, "B")
+        self._offsets = _as_view(offsets, "q")
+        self._slots = _as_view(slots, "q")
+        self._mask = len(slots) - 1
+        self._shift = 65 - len(slots).bit_length()
+
+    def get(self, token: str, default: Optional[int] = None) -> Optional[int]:
+        encoded = token.encode("utf-8")
+        data, offsets, slots = self._data, self._offsets, self._slots
+        mask = self._mask
+        # Home slot (see _hash_slots)
+        slot = ((zlib.crc32(encoded) * HASH_MULTIPLIER & UINT64_MASK)
+                >> self._shift)
+        while True:
+            token_id = slots[slot]
+            if token_id < 0:
+                return default
+            if data[offsets[token_id]:offsets[token_id + 1]] == encoded:
+                return token_id
+            slot = (slot + 1) & mask
+
+    def __getitem__(self, token_id: int) -> str:
+        return str(self._data[self._offsets[token_id]:
+                              self._offsets[token_id + 1]], "utf-8")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class _Casings:
+    """Mapped alternative casings of each token, which behave as the
+    dictionary from the lowercase forms to the ids of their casings of the
+    compiled models.
+
+    Args:
+        offsets (:obj:`np.ndarray`):
+            The offsets of the casings of each token in :obj:`casing_ids`.
+        casing_ids (:obj:`np.ndarray`):
+            The ids of the casings.
+    """
+
+    def __init__(self, offsets: np.ndarray, casing_ids: np.ndarray):
+        self._offsets = _as_view(offsets, "q")
+        self._casing_ids = _as_view(casing_ids, "q")
+
+    def get(
+        self,
+        lower_id: Optional[int],
+        default: Optional[Tuple[int, ...]] = None
+    ) -> Optional[Tuple[int, ...]]:
+        if lower_id is None:
+            return default
+        start, end = self._offsets[lower_id], self._offsets[lower_id + 1]
+        if start == end:
+            return default
+        return tuple(self._casing_ids[start:end])
+
+    def __getitem__(self, lower_id: int) -> Tuple[int, ...]:
+        alt_ids = self.get(lower_id)
+        if alt_ids is None:
+            raise KeyError(lower_id)
+        return alt_ids
+
+    def __contains__(self, lower_id: Optional[int]) -> bool:
+        return self.get(lower_id) is not None
+
+
+class _HashTable:
+    """Mapped counts, which behave as the dictionaries from the packed keys
+    to the counts of the compiled models.
+
+    Args:
+        keys (:obj:`np.ndarray`):
+            The packed key in each slot.
+        counts (:obj:`np.ndarray`):
+            The count of the key in each slot, or ``-1`` if it is empty.
+    """
+
+    def __init__(self, keys: np.ndarray, counts: np.ndarray):
+        self._keys = _as_view(keys, "Q")
+        self._counts = _as_view(counts, "q")
+        self._mask = len(counts) - 1
+        self._shift = 65 - len(counts).bit_length()
+
+    def get(self, key: int, default: Optional[int] = None) -> Optional[int]:
+        counts = self._counts
+        # Home slot (see _hash_slots)
+        slot = (key * HASH_MULTIPLIER & UINT64_MASK) >> self._shift
+        while True:
+            count = counts[slot]
+            if count < 0:
+                return default
+            if self._keys[slot] == key:
+                return count
+            slot = (slot + 1) & self._mask
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(f"Usage: python -m {__spec__.name} DIST_FILE MODEL_DIR")
+    save_mapped_model(sys.argv[1], sys.argv[2])
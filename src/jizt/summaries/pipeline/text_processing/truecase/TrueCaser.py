@@ -20,10 +20,14 @@
 
 import math
 import os
+from functools import lru_cache
 import pickle
 import string
 import re
 
+# Words, and contractions (e.g., "'s" in "it's"), which are not truecased
+TOKEN_PATTERN = re.compile(r"'[A-Za-z]+|[A-Za-z]+")
+
 
 class TrueCaser(object):
     def __init__(self, dist_file_path=None):
@@ -104,6 +108,50 @@ class TrueCaser(object):
 
         return result
 
+    def get_token_case(self, prev_token, token, next_token):
+        """Returns the most likely casing of a lowercase token, or None if it
+        is out of vocabulary."""
+        if token not in self.word_casing_lookup:
+            return None
+        if len(self.word_casing_lookup[token]) == 1:
+            return list(self.word_casing_lookup[token])[0]
+        return self._get_best_case(prev_token, token, next_token)
+
+    def _get_best_case(self, prev_token, token, next_token):
+        """Returns the casing of a token with the highest score among its
+        alternatives (memoized, see set_cache_size)."""
+        best_token = None
+        highest_score = float("-inf")
+
+        for possible_token in self.word_casing_lookup[token]:
+            score = self.get_score(prev_token, possible_token, next_token)
+
+            if score > highest_score:
+                best_token = possible_token
+                highest_score = score
+
+        return best_token
+
+    def set_cache_size(self, maxsize):
+        """Memoizes the casings chosen by get_token_case among several
+        alternatives, keyed by the previous token (as cased), the token and
+        the next token (both in lower case). The least recently used casings
+        are discarded once there are maxsize of them, and a maxsize of 0
+        disables the cache. The cache can be used from several threads at
+        once (see functools.lru_cache).
+        """
+        self.__dict__.pop("_get_best_case", None)  # the previous cache
+        if maxsize:
+            self._get_best_case = lru_cache(maxsize=maxsize)(
+                self._get_best_case)
+
+    def cache_info(self):
+        """Returns the hits, misses, maximum and current size of the cache
+        (see functools.lru_cache), or None if there is no cache."""
+        get_best_case = self.__dict__.get("_get_best_case")
+        return (get_best_case.cache_info() if get_best_case is not None
+                else None)
+
     def first_token_case(self, raw):
         return f'{raw[0].upper()}{raw[1:]}'
 
@@ -116,11 +164,11 @@ class TrueCaser(object):
             lower: Returns OOV tokens in lower case
             as-is: Returns OOV tokens as is
         """
-        contractions = r"'[A-Za-z]+"
-        only_words = r"[A-Za-z]+"
-
-        pruned_sentence = re.sub(contractions, "", sentence)
-        tokens = re.findall(only_words, pruned_sentence)
+        # Contractions are matched (and skipped) so that the letters after
+        # the apostrophe are not taken as a token
+        spans = [match.span() for match in TOKEN_PATTERN.finditer(sentence)
+                 if sentence[match.start()] != "'"]
+        tokens = [sentence[start:end] for start, end in spans]
 
         tokens_true_case = []
         for token_idx, token in enumerate(tokens):
@@ -129,28 +177,14 @@ class TrueCaser(object):
                 tokens_true_case.append(token)
             else:
                 token = token.lower()
-                if token in self.word_casing_lookup:
-                    if len(self.word_casing_lookup[token]) == 1:
-                        tokens_true_case.append(
-                            list(self.word_casing_lookup[token])[0])
-                    else:
-                        prev_token = (tokens_true_case[token_idx - 1]
-                                      if token_idx > 0 else None)
-                        next_token = (tokens[token_idx + 1]
-                                      if token_idx < len(tokens) - 1 else None)
-
-                        best_token = None
-                        highest_score = float("-inf")
-
-                        for possible_token in self.word_casing_lookup[token]:
-                            score = self.get_score(prev_token, possible_token,
-                                                   next_token)
-
-                            if score > highest_score:
-                                best_token = possible_token
-                                highest_score = score
-
-                        tokens_true_case.append(best_token)
+                prev_token = (tokens_true_case[token_idx - 1]
+                              if token_idx > 0 else None)
+                # Only its lowercase form is taken into account
+                next_token = (tokens[token_idx + 1].lower()
+                              if token_idx < len(tokens) - 1 else None)
+                best_token = self.get_token_case(prev_token, token, next_token)
+                if best_token is not None:
+                    tokens_true_case.append(best_token)
 
                     if token_idx == 0:
                         tokens_true_case[0] = self.first_token_case(tokens_true_case[0])
@@ -163,21 +197,29 @@ class TrueCaser(object):
                     else:
                         tokens_true_case.append(token)
 
-        spans = []
-        offset = 0
+        # The rest of the sentence is lowercased. A few characters change
+        # their length when lowercased, and then the text between the tokens
+        # has to be lowercased separately
         sentence_lower = sentence.lower()
-        true_case_sentence = sentence_lower
-
-        for tk in tokens_true_case:
-            span = re.search(tk.lower(), sentence_lower[offset:]).span()
-            spans.append([s + offset for s in span])
-            offset += span[1]
-
-        for s, tk in zip(spans, tokens_true_case):
-            true_case_sentence = (f"{true_case_sentence[:s[0]]}{tk}"
-                                  f"{true_case_sentence[s[1]:]}")
-
-        return true_case_sentence
+        same_offsets = len(sentence_lower) == len(sentence)
+        pieces = []
+        offset = 0
+        for (start, end), tk in zip(spans, tokens_true_case):
+            pieces.append(sentence_lower[offset:start] if same_offsets
+                          else sentence[offset:start].lower())
+            pieces.append(tk)
+            offset = end
+        pieces.append(sentence_lower[offset:] if same_offsets
+                      else sentence[offset:].lower())
+
+        return "".join(pieces)
+
+    def get_true_case_many(self, sentences,
+                           out_of_vocabulary_token_option="title"):
+        """Returns the true case of each of the passed sentences (see
+        get_true_case)."""
+        return [self.get_true_case(sentence, out_of_vocabulary_token_option)
+                for sentence in sentences]
 
 
 if __name__ == "__main__":
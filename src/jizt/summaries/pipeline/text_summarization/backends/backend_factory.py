@@ -0,0 +1,73 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Creation of the inference backends."""
+
+__version__ = '0.1.1'
+
+from pathlib import Path
+from .backend_interface import SummarizationBackend
+from .pytorch_backend import PyTorchBackend
+from jizt.config import (SUMM_BACKEND, SUMM_DRAFT_MODEL_PATH, SUMM_MODEL_PATH,
+                         SUMM_QUANTIZATION)
+from typing import Optional, Union
+
+# Supported backends
+BACKENDS = ("pytorch", "onnxruntime")
+
+
+def create_backend(
+    backend: str = SUMM_BACKEND,
+    model_path: Union[str, Path] = SUMM_MODEL_PATH,
+    quantization: str = SUMM_QUANTIZATION,
+    draft_model_path: Optional[Union[str, Path]] = SUMM_DRAFT_MODEL_PATH
+) -> SummarizationBackend:
+    """Create an inference backend.
+
+    Args:
+        backend (:obj:`str`, `optional`, defaults to :obj:`jizt.config.SUMM_BACKEND`):
+            The backend. One of :obj:`BACKENDS`.
+        model_path (:obj:`str` or :obj:`pathlib.Path`, `optional`, defaults to :obj:`jizt.config.SUMM_MODEL_PATH`):
+            The path or name of the pretrained model.
+        quantization (:obj:`str`, `optional`, defaults to :obj:`jizt.config.SUMM_QUANTIZATION`):
+            The quantization applied to the model. Only supported by the
+            PyTorch backend.
+        draft_model_path (:obj:`str` or :obj:`pathlib.Path`, `optional`, defaults to :obj:`jizt.config.SUMM_DRAFT_MODEL_PATH`):
+            The path or name of the draft model used for assisted generation.
+            Only supported by the PyTorch backend.
+
+    Returns:
+        :obj:`SummarizationBackend`: The backend.
+
+    Raises:
+        :class:`ValueError`: If the backend is not supported, or it does not
+        support the quantization mode or assisted generation.
+    """
+    if backend == "pytorch":
+        return PyTorchBackend(model_path, quantization, draft_model_path)
+    if backend == "onnxruntime":
+        if quantization != "none":
+            raise ValueError("Quantization is only supported by the PyTorch "
+                             "backend.")
+        if draft_model_path is not None:
+            raise ValueError("Assisted generation is only supported by the "
+                             "PyTorch backend.")
+        # Imported here since onnxruntime is an optional dependency
+        from .onnx_backend import OnnxRuntimeBackend
+        return OnnxRuntimeBackend(model_path)
+    raise ValueError(f'Unknown backend: {backend}. '
+                     f'Supported backends: {", ".join(BACKENDS)}.')
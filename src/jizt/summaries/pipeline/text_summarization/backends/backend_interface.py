@@ -0,0 +1,66 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Inference backend interface for the summarizer."""
+
+__version__ = '0.1.0'
+
+import torch
+from abc import ABC, abstractmethod
+from transformers import GenerationConfig
+
+
+class SummarizationBackend(ABC):
+    """Interface of the inference backends used by :class:`Summarizer`.
+
+    A backend runs the summarization model, i.e., it turns a batch of encoded
+    subdivisions into the ids of their summaries. The rest of the
+    summarization (batching, decoding of the ids, etc.) is independent from
+    the backend.
+    """
+
+    @property
+    @abstractmethod
+    def generation_config(self) -> GenerationConfig:
+        """:obj:`transformers.GenerationConfig`: The default generation
+        parameters of the model."""
+
+    @abstractmethod
+    def generate(
+        self,
+        input_ids: torch.LongTensor,
+        attention_mask: torch.LongTensor,
+        **generation_params
+    ) -> torch.LongTensor:
+        """Generate the summary ids of a batch of subdivisions.
+
+        Args:
+            input_ids (:obj:`torch.LongTensor`):
+                The (right-padded) subdivisions, of shape
+                ``[batch_size, sequence_length]``.
+            attention_mask (:obj:`torch.LongTensor`):
+                The mask that avoids attending to the padding, of the same
+                shape as :obj:`input_ids`.
+            generation_params:
+                The generation parameters, with the same meaning as in
+                :meth:`transformers.GenerationMixin.generate`. See
+                :meth:`Summarizer.summarize`.
+
+        Returns:
+            :obj:`torch.LongTensor`: The generated ids, of shape
+            ``[batch_size * num_return_sequences, output_length]``.
+        """
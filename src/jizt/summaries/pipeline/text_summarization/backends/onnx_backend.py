@@ -0,0 +1,448 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""ONNX Runtime inference backend.
+
+This backend requires the ``onnxruntime`` package, which is not installed by
+default.
+"""
+
+__version__ = '0.1.2'
+
+import time
+import hashlib
+import logging
+import numpy as np
+import onnxruntime
+import torch
+import transformers
+from pathlib import Path
+from transformers import (BeamSearchScorer, GenerationConfig, T5Config,
+                          T5ForConditionalGeneration)
+from .backend_interface import SummarizationBackend
+from ..logits_processing import build_logits_processors
+from ..quantization import checkpoint_fingerprint
+from jizt.config import SUMM_MODEL_PATH, SUMM_ONNX_DIR
+from typing import Dict, List, Union
+
+logger = logging.getLogger("OnnxRuntimeBackend")
+
+ENCODER_FILE = "encoder.onnx"
+DECODER_INIT_FILE = "decoder_init.onnx"
+DECODER_WITH_PAST_FILE = "decoder_with_past.onnx"
+
+
+class _EncoderWrapper(torch.nn.Module):
+    """T5 encoder returning only its last hidden state (for export)."""
+
+    def __init__(self, model: T5ForConditionalGeneration):
+        super().__init__()
+        self.encoder = model.get_encoder()
+
+    def forward(self, input_ids, attention_mask):
+        return self.encoder(input_ids=input_ids,
+                            attention_mask=attention_mask).last_hidden_state
+
+
+class _DecoderWrapper(torch.nn.Module):
+    """T5 decoder and LM head with flattened inputs and outputs (for export).
+
+    Without past, the outputs are the logits followed by the self-attention
+    and cross-attention keys and values of each layer. With past, the cached
+    keys and values are passed as inputs, and only the new self-attention
+    keys and values are returned, since the cross-attention ones do not
+    change between steps.
+    """
+
+    def __init__(self, model: T5ForConditionalGeneration, with_past: bool):
+        super().__init__()
+        self.decoder = model.get_decoder()
+        self.lm_head = model.lm_head
+        self.config = model.config
+        self.with_past = with_past
+
+    def forward(self, decoder_input_ids, encoder_attention_mask,
+                encoder_hidden_states, *past):
+        past_key_values = None
+        if self.with_past:
+            past_key_values = tuple(tuple(past[4*i:4*i+4])
+                                    for i in range(len(past) // 4))
+        outputs = self.decoder(input_ids=decoder_input_ids,
+                               encoder_hidden_states=encoder_hidden_states,
+                               encoder_attention_mask=encoder_attention_mask,
+                               past_key_values=past_key_values,
+                               use_cache=True)
+        hidden_states = outputs.last_hidden_state
+        if self.config.tie_word_embeddings:
+            # Rescale output before projecting on vocab, as in T5
+            hidden_states = hidden_states * (self.config.d_model ** -0.5)
+        logits = self.lm_head(hidden_states)
+        present = []
+        for layer in outputs.past_key_values:
+            present.extend(layer[:2] if self.with_past else layer)
+        return (logits, *present)
+
+
+def _past_names(prefix: str, num_layers: int, with_cross: bool) -> List[str]:
+    """Names of the flattened past/present inputs or outputs."""
+    kinds = (("self_key", "self_value", "cross_key", "cross_value")
+             if with_cross else ("self_key", "self_value"))
+    return [f"{prefix}_{i}_{kind}"
+            for i in range(num_layers) for kind in kinds]
+
+
+def export_model(
+    model_path: Union[str, Path],
+    output_dir: Union[str, Path],
+    opset_version: int = 14
+):
+    """Export a T5 model to ONNX.
+
+    Three graphs are exported: the encoder, the decoder for the first step
+    (without past) and the decoder with past (KV cache).
+
+    Args:
+        model_path (:obj:`str` or :obj:`pathlib.Path`):
+            The path or name of the pretrained model.
+        output_dir (:obj:`str` or :obj:`pathlib.Path`):
+            The directory where the graphs are saved.
+        opset_version (:obj:`int`, `optional`, defaults to 14):
+            The ONNX opset version.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model = T5ForConditionalGeneration.from_pretrained(model_path).eval()
+    num_layers = model.config.num_decoder_layers
+    batch, src_len = 2, 8
+    input_ids = torch.ones((batch, src_len), dtype=torch.long)
+    attention_mask = torch.ones((batch, src_len), dtype=torch.long)
+    decoder_input_ids = torch.zeros((batch, 1), dtype=torch.long)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _EncoderWrapper(model),
+            (input_ids, attention_mask),
+            str(output_dir / ENCODER_FILE),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["encoder_hidden_states"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "src_len"},
+                          "attention_mask": {0: "batch", 1: "src_len"},
+                          "encoder_hidden_states": {0: "batch", 1: "src_len"}},
+            opset_version=opset_version
+        )
+        encoder_hidden_states = model.get_encoder()(
+            input_ids=input_ids, attention_mask=attention_mask
+        ).last_hidden_state
+
+        common_axes = {
+            "decoder_input_ids": {0: "batch"},
+            "encoder_attention_mask": {0: "batch", 1: "src_len"},
+            "encoder_hidden_states": {0: "batch", 1: "src_len"},
+            "logits": {0: "batch"},
+        }
+        present_names = _past_names("present", num_layers, with_cross=True)
+        init_decoder = _DecoderWrapper(model, with_past=False)
+        torch.onnx.export(
+            init_decoder,
+            (decoder_input_ids, attention_mask, encoder_hidden_states),
+            str(output_dir / DECODER_INIT_FILE),
+            input_names=["decoder_input_ids", "encoder_attention_mask",
+                         "encoder_hidden_states"],
+            output_names=["logits", *present_names],
+            dynamic_axes={**common_axes,
+                          **{name: {0: "batch", 2: "src_len" if "cross" in name
+                                    else "past_len"}
+                             for name in present_names}},
+            opset_version=opset_version
+        )
+
+        past = init_decoder(decoder_input_ids, attention_mask,
+                            encoder_hidden_states)[1:]
+        past_names = _past_names("past", num_layers, with_cross=True)
+        present_names = _past_names("present", num_layers, with_cross=False)
+        torch.onnx.export(
+            _DecoderWrapper(model, with_past=True),
+            (decoder_input_ids, attention_mask, encoder_hidden_states, *past),
+            str(output_dir / DECODER_WITH_PAST_FILE),
+            input_names=["decoder_input_ids", "encoder_attention_mask",
+                         "encoder_hidden_states", *past_names],
+            output_names=["logits", *present_names],
+            dynamic_axes={**common_axes,
+                          **{name: {0: "batch", 2: "src_len" if "cross" in name
+                                    else "past_len"}
+                             for name in past_names},
+                          **{name: {0: "batch", 2: "past_len_plus_one"}
+                             for name in present_names}},
+            opset_version=opset_version
+        )
+
+
+class OnnxRuntimeBackend(SummarizationBackend):
+    """ONNX Runtime backend.
+
+    The encoder and the decoder (with and without past) are exported to ONNX
+    the first time the backend is created, and they are run with the CPU
+    execution provider of ONNX Runtime. The export directory depends on the
+    checkpoint of the model (see :func:`quantization.checkpoint_fingerprint`),
+    so the model is exported again whenever it is replaced.
+
+    The generation runs a KV-cached decoding loop which supports the same
+    strategies as the PyTorch backend: greedy decoding, multinomial sampling,
+    beam-search decoding and beam-search multinomial sampling. As with the
+    PyTorch backend, a ``streamer`` can be passed when not using beam search,
+    and ``max_time`` bounds the generation time (in seconds).
+
+    Args:
+        model_path (:obj:`str` or :obj:`pathlib.Path`, `optional`, defaults to :obj:`jizt.config.SUMM_MODEL_PATH`):
+            The path or name of the pretrained model.
+        onnx_dir (:obj:`str` or :obj:`pathlib.Path`, `optional`, defaults to :obj:`jizt.config.SUMM_ONNX_DIR`):
+            The directory where the exported graphs are stored.
+    """
+
+    def __init__(
+        self,
+        model_path: Union[str, Path] = SUMM_MODEL_PATH,
+        onnx_dir: Union[str, Path] = SUMM_ONNX_DIR
+    ):
+        model_dir = self._export_dir(model_path, onnx_dir)
+        if not all((model_dir / f).is_file() for f in
+                   (ENCODER_FILE, DECODER_INIT_FILE, DECODER_WITH_PAST_FILE)):
+            logger.info("Exporting %s to ONNX in %s.", model_path, model_dir)
+            export_model(model_path, model_dir)
+
+        self._config = T5Config.from_pretrained(model_path)
+        self._generation_config = GenerationConfig.from_model_config(
+            self._config)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL)
+        providers = ["CPUExecutionProvider"]
+        self._encoder = onnxruntime.InferenceSession(
+            str(model_dir / ENCODER_FILE), options, providers=providers)
+        self._decoder_init = onnxruntime.InferenceSession(
+            str(model_dir / DECODER_INIT_FILE), options, providers=providers)
+        self._decoder_with_past = onnxruntime.InferenceSession(
+            str(model_dir / DECODER_WITH_PAST_FILE), options,
+            providers=providers)
+        self._num_layers = self._config.num_decoder_layers
+
+    @property
+    def generation_config(self) -> GenerationConfig:
+        """See base class."""
+        return self._generation_config
+
+    def generate(
+        self,
+        input_ids: torch.LongTensor,
+        attention_mask: torch.LongTensor,
+        **generation_params
+    ) -> torch.LongTensor:
+        """See base class."""
+        def param(name):
+            value = generation_params.get(name)
+            return (value if value is not None
+                    else getattr(self._generation_config, name))
+
+        num_beams = param("num_beams")
+        num_return_sequences = param("num_return_sequences")
+        do_sample = param("do_sample")
+        max_length = param("max_length")
+        max_time = generation_params.get("max_time")
+        streamer = generation_params.get("streamer")
+        start = time.monotonic()
+        batch_size = input_ids.shape[0]
+        eos_token_id = self._config.eos_token_id
+        pad_token_id = self._config.pad_token_id
+
+        encoder_hidden_states = self._encoder.run(None, {
+            "input_ids": input_ids.numpy(),
+            "attention_mask": attention_mask.numpy()
+        })[0]
+        # Each subdivision is expanded into several rows (beams or
+        # independent sequences)
+        expand_size = num_beams if num_beams > 1 else num_return_sequences
+        encoder_hidden_states = np.repeat(encoder_hidden_states, expand_size,
+                                          axis=0)
+        encoder_attention_mask = np.repeat(attention_mask.numpy(), expand_size,
+                                           axis=0)
+        decoder_ids = torch.full((batch_size * expand_size, 1),
+                                 self._config.decoder_start_token_id)
+        logits_processor, logits_warper = build_logits_processors(
+            generation_params, self._generation_config, eos_token_id)
+
+        outputs = self._decoder_init.run(None, {
+            "decoder_input_ids": decoder_ids.numpy(),
+            "encoder_attention_mask": encoder_attention_mask,
+            "encoder_hidden_states": encoder_hidden_states
+        })
+        logits = outputs[0]
+        self_past = [arr for i, arr in enumerate(outputs[1:]) if i % 4 < 2]
+        cross_past = [arr for i, arr in enumerate(outputs[1:]) if i % 4 >= 2]
+
+        if num_beams > 1:
+            beam_scorer = BeamSearchScorer(
+                batch_size=batch_size,
+                num_beams=num_beams,
+                device=torch.device("cpu"),
+                length_penalty=param("length_penalty"),
+                do_early_stopping=param("early_stopping"),
+                num_beam_hyps_to_keep=num_return_sequences,
+                max_length=max_length
+            )
+            beam_scores = torch.zeros((batch_size, num_beams))
+            if not do_sample:
+                # Only the first beam is considered at the first step, to
+                # avoid generating the same tokens in all the beams (when
+                # sampling, the beams already diverge)
+                beam_scores[:, 1:] = -1e9
+            beam_scores = beam_scores.view(-1)
+            decoder_prompt_len = decoder_ids.shape[-1]
+        else:
+            unfinished = torch.ones(decoder_ids.shape[0], dtype=torch.long)
+            if streamer is not None:
+                streamer.put(decoder_ids)
+
+        while True:
+            next_token_logits = torch.from_numpy(logits[:, -1, :]).float()
+            if num_beams > 1:
+                scores = torch.log_softmax(next_token_logits, dim=-1)
+                scores = logits_processor(decoder_ids, scores)
+                if do_sample:
+                    # As in the beam_sample method of Transformers 4.36, the
+                    # warpers are applied before adding the beam scores
+                    scores = logits_warper(decoder_ids, scores)
+                scores = scores + beam_scores[:, None]
+                vocab_size = scores.shape[-1]
+                scores = scores.view(batch_size, num_beams * vocab_size)
+                if do_sample:
+                    probs = torch.softmax(scores, dim=-1)
+                    next_tokens = torch.multinomial(probs,
+                                                    num_samples=2 * num_beams)
+                    next_scores = torch.gather(scores, -1, next_tokens)
+                    next_scores, indices = torch.sort(next_scores,
+                                                      descending=True, dim=1)
+                    next_tokens = torch.gather(next_tokens, -1, indices)
+                else:
+                    next_scores, next_tokens = torch.topk(
+                        scores, 2 * num_beams, dim=1, largest=True, sorted=True)
+                next_indices = torch.div(next_tokens, vocab_size,
+                                         rounding_mode="floor")
+                next_tokens = next_tokens % vocab_size
+                beam_outputs = beam_scorer.process(
+                    decoder_ids, next_scores, next_tokens, next_indices,
+                    pad_token_id=pad_token_id, eos_token_id=eos_token_id,
+                    decoder_prompt_len=decoder_prompt_len)
+                beam_scores = beam_outputs["next_beam_scores"]
+                beam_idx = beam_outputs["next_beam_indices"]
+                decoder_ids = torch.cat(
+                    [decoder_ids[beam_idx],
+                     beam_outputs["next_beam_tokens"].unsqueeze(-1)], dim=-1)
+                # Reorder the self-attention cache according to the beams
+                self_past = [np.take(arr, beam_idx.numpy(), axis=0)
+                             for arr in self_past]
+                finished = (beam_scorer.is_done
+                            or decoder_ids.shape[-1] >= max_length)
+            else:
+                scores = logits_processor(decoder_ids, next_token_logits)
+                if do_sample:
+                    scores = logits_warper(decoder_ids, scores)
+                    probs = torch.softmax(scores, dim=-1)
+                    next_tokens = torch.multinomial(probs,
+                                                    num_samples=1).squeeze(1)
+                else:
+                    next_tokens = torch.argmax(scores, dim=-1)
+                next_tokens = (next_tokens * unfinished
+                               + pad_token_id * (1 - unfinished))
+                decoder_ids = torch.cat([decoder_ids,
+                                         next_tokens.unsqueeze(-1)], dim=-1)
+                if streamer is not None:
+                    streamer.put(next_tokens)
+                unfinished = unfinished * (next_tokens != eos_token_id).long()
+                finished = (unfinished.max() == 0
+                            or decoder_ids.shape[-1] >= max_length)
+            if finished or (max_time is not None
+                            and time.monotonic() - start >= max_time):
+                break
+
+            outputs = self._decoder_with_past.run(None, {
+                "decoder_input_ids": decoder_ids[:, -1:].numpy(),
+                "encoder_attention_mask": encoder_attention_mask,
+                "encoder_hidden_states": encoder_hidden_states,
+                **self._past_feed(self_past, cross_past)
+            })
+            logits = outputs[0]
+            self_past = outputs[1:]
+
+        if streamer is not None:
+            streamer.end()
+        if num_beams > 1:
+            return beam_scorer.finalize(
+                decoder_ids, beam_scores, next_tokens, next_indices,
+                pad_token_id=pad_token_id, eos_token_id=eos_token_id,
+                max_length=max_length, decoder_prompt_len=decoder_prompt_len
+            )["sequences"]
+        return decoder_ids
+
+    @classmethod
+    def _export_dir(
+        cls,
+        model_path: Union[str, Path],
+        onnx_dir: Union[str, Path]
+    ) -> Path:
+        """Get the directory of the exported graphs of a model.
+
+        Its name depends on the model, its checkpoint and the versions of
+        PyTorch and Transformers, which carry out the export.
+
+        Args:
+            model_path (:obj:`str` or :obj:`pathlib.Path`):
+                The path or name of the pretrained model.
+            onnx_dir (:obj:`str` or :obj:`pathlib.Path`):
+                The directory where the exported graphs are stored.
+
+        Returns:
+            :obj:`pathlib.Path`: The directory of the graphs.
+        """
+        key = hashlib.sha256(
+            f"{model_path}{checkpoint_fingerprint(model_path)}"
+            f"{torch.__version__}{transformers.__version__}".encode()
+        ).hexdigest()[:16]
+        return Path(onnx_dir) / f"{Path(model_path).name}-{key}"
+
+    def _past_feed(
+        self,
+        self_past: List[np.ndarray],
+        cross_past: List[np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """Build the past inputs of the decoder with past.
+
+        Args:
+            self_past (:obj:`List[np.ndarray]`):
+                The self-attention keys and values of each layer.
+            cross_past (:obj:`List[np.ndarray]`):
+                The cross-attention keys and values of each layer.
+
+        Returns:
+            :obj:`Dict[str, np.ndarray]`: The inputs, by name.
+        """
+        feed = {}
+        for i in range(self._num_layers):
+            feed[f"past_{i}_self_key"] = self_past[2*i]
+            feed[f"past_{i}_self_value"] = self_past[2*i + 1]
+            feed[f"past_{i}_cross_key"] = cross_past[2*i]
+            feed[f"past_{i}_cross_value"] = cross_past[2*i + 1]
+        return feed
@@ -0,0 +1,153 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""PyTorch inference backend."""
+
+__version__ = '0.1.1'
+
+import logging
+import torch
+from pathlib import Path
+from torch.nn.utils.rnn import pad_sequence
+from transformers import GenerationConfig, T5ForConditionalGeneration
+from .backend_interface import SummarizationBackend
+from ..quantization import load_model
+from jizt.config import (LOG_LEVEL, SUMM_DRAFT_MODEL_PATH, SUMM_MODEL_PATH,
+                         SUMM_QUANTIZATION)
+from typing import Optional, Union
+
+
+class PyTorchBackend(SummarizationBackend):
+    """PyTorch backend.
+
+    The generation is carried out by the :meth:`generate` method of the
+    Hugging Face model.
+
+    If a draft model is specified, greedy decoding and sampling use assisted
+    (speculative) generation: the draft model, which must be a smaller model
+    sharing the vocabulary of the main one, proposes several tokens, and the
+    main model checks all of them in a single forward pass. With greedy
+    decoding, the output is the same as without the draft model. Since
+    assisted generation only supports one sequence at a time, the
+    subdivisions of a batch are generated one after the other.
+
+    Args:
+        model_path (:obj:`str` or :obj:`pathlib.Path`, `optional`, defaults to :obj:`jizt.config.SUMM_MODEL_PATH`):
+            The path or name of the pretrained model.
+        quantization (:obj:`str`, `optional`, defaults to :obj:`jizt.config.SUMM_QUANTIZATION`):
+            The quantization applied to the models. See
+            :func:`quantization.load_model`.
+        draft_model_path (:obj:`str` or :obj:`pathlib.Path`, `optional`, defaults to :obj:`jizt.config.SUMM_DRAFT_MODEL_PATH`):
+            The path or name of the pretrained draft model. If :obj:`None`,
+            assisted generation is disabled.
+        log_level (:obj:`int`, `optional`, defaults to :obj:`jizt.config.LOG_LEVEL`):
+            The log level.
+    """
+
+    def __init__(
+        self,
+        model_path: Union[str, Path] = SUMM_MODEL_PATH,
+        quantization: str = SUMM_QUANTIZATION,
+        draft_model_path: Optional[Union[str, Path]] = SUMM_DRAFT_MODEL_PATH,
+        log_level: int = LOG_LEVEL
+    ):
+        logging.basicConfig(
+            format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
+            level=log_level,
+            datefmt='%d/%m/%Y %I:%M:%S %p'
+        )
+        self.logger = logging.getLogger("PyTorchBackend")
+        self._model = load_model(model_path, quantization)
+        self._draft_model = None
+        if draft_model_path is not None:
+            self.logger.debug("Loading draft model %s.", draft_model_path)
+            self._draft_model = load_model(draft_model_path, quantization)
+
+    @property
+    def model(self) -> T5ForConditionalGeneration:
+        return self._model
+
+    @property
+    def draft_model(self) -> Optional[T5ForConditionalGeneration]:
+        return self._draft_model
+
+    @property
+    def generation_config(self) -> GenerationConfig:
+        """See base class."""
+        return self._model.generation_config
+
+    def generate(
+        self,
+        input_ids: torch.LongTensor,
+        attention_mask: torch.LongTensor,
+        **generation_params
+    ) -> torch.LongTensor:
+        """See base class."""
+        if self._supports_assisted_generation(generation_params):
+            return self._generate_assisted(input_ids, attention_mask,
+                                           **generation_params)
+        return self._model.generate(input_ids=input_ids,
+                                    attention_mask=attention_mask,
+                                    **generation_params)
+
+    def _supports_assisted_generation(self, generation_params: dict) -> bool:
+        """Check whether some generation params can use assisted generation.
+
+        Assisted generation is not supported by beam search nor with several
+        return sequences.
+
+        Args:
+            generation_params (:obj:`dict`):
+                The generation params.
+
+        Returns:
+            :obj:`bool`: Whether assisted generation can be used.
+        """
+        return (self._draft_model is not None
+                and generation_params.get("num_beams") in (None, 1)
+                and generation_params.get("num_return_sequences") in (None, 1))
+
+    def _generate_assisted(
+        self,
+        input_ids: torch.LongTensor,
+        attention_mask: torch.LongTensor,
+        **generation_params
+    ) -> torch.LongTensor:
+        """Generate with the draft model, one sequence at a time.
+
+        Args:
+            input_ids (:obj:`torch.LongTensor`):
+                The right-padded input ids, of shape ``(batch_size, length)``.
+            attention_mask (:obj:`torch.LongTensor`):
+                The attention mask of the input ids.
+            **generation_params:
+                The generation params.
+
+        Returns:
+            :obj:`torch.LongTensor`: The generated ids, right-padded with the
+            pad token.
+        """
+        outputs = []
+        for ids, mask in zip(input_ids, attention_mask):
+            ids = ids[mask.bool()].unsqueeze(0)
+            output = self._model.generate(input_ids=ids,
+                                          attention_mask=torch.ones_like(ids),
+                                          assistant_model=self._draft_model,
+                                          **generation_params)
+            outputs.append(output[0])
+        return pad_sequence(outputs, batch_first=True,
+                            padding_value=self._model.config.pad_token_id)
@@ -0,0 +1,249 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Dynamic micro-batching of subdivisions across concurrent requests."""
+
+__version__ = '0.1.2'
+
+import time
+import logging
+import threading
+import torch
+from concurrent.futures import Future
+from jizt.config import (LOG_LEVEL, SUMM_MAX_BATCH_SIZE, SUMM_BATCH_MAX_WAIT,
+                         SUMM_BATCH_BUCKET_WIDTH)
+from typing import Any, Callable, Dict, Hashable, List, Tuple, Union
+
+
+class _PendingSubdivision:
+    """A subdivision waiting to be summarized.
+
+    Attributes:
+        input_ids (:obj:`torch.LongTensor`):
+            The (one-dimensional) ids of the subdivision.
+        future (:obj:`concurrent.futures.Future`):
+            The future through which the summary of the subdivision is
+            returned to the request that submitted it.
+        enqueued_at (:obj:`float`):
+            The (monotonic) time when the subdivision was submitted.
+    """
+
+    __slots__ = ("input_ids", "future", "enqueued_at")
+
+    def __init__(self, input_ids: torch.LongTensor):
+        self.input_ids = input_ids
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class BatchScheduler:
+    """Dynamic micro-batching scheduler.
+
+    Summarization requests are processed concurrently in different threads.
+    Instead of each of them calling the model on its own, the requests submit
+    their subdivisions to this scheduler, which collects the subdivisions of
+    all in-flight requests and summarizes them together in micro-batches.
+
+    Only subdivisions with the same generation parameters (number of beams,
+    sampling, lengths, etc.) can be batched together, and each batch is
+    generated with exactly the parameters of its subdivisions. Besides,
+    subdivisions are grouped in buckets according to their length, so that
+    the padding added to each batch is limited.
+
+    A batch is flushed as soon as it is full, i.e., it contains
+    :obj:`max_batch_size` subdivisions, or its oldest subdivision has been
+    waiting for :obj:`max_wait` seconds. Groups which have waited that long
+    are served before full ones, so that they are not starved under load.
+
+    Args:
+        generate_fn (:obj:`Callable[..., List[str]]`):
+            The function in charge of summarizing a batch of subdivisions,
+            e.g., :meth:`Summarizer._generate_batch`. It receives the list of
+            subdivisions and the generation parameters as keyword arguments,
+            and returns the summary of each subdivision.
+        max_batch_size (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_MAX_BATCH_SIZE`):
+            The maximum number of subdivisions in a batch.
+        max_wait (:obj:`float`, `optional`, defaults to :obj:`jizt.config.SUMM_BATCH_MAX_WAIT`):
+            The maximum time, in seconds, that a subdivision waits for its
+            batch to be filled.
+        bucket_width (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_BATCH_BUCKET_WIDTH`):
+            The width, in number of tokens, of the length buckets.
+    """
+
+    def __init__(
+        self,
+        generate_fn: Callable[..., List[str]],
+        max_batch_size: int = SUMM_MAX_BATCH_SIZE,
+        max_wait: float = SUMM_BATCH_MAX_WAIT,
+        bucket_width: int = SUMM_BATCH_BUCKET_WIDTH,
+        log_level: int = LOG_LEVEL
+    ):
+        self._generate_fn = generate_fn
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._bucket_width = max(1, bucket_width)
+        # Pending subdivisions grouped by (generation params, length bucket)
+        self._groups: Dict[Tuple[Hashable, int], List[_PendingSubdivision]] = {}
+        self._group_params: Dict[Tuple[Hashable, int], Dict[str, Any]] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        logging.basicConfig(
+            format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
+            level=log_level,
+            datefmt='%d/%m/%Y %I:%M:%S %p'
+        )
+        self.logger = logging.getLogger("BatchScheduler")
+        self._worker = threading.Thread(target=self._run,
+                                        name="BatchScheduler",
+                                        daemon=True)
+        self._worker.start()
+
+    def submit(
+        self,
+        input_ids: List[Union[List[int], torch.LongTensor]],
+        **generation_params
+    ) -> List[Future]:
+        """Submit subdivisions to be summarized.
+
+        Args:
+            input_ids (:obj:`List[List[int]]` or :obj:`List[torch.LongTensor]`):
+                The subdivisions to summarize.
+            generation_params:
+                The parameters passed to :obj:`generate_fn`.
+
+        Returns:
+            :obj:`List[concurrent.futures.Future]`: One future per subdivision,
+            which will hold the summary of that subdivision.
+        """
+        params_key = self._params_key(generation_params)
+        pending = [_PendingSubdivision(torch.as_tensor(ids).view(-1))
+                   for ids in input_ids]
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The scheduler has been closed.")
+            for subdiv in pending:
+                key = (params_key, len(subdiv.input_ids) // self._bucket_width)
+                if key not in self._groups:
+                    self._groups[key] = []
+                    self._group_params[key] = generation_params
+                self._groups[key].append(subdiv)
+            self._condition.notify()
+        return [subdiv.future for subdiv in pending]
+
+    def close(self):
+        """Stop the scheduler once all the pending subdivisions are summarized."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._worker.join()
+
+    def _run(self):
+        """Flush batches as they become ready."""
+        while True:
+            with self._condition:
+                batch = self._pop_ready_batch()
+                while batch is None:
+                    if self._closed and not self._groups:
+                        return
+                    self._condition.wait(timeout=self._time_to_next_flush())
+                    batch = self._pop_ready_batch()
+            params, subdivs = batch
+            self.logger.debug("Flushing batch of %d subdivision(s).",
+                              len(subdivs))
+            try:
+                summaries = self._generate_fn(
+                    [subdiv.input_ids for subdiv in subdivs],
+                    **params
+                )
+            except Exception as exc:  # pylint: disable=broad-except
+                self.logger.exception("Batch generation failed.")
+                for subdiv in subdivs:
+                    subdiv.future.set_exception(exc)
+            else:
+                for subdiv, summary in zip(subdivs, summaries):
+                    subdiv.future.set_result(summary)
+
+    def _pop_ready_batch(
+        self
+    ) -> Union[Tuple[Dict[str, Any], List[_PendingSubdivision]], None]:
+        """Remove and return the next batch ready to be flushed.
+
+        The group with the subdivision that has been waiting the longest is
+        flushed first if that wait exceeds :attr:`max_wait` (or the scheduler
+        is being closed). Otherwise, a full group is flushed, if any.
+
+        Must be called with :attr:`_condition` acquired.
+
+        Returns:
+            :obj:`Tuple[Dict[str, Any], List[_PendingSubdivision]]`: The
+            generation parameters and the subdivisions of the batch, or
+            :obj:`None` if no batch is ready yet.
+        """
+        if not self._groups:
+            return None
+        oldest_key = min(self._groups,
+                         key=lambda k: self._groups[k][0].enqueued_at)
+        waited = time.monotonic() - self._groups[oldest_key][0].enqueued_at
+        if waited >= self._max_wait or self._closed:
+            ready_key = oldest_key
+        else:
+            ready_key = next((key for key, group in self._groups.items()
+                              if len(group) >= self._max_batch_size), None)
+        if ready_key is None:
+            return None
+        group = self._groups[ready_key]
+        subdivs = group[:self._max_batch_size]
+        params = self._group_params[ready_key]
+        del group[:self._max_batch_size]
+        if not group:
+            del self._groups[ready_key]
+            del self._group_params[ready_key]
+        return params, subdivs
+
+    def _time_to_next_flush(self) -> Union[float, None]:
+        """Seconds until the oldest pending subdivision reaches the max. wait.
+
+        Must be called with :attr:`_condition` acquired.
+
+        Returns:
+            :obj:`float` or :obj:`None`: The time to wait, or :obj:`None` if
+            there are no pending subdivisions (wait until notified).
+        """
+        if not self._groups:
+            return None
+        oldest = min(group[0].enqueued_at for group in self._groups.values())
+        return max(0.0, self._max_wait - (time.monotonic() - oldest))
+
+    @classmethod
+    def _params_key(cls, generation_params: Dict[str, Any]) -> Hashable:
+        """Get a hashable key identifying a set of generation parameters.
+
+        Args:
+            generation_params (:obj:`Dict[str, Any]`):
+                The generation parameters.
+
+        Returns:
+            :obj:`Hashable`: The key. Two sets of parameters are compatible,
+            i.e., their subdivisions can be batched together, if and only if
+            they have the same key.
+        """
+        def freeze(value):
+            if isinstance(value, (list, tuple)):
+                return tuple(freeze(v) for v in value)
+            return value
+        return tuple(sorted((name, freeze(value))
+                            for name, value in generation_params.items()))
@@ -0,0 +1,421 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Continuous (iteration-level) batching generation engine for T5."""
+
+__version__ = '0.1.0'
+
+import logging
+import threading
+import torch
+from collections import deque
+from concurrent.futures import Future
+from transformers import T5ForConditionalGeneration, PreTrainedTokenizerBase
+from .logits_processing import build_logits_processors
+from jizt.config import LOG_LEVEL, SUMM_MAX_BATCH_SIZE
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Past key values of a single sequence: one (self_key, self_value, cross_key,
+# cross_value) tuple per decoder layer
+PastKeyValues = Tuple[Tuple[torch.Tensor, ...], ...]
+
+
+class _Sequence:
+    """A subdivision being summarized by the engine.
+
+    Attributes:
+        future (:obj:`concurrent.futures.Future`):
+            The future through which the summary is returned.
+        input_ids (:obj:`torch.LongTensor`):
+            The (one-dimensional) ids of the subdivision.
+        encoder_hidden_states (:obj:`torch.FloatTensor`):
+            The output of the encoder, of shape ``[1, input_length, d_model]``.
+        decoder_ids (:obj:`List[int]`):
+            The decoder start token followed by the generated tokens.
+        past (:obj:`PastKeyValues`):
+            The decoder cache, without padding.
+        params (:obj:`Dict[str, Any]`):
+            The generation and decoding parameters.
+        logits_processor (:obj:`transformers.LogitsProcessorList`):
+            The processors applied to the logits at each step.
+        logits_warper (:obj:`transformers.LogitsProcessorList`):
+            The warpers applied to the logits when sampling.
+    """
+
+    __slots__ = ("future", "input_ids", "encoder_hidden_states", "decoder_ids",
+                 "past", "params", "logits_processor", "logits_warper")
+
+    def __init__(self, input_ids: torch.LongTensor, params: Dict[str, Any]):
+        self.future = Future()
+        self.input_ids = input_ids
+        self.encoder_hidden_states = None
+        self.decoder_ids = []
+        self.past = None
+        self.params = params
+        self.logits_processor = None
+        self.logits_warper = None
+
+
+class ContinuousBatchingEngine:
+    """Generation engine with continuous (iteration-level) batching.
+
+    With request-level batching, a batch is held by the model until its
+    longest sequence is finished, while other subdivisions wait in the queue.
+    This engine instead schedules the generation at token granularity:
+
+    1. When a subdivision joins the engine, the T5 encoder is run once over it
+       and the first decoding step is performed (prefill).
+    2. At each iteration, one decoding step is performed for all the active
+       sequences at once, reusing the cached keys and values of each of them.
+    3. Finished sequences leave the batch immediately, and waiting
+       subdivisions take their place in the next iteration.
+
+    Sequences of different lengths are batched by left-padding their
+    self-attention caches and right-padding their encoder outputs. Since T5
+    uses relative position biases, left-padding does not alter the positions
+    seen by the model.
+
+    Only greedy decoding and multinomial sampling are supported. Beam search
+    keeps several hypotheses per sequence and must be run through the static
+    engine instead (see :meth:`supports`).
+
+    Args:
+        model (:obj:`transformers.T5ForConditionalGeneration`):
+            The summarization model.
+        tokenizer (:obj:`transformers.PreTrainedTokenizerBase`):
+            The tokenizer used to decode the generated ids.
+        max_batch_size (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_MAX_BATCH_SIZE`):
+            The maximum number of sequences decoded at the same time.
+    """
+
+    def __init__(
+        self,
+        model: T5ForConditionalGeneration,
+        tokenizer: PreTrainedTokenizerBase,
+        max_batch_size: int = SUMM_MAX_BATCH_SIZE,
+        log_level: int = LOG_LEVEL
+    ):
+        self._model = model
+        self._tokenizer = tokenizer
+        self._max_batch_size = max_batch_size
+        self._waiting = deque()
+        self._active: List[_Sequence] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        logging.basicConfig(
+            format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
+            level=log_level,
+            datefmt='%d/%m/%Y %I:%M:%S %p'
+        )
+        self.logger = logging.getLogger("ContinuousBatchingEngine")
+        self._worker = threading.Thread(target=self._run,
+                                        name="ContinuousBatchingEngine",
+                                        daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def supports(cls, generation_params: Dict[str, Any]) -> bool:
+        """Check whether the engine supports some generation parameters.
+
+        Args:
+            generation_params (:obj:`Dict[str, Any]`):
+                The generation parameters (see :meth:`Summarizer.summarize`).
+
+        Returns:
+            :obj:`bool`: Whether the engine can generate with those parameters,
+            i.e., no beam search and one returned sequence per subdivision.
+        """
+        return (generation_params.get("num_beams") in (None, 1)
+                and generation_params.get("num_return_sequences") in (None, 1))
+
+    def submit(
+        self,
+        input_ids: List[Union[List[int], torch.LongTensor]],
+        **generation_params
+    ) -> List[Future]:
+        """Submit subdivisions to be summarized.
+
+        Args:
+            input_ids (:obj:`List[List[int]]` or :obj:`List[torch.LongTensor]`):
+                The subdivisions to summarize.
+            generation_params:
+                The generation and decoding parameters. See
+                :meth:`Summarizer.summarize`.
+
+        Returns:
+            :obj:`List[concurrent.futures.Future]`: One future per subdivision,
+            which will hold the summary of that subdivision.
+
+        Raises:
+            :class:`ValueError`: If the parameters are not supported by the
+            engine.
+        """
+        if not self.supports(generation_params):
+            raise ValueError("Beam search and multiple return sequences are "
+                             "not supported by the continuous engine.")
+        sequences = [_Sequence(torch.as_tensor(ids).view(-1), generation_params)
+                     for ids in input_ids]
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The engine has been closed.")
+            self._waiting.extend(sequences)
+            self._condition.notify()
+        return [seq.future for seq in sequences]
+
+    def close(self):
+        """Stop the engine once all the submitted subdivisions are summarized."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._worker.join()
+
+    def _run(self):
+        """Generation loop."""
+        while True:
+            with self._condition:
+                while not self._waiting and not self._active:
+                    if self._closed:
+                        return
+                    self._condition.wait()
+                joining = []
+                while (self._waiting and len(self._active) + len(joining)
+                        < self._max_batch_size):
+                    joining.append(self._waiting.popleft())
+            with torch.inference_mode():
+                if joining:
+                    self._step(joining, self._prefill)
+                if self._active:
+                    self._step(list(self._active), self._decode)
+
+    def _step(self, sequences: List[_Sequence], step_fn):
+        """Run a generation step and update the set of active sequences.
+
+        Args:
+            sequences (:obj:`List[_Sequence]`):
+                The sequences involved in the step.
+            step_fn (:obj:`Callable[[List[_Sequence]], None]`):
+                Either :meth:`_prefill` or :meth:`_decode`.
+        """
+        try:
+            step_fn(sequences)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.logger.exception("Generation step failed.")
+            for seq in sequences:
+                if seq in self._active:
+                    self._active.remove(seq)
+                seq.future.set_exception(exc)
+            return
+        for seq in sequences:
+            finished = self._is_finished(seq)
+            if finished and seq in self._active:
+                self._active.remove(seq)
+            elif not finished and seq not in self._active:
+                self._active.append(seq)
+            if finished:
+                seq.future.set_result(self._tokenizer.decode(
+                    seq.decoder_ids,
+                    skip_special_tokens=seq.params.get("skip_special_tokens", True),
+                    clean_up_tokenization_spaces=seq.params.get(
+                        "clean_up_tokenization_spaces", True)
+                ))
+
+    def _prefill(self, sequences: List[_Sequence]):
+        """Encode new sequences and perform their first decoding step.
+
+        Args:
+            sequences (:obj:`List[_Sequence]`):
+                The sequences joining the engine.
+        """
+        lengths = [len(seq.input_ids) for seq in sequences]
+        input_ids = torch.nn.utils.rnn.pad_sequence(
+            [seq.input_ids for seq in sequences],
+            batch_first=True,
+            padding_value=self._tokenizer.pad_token_id
+        )
+        attention_mask = self._length_mask(lengths, input_ids.shape[1])
+        encoder_hidden_states = self._model.get_encoder()(
+            input_ids=input_ids,
+            attention_mask=attention_mask
+        ).last_hidden_state
+        start_token_id = self._model.config.decoder_start_token_id
+        outputs = self._model(
+            encoder_outputs=(encoder_hidden_states,),
+            attention_mask=attention_mask,
+            decoder_input_ids=torch.full((len(sequences), 1), start_token_id),
+            use_cache=True
+        )
+        for i, seq in enumerate(sequences):
+            seq.encoder_hidden_states = encoder_hidden_states[i:i+1, :lengths[i]]
+            seq.past = tuple(
+                (self_k[i:i+1], self_v[i:i+1],
+                 cross_k[i:i+1, :, :lengths[i]], cross_v[i:i+1, :, :lengths[i]])
+                for self_k, self_v, cross_k, cross_v in outputs.past_key_values
+            )
+            seq.decoder_ids = [start_token_id]
+            seq.logits_processor, seq.logits_warper = build_logits_processors(
+                seq.params,
+                self._model.generation_config,
+                self._tokenizer.eos_token_id
+            )
+        self._append_next_tokens(sequences, outputs.logits[:, -1, :])
+
+    def _decode(self, sequences: List[_Sequence]):
+        """Perform one decoding step for all the active sequences.
+
+        Args:
+            sequences (:obj:`List[_Sequence]`):
+                The active sequences.
+        """
+        past_lengths = [len(seq.decoder_ids) - 1 for seq in sequences]
+        encoder_lengths = [seq.encoder_hidden_states.shape[1]
+                           for seq in sequences]
+        max_past = max(past_lengths)
+        max_encoder = max(encoder_lengths)
+
+        # Left-pad the self-attention caches and right-pad the cross-attention
+        # caches and encoder outputs
+        past_key_values = []
+        for layer in range(len(sequences[0].past)):
+            self_k, self_v = (
+                torch.cat([self._pad(seq.past[layer][j], max_past, left=True)
+                           for seq in sequences])
+                for j in (0, 1)
+            )
+            cross_k, cross_v = (
+                torch.cat([self._pad(seq.past[layer][j], max_encoder, left=False)
+                           for seq in sequences])
+                for j in (2, 3)
+            )
+            past_key_values.append((self_k, self_v, cross_k, cross_v))
+        encoder_hidden_states = torch.cat([
+            torch.nn.functional.pad(seq.encoder_hidden_states,
+                                    (0, 0, 0, max_encoder - length))
+            for seq, length in zip(sequences, encoder_lengths)
+        ])
+        encoder_attention_mask = self._length_mask(encoder_lengths, max_encoder)
+        decoder_attention_mask = torch.flip(
+            self._length_mask([p + 1 for p in past_lengths], max_past + 1),
+            dims=[1]
+        )
+
+        outputs = self._model(
+            encoder_outputs=(encoder_hidden_states,),
+            attention_mask=encoder_attention_mask,
+            decoder_input_ids=torch.tensor([[seq.decoder_ids[-1]]
+                                            for seq in sequences]),
+            decoder_attention_mask=decoder_attention_mask,
+            past_key_values=tuple(past_key_values),
+            use_cache=True
+        )
+        for i, seq in enumerate(sequences):
+            # Remove the padding, keeping the new key/value of this step
+            start = max_past - past_lengths[i]
+            seq.past = tuple(
+                (self_k[i:i+1, :, start:], self_v[i:i+1, :, start:],
+                 seq.past[layer][2], seq.past[layer][3])
+                for layer, (self_k, self_v, _, _)
+                in enumerate(outputs.past_key_values)
+            )
+        self._append_next_tokens(sequences, outputs.logits[:, -1, :])
+
+    def _append_next_tokens(
+        self,
+        sequences: List[_Sequence],
+        logits: torch.FloatTensor
+    ):
+        """Choose the next token of each sequence.
+
+        The logits processors are applied row by row, since each sequence has
+        its own length and generation parameters.
+
+        Args:
+            sequences (:obj:`List[_Sequence]`):
+                The sequences.
+            logits (:obj:`torch.FloatTensor`):
+                The logits of the last step, of shape
+                ``[len(sequences), vocab_size]``.
+        """
+        for i, seq in enumerate(sequences):
+            decoder_ids = torch.tensor([seq.decoder_ids])
+            scores = seq.logits_processor(decoder_ids, logits[i:i+1].float())
+            if seq.params.get("do_sample"):
+                scores = seq.logits_warper(decoder_ids, scores)
+                probs = torch.softmax(scores, dim=-1)
+                next_token = torch.multinomial(probs, num_samples=1).item()
+            else:
+                next_token = torch.argmax(scores, dim=-1).item()
+            seq.decoder_ids.append(next_token)
+
+    def _is_finished(self, seq: _Sequence) -> bool:
+        """Check whether a sequence has finished.
+
+        Args:
+            seq (:obj:`_Sequence`):
+                The sequence.
+
+        Returns:
+            :obj:`bool`: Whether the EOS token has been generated or the
+            maximum length has been reached.
+        """
+        max_length = (seq.params.get("max_length")
+                      or self._model.generation_config.max_length)
+        return (seq.decoder_ids[-1] == self._tokenizer.eos_token_id
+                or len(seq.decoder_ids) >= max_length)
+
+    @classmethod
+    def _pad(cls, tensor: torch.Tensor, length: int, left: bool) -> torch.Tensor:
+        """Zero-pad a ``[batch, heads, seq_len, dim]`` tensor along ``seq_len``.
+
+        Args:
+            tensor (:obj:`torch.Tensor`):
+                The tensor to pad.
+            length (:obj:`int`):
+                The length after padding.
+            left (:obj:`bool`):
+                Whether to pad on the left or on the right.
+
+        Returns:
+            :obj:`torch.Tensor`: The padded tensor.
+        """
+        pad = length - tensor.shape[2]
+        if pad == 0:
+            return tensor
+        padding = (0, 0, pad, 0) if left else (0, 0, 0, pad)
+        return torch.nn.functional.pad(tensor, padding)
+
+    @classmethod
+    def _length_mask(
+        cls,
+        lengths: List[int],
+        max_length: Optional[int] = None
+    ) -> torch.LongTensor:
+        """Build a right-padded attention mask from the sequence lengths.
+
+        Args:
+            lengths (:obj:`List[int]`):
+                The length of each sequence.
+            max_length (:obj:`int`, `optional`):
+                The length of the mask. Defaults to the maximum length.
+
+        Returns:
+            :obj:`torch.LongTensor`: The mask, of shape
+            ``[len(lengths), max_length]``.
+        """
+        lengths = torch.tensor(lengths)
+        max_length = int(lengths.max()) if max_length is None else max_length
+        return (torch.arange(max_length).unsqueeze(0)
+                < lengths.unsqueeze(1)).long()
@@ -0,0 +1,82 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Extractive summarization, used as a cheap fallback."""
+
+__version__ = '0.1.1'
+
+import re
+from collections import Counter
+from typing import List, Optional
+
+# Words shorter than this are ignored when scoring the sentences, which
+# roughly filters out stop words
+MIN_WORD_LENGTH = 4
+
+# Words are runs of letters in any script (i.e., word characters other than
+# digits and underscores)
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def extractive_summarize(
+    sentences: List[str],
+    relative_max_length: Optional[float] = 0.4,
+    **kwargs
+) -> str:
+    """Summarize a text by selecting its most relevant sentences.
+
+    The sentences are scored with the average frequency of their words in the
+    whole text, and the best ones are selected until the summary reaches
+    :obj:`relative_max_length` times the number of words of the text. The
+    selected sentences keep their original order.
+
+    This is much cheaper than generating an abstractive summary, since it does
+    not involve the model at all.
+
+    Args:
+        sentences (:obj:`List[str]`):
+            The sentences of the text.
+        relative_max_length (:obj:`float`, `optional`, defaults to 0.4):
+            The maximum length of the summary, relative to the length of the
+            text (in words).
+        **kwargs:
+            Ignored. Allows passing the same params as to
+            :meth:`Summarizer.summarize`.
+
+    Returns:
+        :obj:`str`: The summary. It contains at least one sentence.
+    """
+    if not sentences:
+        return ""
+    words = [_WORD_RE.findall(sentence.lower()) for sentence in sentences]
+    frequencies = Counter(word for sentence_words in words
+                          for word in sentence_words
+                          if len(word) >= MIN_WORD_LENGTH)
+
+    def score(i):
+        relevant = [frequencies[word] for word in words[i]
+                    if len(word) >= MIN_WORD_LENGTH]
+        return sum(relevant) / len(relevant) if relevant else 0
+
+    max_words = (relative_max_length or 0.4) * sum(len(w) for w in words)
+    selected, length = [], 0
+    for i in sorted(range(len(sentences)), key=score, reverse=True):
+        if selected and length + len(words[i]) > max_words:
+            continue
+        selected.append(i)
+        length += len(words[i])
+    return " ".join(sentences[i] for i in sorted(selected))
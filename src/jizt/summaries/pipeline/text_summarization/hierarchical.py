@@ -0,0 +1,239 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Hierarchical (map-reduce) summarization of long documents."""
+
+__version__ = '0.1.3'
+
+import os
+import time
+import logging
+import multiprocessing
+import torch
+# Registers the reductions which pass tensors between processes through
+# shared memory
+import torch.multiprocessing  # noqa: F401
+from concurrent.futures import ProcessPoolExecutor
+from ..text_encoding.encoding import SplitterEncoder
+from ..text_encoding.subdivision_buffer import SubdivisionBuffer
+from .summarization import Summarizer
+from jizt.config import (LOG_LEVEL, SUMM_MAX_BATCH_SIZE,
+                         SUMM_HIERARCHICAL_WORKERS,
+                         SUMM_HIERARCHICAL_TARGET_LENGTH,
+                         SUMM_HIERARCHICAL_MAX_LEVELS)
+from typing import Any, Callable, Dict, List, Optional, Union
+
+# Summarizer of each worker process
+_worker_summarizer = None
+
+
+def _init_worker(num_threads: int):
+    """Load the summarizer of a worker process.
+
+    Args:
+        num_threads (:obj:`int`):
+            The number of threads used by PyTorch in the worker, so that the
+            workers do not compete for the same cores.
+    """
+    global _worker_summarizer
+    torch.set_num_threads(num_threads)
+    _worker_summarizer = Summarizer(batch_scheduling=False,
+                                    generation_engine="static")
+
+
+def _summarize_chunk(
+    input_ids: SubdivisionBuffer,
+    params: Dict[str, Any]
+) -> List[str]:
+    """Summarize a chunk of subdivisions in a worker process.
+
+    Args:
+        input_ids (:obj:`SubdivisionBuffer`):
+            The subdivisions.
+        params (:obj:`Dict[str, Any]`):
+            The params passed to :meth:`Summarizer.summarize_subdivisions`.
+
+    Returns:
+        :obj:`List[str]`: The summary of each of the subdivisions.
+    """
+    return _worker_summarizer.summarize_subdivisions(input_ids, **params)
+
+
+class HierarchicalSummarizer:
+    """Map-reduce summarizer for very long documents.
+
+    In the map stage, the subdivisions of the text are summarized in parallel
+    across a pool of worker processes, each of them with its own
+    :class:`Summarizer`. In the reduce stage, the partial summaries are joined,
+    re-encoded with :class:`SplitterEncoder`, and summarized again. The reduce
+    stage is repeated until the summary is at most :obj:`target_length`
+    tokens long, it fits in a single subdivision, or :obj:`max_levels` levels
+    have been run. This bounds both the length of the output and the
+    sequential work for huge inputs.
+
+    The worker processes are started the first time they are needed.
+
+    Args:
+        encoder (:obj:`SplitterEncoder`):
+            The encoder used to re-encode the partial summaries.
+        max_workers (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_HIERARCHICAL_WORKERS`):
+            The number of worker processes.
+        target_length (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_HIERARCHICAL_TARGET_LENGTH`):
+            The maximum length of the summary, in tokens.
+        max_levels (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_HIERARCHICAL_MAX_LEVELS`):
+            The maximum number of levels (map stage included).
+        chunk_size (:obj:`int`, `optional`, defaults to :obj:`jizt.config.SUMM_MAX_BATCH_SIZE`):
+            The number of subdivisions sent to a worker at once.
+        log_level (:obj:`int`, `optional`, defaults to :obj:`jizt.config.LOG_LEVEL`):
+            The log level.
+    """
+
+    def __init__(
+        self,
+        encoder: SplitterEncoder,
+        max_workers: int = SUMM_HIERARCHICAL_WORKERS,
+        target_length: int = SUMM_HIERARCHICAL_TARGET_LENGTH,
+        max_levels: int = SUMM_HIERARCHICAL_MAX_LEVELS,
+        chunk_size: int = SUMM_MAX_BATCH_SIZE,
+        log_level: int = LOG_LEVEL
+    ):
+        if max_workers < 1:
+            raise ValueError(f'max_workers must be at least 1 '
+                             f'(got {max_workers}).')
+        if max_levels < 1:
+            raise ValueError(f'max_levels must be at least 1 '
+                             f'(got {max_levels}).')
+        self._encoder = encoder
+        self._max_workers = max_workers
+        self._target_length = target_length
+        self._max_levels = max_levels
+        self._chunk_size = chunk_size
+        self._pool = None
+        logging.basicConfig(
+            format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
+            level=log_level,
+            datefmt='%d/%m/%Y %I:%M:%S %p'
+        )
+        self.logger = logging.getLogger("HierarchicalSummarizer")
+
+    @property
+    def max_levels(self):
+        return self._max_levels
+
+    def summarize(
+        self,
+        input_ids: Union[SubdivisionBuffer, List[List[int]],
+                         List[torch.LongTensor]],
+        level_callback: Optional[Callable[[int, int], None]] = None,
+        **params
+    ) -> str:
+        """Generate a summary from the encoded tokens (input_ids).
+
+        Args:
+            input_ids (:obj:`SubdivisionBuffer`, :obj:`List[List[int]]` or :obj:`List[torch.LongTensor]`):
+                The sequence subdivisions.
+            level_callback (:obj:`Callable[[int, int], None]`, `optional`):
+                Function called before each level is summarized, with the
+                level (starting at 0 for the map stage) and its number of
+                subdivisions.
+            **params:
+                The params passed to :meth:`Summarizer.summarize_subdivisions`.
+                If they include a ``deadline``, no more levels are run once it
+                is reached. The ``deadline_callback`` (if any) is called by
+                this summarizer, since it cannot be passed to the workers.
+
+        Returns:
+            :obj:`str`: The generated summary.
+        """
+        params = dict(params)
+        deadline = params.get("deadline")
+        deadline_callback = params.pop("deadline_callback", None)
+        level = 0
+        while True:
+            if level_callback is not None:
+                level_callback(level, len(input_ids))
+            self.logger.debug("Summarizing level %d (%d subdivisions).",
+                              level, len(input_ids))
+            summary_subdivs = self._map(input_ids, params)
+            if (deadline_callback is not None
+                    and len(summary_subdivs) < len(input_ids)):
+                deadline_callback(len(input_ids) - len(summary_subdivs))
+            summary = " ".join(summary_subdivs)
+            level += 1
+            if (len(input_ids) == 1 or level == self._max_levels
+                    or (deadline is not None
+                        and time.monotonic() >= deadline)):
+                return summary
+            next_input_ids = self._encoder.encode(summary)
+            summary_length = next_input_ids.ids.numel()
+            if (summary_length <= self._target_length
+                    or len(next_input_ids) >= len(input_ids)):
+                return summary
+            input_ids = next_input_ids
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _map(
+        self,
+        input_ids: Union[SubdivisionBuffer, List[List[int]],
+                         List[torch.LongTensor]],
+        params: Dict[str, Any]
+    ) -> List[str]:
+        """Summarize the subdivisions of a level across the worker processes.
+
+        The subdivisions are moved to shared memory, so that the chunks sent
+        to the workers are views of the same buffer rather than copies.
+
+        Args:
+            input_ids (:obj:`SubdivisionBuffer`, :obj:`List[List[int]]` or :obj:`List[torch.LongTensor]`):
+                The subdivisions.
+            params (:obj:`Dict[str, Any]`):
+                The params passed to :meth:`Summarizer.summarize_subdivisions`.
+
+        Returns:
+            :obj:`List[str]`: The summary of each of the subdivisions. If the
+            deadline is reached, the skipped subdivisions are left out.
+        """
+        input_ids = SubdivisionBuffer.from_sequences(input_ids).share_memory_()
+        chunks = [input_ids[i:i + self._chunk_size]
+                  for i in range(0, len(input_ids), self._chunk_size)]
+        futures = [self._get_pool().submit(_summarize_chunk, chunk, params)
+                   for chunk in chunks]
+        return [summary for future in futures for summary in future.result()]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Get the pool of worker processes, starting it if necessary.
+
+        The workers are spawned rather than forked, since forking a process
+        that has already used PyTorch can deadlock.
+
+        Returns:
+            :obj:`concurrent.futures.ProcessPoolExecutor`: The pool.
+        """
+        if self._pool is None:
+            num_threads = max(1, (os.cpu_count() or 1) // self._max_workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(num_threads,)
+            )
+        return self._pool
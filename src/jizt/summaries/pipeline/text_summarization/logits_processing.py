@@ -0,0 +1,84 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Logits processors for the custom decoding loops."""
+
+__version__ = '0.1.1'
+
+from transformers import (GenerationConfig, LogitsProcessorList,
+                          MinLengthLogitsProcessor,
+                          NoRepeatNGramLogitsProcessor,
+                          RepetitionPenaltyLogitsProcessor,
+                          NoBadWordsLogitsProcessor, TemperatureLogitsWarper,
+                          TopKLogitsWarper, TopPLogitsWarper)
+from typing import Any, Dict, Tuple
+
+
+def build_logits_processors(
+    generation_params: Dict[str, Any],
+    generation_config: GenerationConfig,
+    eos_token_id: int
+) -> Tuple[LogitsProcessorList, LogitsProcessorList]:
+    """Build the logits processors and warpers for some generation parameters.
+
+    Unset parameters take their value from the model generation config,
+    mimicking :meth:`transformers.GenerationMixin.generate`.
+
+    Args:
+        generation_params (:obj:`Dict[str, Any]`):
+            The generation parameters (see :meth:`Summarizer.summarize`).
+        generation_config (:obj:`transformers.GenerationConfig`):
+            The generation config of the model, which provides the defaults.
+        eos_token_id (:obj:`int`):
+            The id of the EOS token.
+
+    Returns:
+        :obj:`Tuple[LogitsProcessorList, LogitsProcessorList]`: The processors,
+        which are always applied, and the warpers, which are only applied when
+        sampling.
+    """
+    def param(name):
+        value = generation_params.get(name)
+        return (value if value is not None
+                else getattr(generation_config, name, None))
+
+    processors = LogitsProcessorList()
+    if param("min_length"):
+        processors.append(MinLengthLogitsProcessor(param("min_length"),
+                                                   eos_token_id))
+    if param("repetition_penalty") not in (None, 1.0):
+        processors.append(
+            RepetitionPenaltyLogitsProcessor(param("repetition_penalty")))
+    if param("no_repeat_ngram_size"):
+        processors.append(
+            NoRepeatNGramLogitsProcessor(param("no_repeat_ngram_size")))
+    if param("bad_words_ids"):
+        processors.append(NoBadWordsLogitsProcessor(param("bad_words_ids"),
+                                                    eos_token_id))
+    # With beam search, at least one token besides EOS is kept, so that the
+    # beams can still be continued
+    min_tokens_to_keep = 2 if (param("num_beams") or 1) > 1 else 1
+    warpers = LogitsProcessorList()
+    if param("temperature") not in (None, 1.0):
+        warpers.append(TemperatureLogitsWarper(param("temperature")))
+    if param("top_k"):
+        warpers.append(TopKLogitsWarper(param("top_k"),
+                                        min_tokens_to_keep=min_tokens_to_keep))
+    if param("top_p") not in (None, 1.0):
+        warpers.append(TopPLogitsWarper(param("top_p"),
+                                        min_tokens_to_keep=min_tokens_to_keep))
+    return processors, warpers
@@ -0,0 +1,172 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Loading of (optionally quantized) summarization models."""
+
+__version__ = '0.1.2'
+
+import os
+import hashlib
+import logging
+import tempfile
+import torch
+import transformers
+from pathlib import Path
+from transformers import T5ForConditionalGeneration
+from transformers.utils import cached_file
+from jizt.config import SUMM_QUANTIZATION, SUMM_QUANTIZATION_CACHE_DIR
+from typing import Union
+
+# Supported quantization modes
+QUANTIZATION_MODES = ("none", "dynamic-int8")
+# Files of a pretrained model whose changes invalidate its cached quantized
+# models (weights, configuration and sharding index)
+CHECKPOINT_SUFFIXES = (".bin", ".safetensors", ".json")
+
+logger = logging.getLogger("Quantization")
+
+
+def load_model(
+    model_path: Union[str, Path],
+    quantization: str = SUMM_QUANTIZATION,
+    cache_dir: Union[str, Path] = SUMM_QUANTIZATION_CACHE_DIR
+) -> T5ForConditionalGeneration:
+    """Load a T5 model, applying the specified quantization.
+
+    With ``"dynamic-int8"``, the weights of the :class:`torch.nn.Linear` layers
+    are quantized to int8, and their activations are quantized dynamically at
+    inference time. This reduces the memory footprint of the model and speeds
+    up inference on CPU.
+
+    The quantized model is saved in :obj:`cache_dir` the first time it is
+    created, so that later loads skip both the loading of the fp32 weights and
+    the conversion.
+
+    Args:
+        model_path (:obj:`str` or :obj:`pathlib.Path`):
+            The path or name of the pretrained model.
+        quantization (:obj:`str`, `optional`, defaults to :obj:`jizt.config.SUMM_QUANTIZATION`):
+            The quantization mode. One of :obj:`QUANTIZATION_MODES`.
+        cache_dir (:obj:`str` or :obj:`pathlib.Path`, `optional`, defaults to :obj:`jizt.config.SUMM_QUANTIZATION_CACHE_DIR`):
+            The directory where the quantized models are cached.
+
+    Returns:
+        :obj:`transformers.T5ForConditionalGeneration`: The model, in
+        evaluation mode.
+
+    Raises:
+        :class:`ValueError`: If the quantization mode is not supported.
+    """
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f'Unknown quantization mode: {quantization}. '
+                         f'Supported modes: {", ".join(QUANTIZATION_MODES)}.')
+
+    if quantization == "none":
+        return T5ForConditionalGeneration.from_pretrained(model_path).eval()
+
+    cached_model_path = _cached_model_path(model_path, quantization, cache_dir)
+    if cached_model_path.is_file():
+        logger.debug("Loading quantized model from %s.", cached_model_path)
+        return torch.load(cached_model_path).eval()
+
+    logger.info("Quantizing model %s (%s).", model_path, quantization)
+    model = T5ForConditionalGeneration.from_pretrained(model_path).eval()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear},
+                                                dtype=torch.qint8)
+    _save_atomically(model, cached_model_path)
+    return model
+
+
+def _cached_model_path(
+    model_path: Union[str, Path],
+    quantization: str,
+    cache_dir: Union[str, Path]
+) -> Path:
+    """Get the path of a cached quantized model.
+
+    The name of the file depends on the model, its checkpoint (see
+    :func:`checkpoint_fingerprint`), the quantization mode and the versions
+    of PyTorch and Transformers, since the model is pickled.
+
+    Args:
+        model_path (:obj:`str` or :obj:`pathlib.Path`):
+            The path or name of the pretrained model.
+        quantization (:obj:`str`):
+            The quantization mode.
+        cache_dir (:obj:`str` or :obj:`pathlib.Path`):
+            The directory where the quantized models are cached.
+
+    Returns:
+        :obj:`pathlib.Path`: The path of the cached model.
+    """
+    key = hashlib.sha256(
+        f"{model_path}{checkpoint_fingerprint(model_path)}"
+        f"{torch.__version__}{transformers.__version__}".encode()
+    ).hexdigest()[:16]
+    return Path(cache_dir) / f"{Path(model_path).name}-{quantization}-{key}.pt"
+
+
+def checkpoint_fingerprint(model_path: Union[str, Path]) -> str:
+    """Get a fingerprint of the checkpoint of a pretrained model.
+
+    The fingerprint is made of the path of the directory of the checkpoint and
+    the name, size and modification time of its files (see
+    :obj:`CHECKPOINT_SUFFIXES`), so it changes whenever the checkpoint is
+    replaced. For models of the Hugging Face Hub, the directory is their
+    snapshot in the local cache, which is named after the commit hash.
+
+    Args:
+        model_path (:obj:`str` or :obj:`pathlib.Path`):
+            The path or name of the pretrained model.
+
+    Returns:
+        :obj:`str`: The fingerprint.
+    """
+    model_dir = Path(model_path)
+    if not model_dir.is_dir():
+        model_dir = Path(cached_file(str(model_path), "config.json")).parent
+    fingerprint = [str(model_dir.resolve())]
+    for path in sorted(model_dir.iterdir()):
+        if path.suffix in CHECKPOINT_SUFFIXES:
+            stat = path.stat()
+            fingerprint.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(fingerprint)
+
+
+def _save_atomically(model: torch.nn.Module, path: Path):
+    """Save a model so that concurrent readers never see a partial file.
+
+    Several workers may quantize the model at the same time on the first
+    startup, so the model is written to a temporary file which then replaces
+    the destination.
+
+    Args:
+        model (:obj:`torch.nn.Module`):
+            The model to save.
+        path (:obj:`pathlib.Path`):
+            The destination path.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            torch.save(model, tmp_file)
+        os.replace(tmp_path, path)
+    except OSError:
+        logger.warning("Could not cache the quantized model in %s.", path)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
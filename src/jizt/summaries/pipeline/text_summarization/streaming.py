@@ -0,0 +1,107 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Streaming of the generated text."""
+
+__version__ = '0.1.1'
+
+import torch
+from transformers import PreTrainedTokenizerBase
+from transformers.generation.streamers import BaseStreamer
+from typing import Callable
+
+
+class SubdivisionStreamer(BaseStreamer):
+    """Streamer that decodes the tokens of a subdivision as they are generated.
+
+    The generated tokens are decoded incrementally, and the new text is passed
+    to a callback once a word is complete, i.e., once it is followed by a
+    whitespace, since the last word could still change with the next tokens.
+    The rest of the text is passed when the generation ends.
+
+    To keep the cost of each token constant, only a window of the last tokens
+    is decoded: the tokens already decoded in the previous step (the prefix),
+    which give the context needed to decode the new ones properly (e.g., their
+    leading spaces), followed by the new tokens. The new text is the
+    difference between both decodings.
+
+    Args:
+        tokenizer (:obj:`transformers.PreTrainedTokenizerBase`):
+            The tokenizer used to decode the tokens.
+        callback (:obj:`Callable[[str], None]`):
+            The function called with each new piece of text.
+        decode_kwargs:
+            Arguments passed to the :meth:`decode` method of the tokenizer,
+            e.g., ``skip_special_tokens``.
+    """
+
+    def __init__(
+        self,
+        tokenizer: PreTrainedTokenizerBase,
+        callback: Callable[[str], None],
+        **decode_kwargs
+    ):
+        self._tokenizer = tokenizer
+        self._callback = callback
+        self._decode_kwargs = decode_kwargs
+        # Decoding window: the first _read_offset tokens have already been
+        # decoded (prefix), the rest have not
+        self._token_ids = []
+        self._read_offset = 0
+        # Decoded text not yet passed to the callback
+        self._pending_text = ""
+
+    def put(self, value: torch.LongTensor):
+        """Receive new tokens (the decoder start token in the first call)."""
+        self._token_ids.extend(value.view(-1).tolist())
+        self._pending_text += self._decode_new_tokens()
+        complete_length = self._pending_text.rfind(" ") + 1
+        if complete_length > 0:
+            self._callback(self._pending_text[:complete_length])
+            self._pending_text = self._pending_text[complete_length:]
+
+    def end(self):
+        """Flush the rest of the text once the generation has finished."""
+        text = self._pending_text + self._decode_new_tokens(final=True)
+        if text:
+            self._callback(text)
+        self._token_ids = []
+        self._read_offset = 0
+        self._pending_text = ""
+
+    def _decode_new_tokens(self, final: bool = False) -> str:
+        """Decode the tokens received since the last decoded ones.
+
+        Args:
+            final (:obj:`bool`, `optional`, defaults to :obj:`False`):
+                Whether there are no more tokens to come. Otherwise, the new
+                tokens are not decoded while they end in an incomplete
+                character (e.g., a multi-byte character split across tokens).
+
+        Returns:
+            :obj:`str`: The new text.
+        """
+        prefix_text = self._tokenizer.decode(
+            self._token_ids[:self._read_offset], **self._decode_kwargs)
+        text = self._tokenizer.decode(self._token_ids, **self._decode_kwargs)
+        if len(text) <= len(prefix_text) or (text.endswith("\ufffd")
+                                             and not final):
+            return ""
+        # The new tokens become the prefix of the next window
+        self._token_ids = self._token_ids[self._read_offset:]
+        self._read_offset = len(self._token_ids)
+        return text[len(prefix_text):]
@@ -17,27 +17,65 @@
 
 """Summarization class with support for Hugging Face pretrained models."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.5'
 
 import math
+import time
 import logging
 import torch
-from transformers import T5Tokenizer, T5ForConditionalGeneration
-from jizt.config import LOG_LEVEL, SUMM_TOKENIZER_PATH, SUMM_MODEL_PATH
-from typing import List, Optional, Union, Iterable
+from functools import partial
+from itertools import islice
+from torch.nn.utils.rnn import pad_sequence
+from .batch_scheduling import BatchScheduler
+from .continuous_batching import ContinuousBatchingEngine
+from .backends.backend_factory import create_backend
+from .backends.pytorch_backend import PyTorchBackend
+from .streaming import SubdivisionStreamer
+from ..tokenizer_registry import get_tokenizer
+from jizt.config import (LOG_LEVEL, SUMM_TOKENIZER_PATH, SUMM_MODEL_PATH,
+                         SUMM_MAX_BATCH_SIZE, SUMM_BATCH_SCHEDULING,
+                         SUMM_GENERATION_ENGINE, SUMM_BACKEND,
+                         SUMM_QUANTIZATION, SUMM_DRAFT_MODEL_PATH)
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union, Iterable
 
 
 class Summarizer:
     """T5 text summarizer.
 
-    This summarizer uses the :meth:`generate` method from the class
-    :class:`transformers.generation_utils.GenerationMixin` to generate
-    the summary ids (encodings).
+    This summarizer uses an inference backend to generate the summary ids
+    (encodings). The default backend uses the :meth:`generate` method from the
+    class :class:`transformers.generation_utils.GenerationMixin`, and an ONNX
+    Runtime backend is also available (see :mod:`backends`).
 
-    Then, it uses the :meth:`decode` method from the class
+    Then, it uses the :meth:`batch_decode` method from the class
     :class:`transformers.tokenization_utils_base.PreTrainedTokenizerBase`
     to convert the ids into a string.
 
+    The subdivisions of a text are padded and summarized together in batches
+    of at most :attr:`max_batch_size` subdivisions, so that a single call to
+    :meth:`generate` is made per batch.
+
+    If :obj:`batch_scheduling` is enabled, the subdivisions are instead handed
+    over to a :class:`batch_scheduling.BatchScheduler`, which batches them
+    together with the subdivisions of other concurrent requests.
+
+    If :obj:`generation_engine` is ``"continuous"``, the subdivisions that do
+    not use beam search are summarized by a
+    :class:`continuous_batching.ContinuousBatchingEngine`, which schedules the
+    decoding steps at token granularity. Note that beam search is used by
+    default (``num_beams=4``), so only the requests that set ``num_beams`` to
+    1 (or are degraded to greedy decoding) are served by that engine. A
+    warning is logged the first time a request falls back to the static
+    engine.
+
+    The model can be loaded with dynamic int8 quantization through the
+    :obj:`quantization` argument (see :func:`quantization.load_model`).
+
+    If :obj:`draft_model_path` is specified, the PyTorch backend uses assisted
+    (speculative) generation for greedy decoding and sampling (see
+    :class:`backends.pytorch_backend.PyTorchBackend`).
+
     For more information, see the `Hugging Face docs
     <https://huggingface.co/transformers/model_doc/t5.html#transformers.T5ForConditionalGeneration>`__:
     """
@@ -46,26 +84,141 @@ class Summarizer:
         self,
         tokenizer_path: str = SUMM_TOKENIZER_PATH,
         model_path: str = SUMM_MODEL_PATH,
+        max_batch_size: int = SUMM_MAX_BATCH_SIZE,
+        batch_scheduling: bool = SUMM_BATCH_SCHEDULING,
+        generation_engine: str = SUMM_GENERATION_ENGINE,
+        backend: str = SUMM_BACKEND,
+        quantization: str = SUMM_QUANTIZATION,
+        draft_model_path: Optional[Union[str, Path]] = SUMM_DRAFT_MODEL_PATH,
         log_level: int = LOG_LEVEL
     ):
-        self._tokenizer = T5Tokenizer.from_pretrained(tokenizer_path)
-        self._model = T5ForConditionalGeneration.from_pretrained(model_path)
+        if max_batch_size < 1:
+            raise ValueError(f'max_batch_size must be at least 1 '
+                             f'(got {max_batch_size}).')
+        if generation_engine not in ('static', 'continuous'):
+            raise ValueError(f'Unknown generation engine: {generation_engine}.')
+        self._tokenizer = get_tokenizer(tokenizer_path)
+        self._backend = create_backend(backend, model_path, quantization,
+                                       draft_model_path)
+        if (generation_engine == 'continuous'
+                and not isinstance(self._backend, PyTorchBackend)):
+            raise ValueError('The continuous generation engine requires the '
+                             'PyTorch backend.')
+        self._max_batch_size = max_batch_size
+        self._scheduler = (BatchScheduler(self._generate_batch,
+                                          max_batch_size=max_batch_size,
+                                          log_level=log_level)
+                           if batch_scheduling else None)
+        self._continuous_engine = (
+            ContinuousBatchingEngine(self._backend.model, self._tokenizer,
+                                     max_batch_size=max_batch_size,
+                                     log_level=log_level)
+            if generation_engine == 'continuous' else None
+        )
+        self._warned_engine_fallback = False
         logging.basicConfig(
             format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
             level=log_level,
             datefmt='%d/%m/%Y %I:%M:%S %p'
         )
         self.logger = logging.getLogger("Summarizer")
+        if self._continuous_engine is not None:
+            self.logger.warning(
+                "The continuous generation engine does not support beam "
+                "search, which is used by default (num_beams=4). Only the "
+                "requests with num_beams=1 will be served by it."
+            )
 
     @property
     def tokenizer(self):
         return self._tokenizer
 
+    @property
+    def backend(self):
+        return self._backend
+
     @property
     def model(self):
-        return self._model
+        """The PyTorch model, or :obj:`None` with other backends."""
+        if isinstance(self._backend, PyTorchBackend):
+            return self._backend.model
+        return None
+
+    @property
+    def max_batch_size(self):
+        return self._max_batch_size
 
     def summarize(
+        self,
+        input_ids: List[Union[List[int], torch.LongTensor]],
+        **params
+    ) -> str:
+        """Generate a summary from the encoded tokens (input_ids).
+
+        The summaries of the subdivisions are joined with a space. For the
+        available params, see :meth:`summarize_subdivisions`.
+
+        Returns:
+            :obj:`str`: The generated summary.
+        """
+        return " ".join(self.summarize_subdivisions(input_ids, **params))
+
+    def summarize_incrementally(
+        self,
+        input_ids: Iterable[Union[List[int], torch.LongTensor]],
+        text_callback: Optional[Callable[[int, str], None]] = None,
+        **params
+    ) -> List[str]:
+        """Generate the summary of each of the subdivisions as they arrive.
+
+        The subdivisions are taken from :obj:`input_ids` in batches of
+        :attr:`max_batch_size` subdivisions (one by one if the text is
+        streamed), and each batch is summarized with
+        :meth:`summarize_subdivisions` as soon as it is complete. This way, if
+        the subdivisions are produced in the background (e.g., by
+        :meth:`SplitterEncoder.encode_iter`), the summary of the first
+        subdivisions is generated while the rest are still being encoded.
+
+        Since the total length of the text is not known beforehand, the
+        relative max. and min. lengths of the summary are applied to each
+        batch instead of to the whole text.
+
+        Args:
+            input_ids (:obj:`Iterable[List[int]]` or :obj:`Iterable[torch.LongTensor]`):
+                The sequence subdivisions used as a prompt for the summary
+                generation.
+            text_callback (:obj:`Callable[[int, str], None]`, `optional`):
+                If set, the summary is streamed through this function. See
+                :meth:`summarize_subdivisions`.
+            params:
+                The rest of parameters passed to
+                :meth:`summarize_subdivisions`.
+
+        Returns:
+            :obj:`List[str]`: The summary of each of the subdivisions. If the
+            deadline is reached, the skipped subdivisions are left out.
+        """
+        batch_size = self._max_batch_size if text_callback is None else 1
+        input_ids = iter(input_ids)
+        summary_subdivs = []
+        while True:
+            batch = list(islice(input_ids, batch_size))
+            if not batch:
+                break
+            callback = (None if text_callback is None
+                        else partial(self._offset_callback, text_callback,
+                                     len(summary_subdivs)))
+            batch_summaries = self.summarize_subdivisions(
+                batch,
+                text_callback=callback,
+                **params
+            )
+            summary_subdivs.extend(batch_summaries)
+            if len(batch_summaries) < len(batch):
+                break  # deadline reached
+        return summary_subdivs
+
+    def summarize_subdivisions(
         self,
         input_ids: List[Union[List[int], torch.LongTensor]],
         relative_max_length: Optional[float] = 0.4,
@@ -83,9 +236,12 @@ class Summarizer:
         num_return_sequences: Optional[int] = None,
         use_cache: Optional[bool] = None,
         skip_special_tokens: Optional[bool] = True,
-        clean_up_tokenization_spaces: Optional[bool] = True
-    ) -> str:
-        """Generate a summary from the encoded tokens (input_ids).
+        clean_up_tokenization_spaces: Optional[bool] = True,
+        text_callback: Optional[Callable[[int, str], None]] = None,
+        deadline: Optional[float] = None,
+        deadline_callback: Optional[Callable[[int], None]] = None
+    ) -> List[str]:
+        """Generate the summary of each of the subdivisions (input_ids).
 
         Decoding strategies currently supported:
 
@@ -98,7 +254,7 @@ class Summarizer:
         <https://huggingface.co/blog/how-to-generate>`__.
 
         Args:
-            input_ids (:obj:`List[List[int]]` or :obj:`List[torch.LongTensor]`):
+            input_ids (:obj:`List[List[int]]`, :obj:`List[torch.LongTensor]` or :obj:`SubdivisionBuffer`):
                 The sequence subdivisions used as a prompt for the summary
                 generation.
             relative_max_length (:obj:`float`, `optional`, defaults to 0.4):
@@ -149,36 +305,267 @@ class Summarizer:
                 Whether or not to remove special tokens in the decoding.
             clean_up_tokenization_spaces (:obj:`bool`, `optional`, defaults to :obj:`True`):
                 Whether or not to clean up the tokenization spaces.
+            text_callback (:obj:`Callable[[int, str], None]`, `optional`):
+                If set, the summary is streamed through this function, which
+                receives the index of the subdivision and the new piece of
+                text. The subdivisions are then summarized one by one. With
+                greedy decoding or sampling, the text is streamed as the
+                tokens are generated; with beam search, the summary of each
+                subdivision is passed at once when it is finished.
+            deadline (:obj:`float`, `optional`):
+                If set, the time (as returned by :func:`time.monotonic`) by
+                which the summary must be finished. The generation of the
+                subdivisions in progress is stopped when the deadline is
+                reached, and the subdivisions not yet started are skipped.
+                Requests with a deadline are not handed over to the batch
+                scheduler nor the continuous batching engine.
+            deadline_callback (:obj:`Callable[[int], None]`, `optional`):
+                If set, it is called with the number of subdivisions skipped
+                because the deadline was reached, if any.
 
         Returns:
-            :obj:`str`: The generated summary.
+            :obj:`List[str]`: The summary of each of the subdivisions. If the
+            deadline is reached, the skipped subdivisions are left out.
         """
-        summary_subdivs = []
-        input_ids_total_len = sum(len(ids.squeeze()) for ids in input_ids)
+        input_ids_total_len = sum(torch.as_tensor(ids).numel()
+                                  for ids in input_ids)
         max_length = input_ids_total_len * relative_max_length
         min_length = input_ids_total_len * relative_min_length
         subdiv_max_length = math.floor(max_length / len(input_ids))
         subdiv_min_length = math.ceil(min_length / len(input_ids))
 
-        for ids_subdiv in input_ids:
-            summary_ids = self._model.generate(input_ids=ids_subdiv,
-                                               max_length=subdiv_max_length,
-                                               min_length=subdiv_min_length,
-                                               do_sample=do_sample,
-                                               early_stopping=early_stopping,
-                                               num_beams=num_beams,
-                                               temperature=temperature,
-                                               top_k=top_k,
-                                               top_p=top_p,
-                                               repetition_penalty=repetition_penalty,
-                                               bad_words_ids=bad_words_ids,
-                                               length_penalty=length_penalty,
-                                               no_repeat_ngram_size=no_repeat_ngram_size,
-                                               num_return_sequences=num_return_sequences,
-                                               use_cache=use_cache)
-            decoded_subdiv = self._tokenizer.decode(summary_ids.squeeze().tolist(),
-                                                    skip_special_tokens=skip_special_tokens,
-                                                    clean_up_tokenization_spaces=clean_up_tokenization_spaces)
-            summary_subdivs.append(decoded_subdiv)
-
-        return " ".join(summary_subdivs)
+        generation_params = dict(max_length=subdiv_max_length,
+                                 min_length=subdiv_min_length,
+                                 do_sample=do_sample,
+                                 early_stopping=early_stopping,
+                                 num_beams=num_beams,
+                                 temperature=temperature,
+                                 top_k=top_k,
+                                 top_p=top_p,
+                                 repetition_penalty=repetition_penalty,
+                                 bad_words_ids=bad_words_ids,
+                                 length_penalty=length_penalty,
+                                 no_repeat_ngram_size=no_repeat_ngram_size,
+                                 num_return_sequences=num_return_sequences,
+                                 use_cache=use_cache)
+
+        if text_callback is not None:
+            return self._generate_streaming(
+                input_ids,
+                text_callback,
+                skip_special_tokens=skip_special_tokens,
+                clean_up_tokenization_spaces=clean_up_tokenization_spaces,
+                deadline=deadline,
+                deadline_callback=deadline_callback,
+                **generation_params
+            )
+
+        engine = (self._select_engine(generation_params) if deadline is None
+                  else None)
+        if engine is not None:
+            futures = engine.submit(
+                input_ids,
+                skip_special_tokens=skip_special_tokens,
+                clean_up_tokenization_spaces=clean_up_tokenization_spaces,
+                **generation_params
+            )
+            return [future.result() for future in futures]
+
+        summary_subdivs = []
+        for i in range(0, len(input_ids), self._max_batch_size):
+            params = self._limit_time(generation_params, deadline)
+            if params is None:
+                self.logger.debug("Deadline reached: skipping %d subdivisions.",
+                                  len(input_ids) - i)
+                if deadline_callback is not None:
+                    deadline_callback(len(input_ids) - i)
+                break
+            summary_subdivs.extend(self._generate_batch(
+                input_ids[i:i + self._max_batch_size],
+                skip_special_tokens=skip_special_tokens,
+                clean_up_tokenization_spaces=clean_up_tokenization_spaces,
+                **params
+            ))
+
+        return summary_subdivs
+
+    def _generate_streaming(
+        self,
+        input_ids: List[Union[List[int], torch.LongTensor]],
+        text_callback: Callable[[int, str], None],
+        skip_special_tokens: Optional[bool] = True,
+        clean_up_tokenization_spaces: Optional[bool] = True,
+        deadline: Optional[float] = None,
+        deadline_callback: Optional[Callable[[int], None]] = None,
+        **generation_params
+    ) -> List[str]:
+        """Summarize the subdivisions one by one, streaming the text.
+
+        Args:
+            input_ids (:obj:`List[List[int]]` or :obj:`List[torch.LongTensor]`):
+                The subdivisions to summarize.
+            text_callback (:obj:`Callable[[int, str], None]`):
+                The function that receives the index of the subdivision and
+                each new piece of text.
+            skip_special_tokens (:obj:`bool`, `optional`, defaults to :obj:`True`):
+                Whether or not to remove special tokens in the decoding.
+            clean_up_tokenization_spaces (:obj:`bool`, `optional`, defaults to :obj:`True`):
+                Whether or not to clean up the tokenization spaces.
+            deadline (:obj:`float`, `optional`):
+                The deadline of the summary. See :meth:`summarize_subdivisions`.
+            deadline_callback (:obj:`Callable[[int], None]`, `optional`):
+                The function that receives the number of subdivisions skipped
+                because the deadline was reached. See
+                :meth:`summarize_subdivisions`.
+            generation_params:
+                The rest of parameters passed to :meth:`generate`. See
+                :meth:`summarize`.
+
+        Returns:
+            :obj:`List[str]`: The summary of each of the subdivisions.
+        """
+        # Token streaming is not possible with beam search, since the best
+        # beam is only known at the end
+        stream_tokens = (
+            generation_params.get("num_beams") in (None, 1)
+            and generation_params.get("num_return_sequences") in (None, 1)
+        )
+        summary_subdivs = []
+        for i, ids_subdiv in enumerate(input_ids):
+            params = self._limit_time(generation_params, deadline)
+            if params is None:
+                if deadline_callback is not None:
+                    deadline_callback(len(input_ids) - i)
+                break
+            if stream_tokens:
+                params = dict(params, streamer=SubdivisionStreamer(
+                    self._tokenizer,
+                    partial(text_callback, i),
+                    skip_special_tokens=skip_special_tokens,
+                    clean_up_tokenization_spaces=clean_up_tokenization_spaces
+                ))
+            summary_subdiv = self._generate_batch(
+                [ids_subdiv],
+                skip_special_tokens=skip_special_tokens,
+                clean_up_tokenization_spaces=clean_up_tokenization_spaces,
+                **params
+            )[0]
+            if not stream_tokens:
+                text_callback(i, summary_subdiv)
+            summary_subdivs.append(summary_subdiv)
+        return summary_subdivs
+
+    @staticmethod
+    def _offset_callback(
+        text_callback: Callable[[int, str], None],
+        offset: int,
+        subdivision: int,
+        text: str
+    ):
+        """Shift the subdivision index passed to a text callback."""
+        text_callback(offset + subdivision, text)
+
+    @staticmethod
+    def _limit_time(
+        generation_params: Dict[str, Any],
+        deadline: Optional[float]
+    ) -> Optional[Dict[str, Any]]:
+        """Limit the generation time to the time left until the deadline.
+
+        Args:
+            generation_params (:obj:`Dict[str, Any]`):
+                The generation parameters.
+            deadline (:obj:`float`):
+                The deadline, as returned by :func:`time.monotonic`, or
+                :obj:`None` if there is no deadline.
+
+        Returns:
+            :obj:`Dict[str, Any]`: The generation parameters, with
+            ``max_time`` set if there is a deadline, or :obj:`None` if the
+            deadline has already been reached.
+        """
+        if deadline is None:
+            return generation_params
+        time_left = deadline - time.monotonic()
+        if time_left <= 0:
+            return None
+        return dict(generation_params, max_time=time_left)
+
+    def _select_engine(
+        self,
+        generation_params: Dict[str, Any]
+    ) -> Union[ContinuousBatchingEngine, BatchScheduler, None]:
+        """Select the engine in charge of summarizing the subdivisions.
+
+        Args:
+            generation_params (:obj:`Dict[str, Any]`):
+                The generation parameters.
+
+        Returns:
+            :obj:`ContinuousBatchingEngine` or :obj:`BatchScheduler`: The
+            engine, or :obj:`None` if the subdivisions must be summarized
+            directly by :meth:`_generate_batch`.
+        """
+        if self._continuous_engine is not None:
+            if ContinuousBatchingEngine.supports(generation_params):
+                return self._continuous_engine
+            if not self._warned_engine_fallback:
+                self._warned_engine_fallback = True
+                self.logger.warning(
+                    "Generation params not supported by the continuous "
+                    "engine (num_beams=%s, num_return_sequences=%s): falling "
+                    "back to the static engine. Further fallbacks are only "
+                    "logged in debug mode.",
+                    generation_params.get("num_beams"),
+                    generation_params.get("num_return_sequences")
+                )
+            else:
+                self.logger.debug("Falling back to the static engine.")
+        return self._scheduler
+
+    def _generate_batch(
+        self,
+        input_ids: List[Union[List[int], torch.LongTensor]],
+        skip_special_tokens: Optional[bool] = True,
+        clean_up_tokenization_spaces: Optional[bool] = True,
+        **generation_params
+    ) -> List[str]:
+        """Summarize a batch of subdivisions with a single call to :meth:`generate`.
+
+        The subdivisions are right-padded with the tokenizer pad token to the
+        length of the longest one, and an attention mask is built so that the
+        padding is ignored by the model.
+
+        Args:
+            input_ids (:obj:`List[List[int]]` or :obj:`List[torch.LongTensor]`):
+                The subdivisions to summarize.
+            skip_special_tokens (:obj:`bool`, `optional`, defaults to :obj:`True`):
+                Whether or not to remove special tokens in the decoding.
+            clean_up_tokenization_spaces (:obj:`bool`, `optional`, defaults to :obj:`True`):
+                Whether or not to clean up the tokenization spaces.
+            generation_params:
+                The rest of parameters passed to :meth:`generate`. See
+                :meth:`summarize`.
+
+        Returns:
+            :obj:`List[str]`: The summary of each of the subdivisions, in the
+            same order as in :obj:`input_ids`.
+        """
+        subdivs = [torch.as_tensor(ids).view(-1) for ids in input_ids]
+        lengths = torch.tensor([len(ids) for ids in subdivs])
+        batch = pad_sequence(subdivs, batch_first=True,
+                             padding_value=self._tokenizer.pad_token_id)
+        attention_mask = (torch.arange(batch.shape[1]).unsqueeze(0)
+                          < lengths.unsqueeze(1)).long()
+
+        summary_ids = self._backend.generate(input_ids=batch,
+                                             attention_mask=attention_mask,
+                                             **generation_params)
+        # Only the first returned sequence of each subdivision is kept
+        num_return_sequences = generation_params.get("num_return_sequences")
+        summary_ids = summary_ids[::num_return_sequences or 1]
+        return self._tokenizer.batch_decode(
+            summary_ids,
+            skip_special_tokens=skip_special_tokens,
+            clean_up_tokenization_spaces=clean_up_tokenization_spaces
+        )
@@ -0,0 +1,56 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Process-wide registry of tokenizers."""
+
+__version__ = '0.1.0'
+
+import threading
+from pathlib import Path
+from transformers import T5TokenizerFast
+from jizt.config import SUMM_TOKENIZER_PATH
+from typing import Dict, Union
+
+_tokenizers: Dict[str, T5TokenizerFast] = {}
+_lock = threading.Lock()
+
+
+def get_tokenizer(
+    tokenizer_path: Union[str, Path] = SUMM_TOKENIZER_PATH
+) -> T5TokenizerFast:
+    """Get the shared tokenizer of a pretrained model.
+
+    The tokenizer is loaded the first time it is requested, and the same
+    instance is returned afterwards, so that the encoder and the summarizer
+    share a single tokenizer per process. The fast (Rust) implementation is
+    used, which produces the same ids as the SentencePiece one.
+
+    The tokenizer can be used from several threads, as long as the callers do
+    not change its truncation or padding settings.
+
+    Args:
+        tokenizer_path (:obj:`str` or :obj:`pathlib.Path`, `optional`, defaults to :obj:`jizt.config.SUMM_TOKENIZER_PATH`):
+            The path or name of the pretrained tokenizer.
+
+    Returns:
+        :obj:`transformers.T5TokenizerFast`: The tokenizer.
+    """
+    key = str(tokenizer_path)
+    with _lock:
+        if key not in _tokenizers:
+            _tokenizers[key] = T5TokenizerFast.from_pretrained(key)
+        return _tokenizers[key]
@@ -18,19 +18,22 @@
 
 """Services for '/summaries' endpoint."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.3'
 
 import copy
+import time
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from fastapi import BackgroundTasks
 from jizt.config import LOG_LEVEL
 from jizt.supported_languages import SupportedLanguage
 from .pipeline.pipeline import SummarizationPipeline
 from .data.summary_dao_singleton import SummaryDAOSingleton
-from .models import PlainTextRequestSchema, Summary
+from .models import Document, PlainTextRequestSchema, Summary
 from .utils.summary_status import SummaryStatus
+from .utils.summary_stream import SummaryStream
 from .utils.id_generation import generate_request_id, generate_summary_id
 
 logging.basicConfig(
@@ -45,18 +48,80 @@ summarization_pipeline = SummarizationPipeline()
 
 def generate_summary(
     request: PlainTextRequestSchema,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    x_deadline: Optional[float] = None,
+    document: Optional[Document] = None
 ) -> Dict[Summary, Dict[str, Any]]:
     """Generate summary.
 
-    For info on the params, see :class:`models.PlainTextRequestSchema`.
+    For info on the params, see :class:`models.PlainTextRequestSchema`. The
+    ``X-Deadline`` header overrides the ``deadline`` of the request. The
+    document built from the source by the view (if any) is passed on to the
+    summarization pipeline.
 
     Returns:
         :obj:`Dict[Summary, Dict[str, Any]]`: a dictionary containing the
         summary and the warnings derived from the summary generation
         (:obj:`None` if there are no warnings).
     """
-    source, model, params, language, cache = request.dict().values()
+    deadline = _get_deadline(request, x_deadline)
+    request_id, summary, warnings, created = _create_summary(request)
+    if created:
+        background_tasks.add_task(
+            summarization_pipeline.run,
+            request_id,
+            summary,
+            deadline=deadline,
+            document=document
+        )
+    summary = copy.copy(summary)  # TODO: remove (for now we store the summaries in memory)
+    summary.id_ = request_id  # we return the request id
+    return summary, warnings
+
+
+def generate_summary_stream(
+    request: PlainTextRequestSchema,
+    x_deadline: Optional[float] = None,
+    document: Optional[Document] = None
+) -> Tuple[str, SummaryStream]:
+    """Generate summary, streaming its progress.
+
+    For info on the params, see :class:`models.PlainTextRequestSchema`. The
+    ``X-Deadline`` header overrides the ``deadline`` of the request. The
+    document built from the source by the view (if any) is passed on to the
+    summarization pipeline.
+
+    The summarization pipeline is run in a separate thread, which feeds the
+    returned stream.
+
+    Returns:
+        :obj:`Tuple[str, SummaryStream]`: The request id and the stream of
+        the summary.
+    """
+    deadline = _get_deadline(request, x_deadline)
+    # Request ids are salted, so each streamed request creates its own summary
+    request_id, summary, _, _ = _create_summary(request)
+    stream = SummaryStream()
+    threading.Thread(target=summarization_pipeline.run,
+                     args=(request_id, summary, stream, deadline, document),
+                     daemon=True).start()
+    return request_id, stream
+
+
+def _create_summary(
+    request: PlainTextRequestSchema
+) -> Tuple[str, Summary, Dict[str, Any], bool]:
+    """Register a summary request in the database.
+
+    Returns:
+        :obj:`Tuple[str, Summary, Dict[str, Any], bool]`: The request id, the
+        summary, its warnings, and whether the summary has been created, i.e.,
+        whether it must be generated by the pipeline.
+    """
+    source, model, params, language, cache = (
+        request.source, request.model, request.params, request.language,
+        request.cache
+    )
 
     request_id = generate_request_id(source, model, params)
     summary_id = generate_summary_id(source, model, params)
@@ -73,38 +138,54 @@ def generate_summary(
             summary.ended_at, summary.language
         )
         logger.debug("Current summary count: %s.", count)
-    else:
-        summary = Summary(
-            id_=summary_id,
-            source=source,
-            output=None,
-            model=model,
-            params=params,
-            status=SummaryStatus.PREPROCESSING,
-            started_at=datetime.now(),
-            ended_at=None,
-            language=SupportedLanguage(language)
-        )
-        # TODO: warnings = data.pop('warnings', None)
-        warnings = None
-        db.insert_initial_request(request_id, summary, cache, warnings)
-        logger.debug(
-            'New summary created: [id] %s, [source] %s, [output] '
-            '%s, [model] %s, [params] %s, [status] %s, [started_at] %s, '
-            '[ended_at] %s, [language] %s',
-            summary.id_, summary.source[:50],
-            summary.output[:50] if summary.output is not None else None,
-            summary.model, summary.params, summary.status, summary.started_at,
-            summary.ended_at, summary.language
-        )
-        background_tasks.add_task(
-            summarization_pipeline.run,
-            request_id,
-            summary
-        )
-    summary = copy.copy(summary)  # TODO: remove (for now we store the summaries in memory)
-    summary.id_ = request_id  # we return the request id
-    return summary, warnings
+        return request_id, summary, warnings, False
+
+    summary = Summary(
+        id_=summary_id,
+        source=source,
+        output=None,
+        model=model,
+        params=params,
+        status=SummaryStatus.PREPROCESSING,
+        started_at=datetime.now(),
+        ended_at=None,
+        language=SupportedLanguage(language)
+    )
+    # TODO: warnings = data.pop('warnings', None)
+    warnings = None
+    db.insert_initial_request(request_id, summary, cache, warnings)
+    logger.debug(
+        'New summary created: [id] %s, [source] %s, [output] '
+        '%s, [model] %s, [params] %s, [status] %s, [started_at] %s, '
+        '[ended_at] %s, [language] %s',
+        summary.id_, summary.source[:50],
+        summary.output[:50] if summary.output is not None else None,
+        summary.model, summary.params, summary.status, summary.started_at,
+        summary.ended_at, summary.language
+    )
+    return request_id, summary, warnings, True
+
+
+def _get_deadline(
+    request: PlainTextRequestSchema,
+    x_deadline: Optional[float]
+) -> Optional[float]:
+    """Get the deadline of a request.
+
+    Args:
+        request (:obj:`PlainTextRequestSchema`):
+            The request.
+        x_deadline (:obj:`float`):
+            The value of the ``X-Deadline`` header, if any.
+
+    Returns:
+        :obj:`float`: The deadline, as returned by :func:`time.monotonic`, or
+        :obj:`None` if the request has no deadline.
+    """
+    seconds = x_deadline if x_deadline is not None else request.deadline
+    if seconds is None or seconds <= 0:
+        return None
+    return time.monotonic() + seconds
 
 
 def get_summary(request_id: str) -> Dict[Summary, Dict[str, Any]]:
@@ -0,0 +1,82 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Background prefetching of iterators."""
+
+__version__ = '0.1.0'
+
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_END = object()
+
+
+def prefetch(iterable: Iterable[T], max_size: int = 8) -> Iterator[T]:
+    """Consume an iterable in a background thread.
+
+    The items are produced in a daemon thread and passed through a bounded
+    queue, so that the producer can run ahead of the consumer by up to
+    :obj:`max_size` items. The exceptions raised by the producer are raised
+    again in the consumer. If the consumer stops iterating (i.e., the returned
+    generator is closed), the producer is stopped as soon as it produces its
+    next item.
+
+    Args:
+        iterable (:obj:`Iterable`):
+            The iterable to consume.
+        max_size (:obj:`int`, `optional`, defaults to 8):
+            The maximum number of items produced in advance.
+
+    Yields:
+        The items of :obj:`iterable`, in order.
+    """
+    items = queue.Queue(maxsize=max_size)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as exc:
+            put((_END, exc))
+        else:
+            put((_END, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, exc = items.get()
+            if exc is not None:
+                raise exc
+            if item is _END:
+                return
+            yield item
+    finally:
+        stopped.set()
@@ -17,16 +17,23 @@
 
 """Summary status."""
 
-__version__ = '0.1.1'
+__version__ = '0.1.2'
 
 from enum import Enum
 
 
 class SummaryStatus(Enum):
-    """Statuses a summary can be in."""
+    """Statuses a summary can be in.
+
+    With hierarchical summarization, ``"summarizing"`` corresponds to the
+    summarization of the subdivisions of the text (map stage), and
+    ``"reducing"`` to the summarization of the partial summaries (reduce
+    stage), which may span several levels.
+    """
 
     PREPROCESSING = "preprocessing"
     ENCODING = "encoding"
     SUMMARIZING = "summarizing"
+    REDUCING = "reducing"
     POSTPROCESSING = "postprocessing"
     COMPLETED = "completed"
@@ -0,0 +1,75 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Stream of summary events."""
+
+__version__ = '0.1.1'
+
+import queue
+from .summary_status import SummaryStatus
+from typing import Any, Dict, Iterator, Tuple
+
+
+class SummaryStream:
+    """Channel through which the pipeline streams the progress of a summary.
+
+    The summarization pipeline (producer) and the client connection (consumer)
+    run in different threads, so the events are passed through a thread-safe
+    queue. Each event is a tuple ``(event_type, data)``, where the event type
+    is one of:
+
+    * ``"status"``: the summary has moved to a new status.
+    * ``"text"``: a new piece of text of a subdivision has been generated.
+    * ``"error"``: the generation of the summary has failed.
+    """
+
+    _END = object()
+
+    def __init__(self):
+        self._events = queue.Queue()
+
+    def put_status(self, status: SummaryStatus, **details):
+        """Notify a new summary status.
+
+        Args:
+            status (:obj:`SummaryStatus`):
+                The new status.
+            **details:
+                Additional information about the progress, e.g., the level in
+                hierarchical summarization.
+        """
+        self._events.put(("status", {"status": status.value, **details}))
+
+    def put_text(self, subdivision: int, text: str):
+        """Notify a new piece of generated text of a subdivision."""
+        self._events.put(("text", {"subdivision": subdivision, "text": text}))
+
+    def put_error(self, message: str):
+        """Notify that the summary generation failed."""
+        self._events.put(("error", {"detail": message}))
+
+    def close(self):
+        """Signal the end of the stream."""
+        self._events.put(self._END)
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Iterate over the events, blocking until the stream is closed."""
+        while True:
+            event = self._events.get()
+            if event is self._END:
+                return
+            yield event
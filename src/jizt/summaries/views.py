@@ -18,17 +18,22 @@
 
 """Views for '/summaries' endpoint."""
 
-__version__ = '0.1.1'
+__version__ = '0.1.6'
 
+import json
 import logging
-from fastapi import (APIRouter, HTTPException, BackgroundTasks, Depends,
+from fastapi import (APIRouter, HTTPException, BackgroundTasks, Header,
                      Response, status)
+from fastapi.responses import StreamingResponse
 from jizt.config import LOG_LEVEL, MIN_WORDS_SOURCE
 from jizt.supported_languages import SupportedLanguage
 from jizt.language_detection.language_detection.language_detection import \
     LanguageDetectorSingleton
-from .models import PlainTextRequestSchema, ResponseSchema, Summary
-from .service import generate_summary, get_summary
+from .models import (Document, PlainTextRequestSchema, ResponseSchema,
+                     Summary)
+from .service import generate_summary, generate_summary_stream, get_summary
+from .utils.summary_stream import SummaryStream
+from typing import Any, Dict, Iterator, Optional
 
 logging.basicConfig(
     format='%(asctime)s %(name)s %(levelname)-8s %(message)s',
@@ -47,7 +52,7 @@ async def request_summary_view(
     request: PlainTextRequestSchema,
     response: Response,
     background_tasks: BackgroundTasks,
-    result: tuple[Summary, dict] = Depends(generate_summary)  # TODO: model for warnings
+    x_deadline: Optional[float] = Header(None)
 ) -> ResponseSchema:
     """Request a summary of a text.
 
@@ -64,29 +69,46 @@ async def request_summary_view(
     Raises: :class:`http.client.HTTPException`:
         If the request is not valid.
     """
-    if not request.source:
-        raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
+    document = _validate_request(request)
+    # TODO: model for warnings
+    summary, warnings = generate_summary(request, background_tasks,
+                                         x_deadline, document)
+    return _to_response(summary, summary.id_, warnings)
 
-    if len(request.source.split()) < MIN_WORDS_SOURCE:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"source too short (<{MIN_WORDS_SOURCE} words)"
-        )
 
-    language = lang_detector.detect(request.source).language
-    if not SupportedLanguage.is_supported(language):
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"detected language '{language}' not supported"
-        )
+@router.post("/plain-text/stream")
+async def stream_summary_view(
+    request: PlainTextRequestSchema,
+    x_deadline: Optional[float] = Header(None)
+) -> StreamingResponse:
+    """Request a summary of a text, streaming its generation.
+
+    Instead of having to poll the summary status, the client receives the
+    progress of the summary as `Server-Sent Events
+    <https://html.spec.whatwg.org/multipage/server-sent-events.html>`__:
+
+    * ``request``: sent first, with the summary id, e.g.,
+      ``{"summary_id": "73c3de4175449987ef6047f6e0bea91c1036a8599b"}``.
+    * ``status``: the summary has moved to a new status, e.g.,
+      ``{"status": "summarizing"}``.
+    * ``text``: a new piece of the (raw) summary of a subdivision, e.g.,
+      ``{"subdivision": 0, "text": "the city council "}``.
+    * ``error``: the generation of the summary failed.
+    * ``summary``: sent last, with the same body as :func:`get_summary_view`,
+      which contains the final, post-processed output.
 
-    summary, warnings = result
-    response = summary.dict().copy()
-    # Match response attributes
-    response["summary_id"] = response.pop("id_")
-    # response.update(warnings)  # TODO
-    response["warnings"] = {}  # TODO: delete
-    return response
+    Returns:
+        :obj:`fastapi.responses.StreamingResponse`: A ``text/event-stream``
+        response.
+
+    Raises: :class:`http.client.HTTPException`:
+        If the request is not valid.
+    """
+    document = _validate_request(request)
+    request_id, stream = generate_summary_stream(request, x_deadline,
+                                                 document)
+    return StreamingResponse(_summary_events(request_id, stream),
+                             media_type="text/event-stream")
 
 
 @router.get("/plain-text/{summary_id}", response_model=ResponseSchema)
@@ -94,7 +116,9 @@ async def get_summary_view(summary_id: str):
     """Get a generated summary.
 
     The summary status should be checked until the generation of the summary
-    has been completed.
+    has been completed. While a hierarchical summary is being generated, its
+    ``progress`` holds the level being summarized, the maximum number of levels
+    and the number of subdivisions of the level.
 
     Args:
         summary_id (:obj:`str`):
@@ -113,10 +137,94 @@ async def get_summary_view(summary_id: str):
     if summary is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f"Summary '{summary_id}' not found.")
+    return _to_response(summary, summary_id, warnings)
+
+
+def _validate_request(request: PlainTextRequestSchema) -> Document:
+    """Validate a summary request.
+
+    The source is normalised only once, into a :class:`models.Document` which
+    is then passed on to the summarization pipeline.
+
+    Returns:
+        :obj:`Document`: The document of the source, with its detected
+        language.
+
+    Raises: :class:`http.client.HTTPException`:
+        If the request is not valid.
+    """
+    if not request.source:
+        raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
+
+    document = Document(request.source)
+    if document.word_count < MIN_WORDS_SOURCE:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"source too short (<{MIN_WORDS_SOURCE} words)"
+        )
+
+    document.language = lang_detector.detect(document.normalized_text,
+                                             normalized=True)
+    language = document.language.language
+    if not SupportedLanguage.is_supported(language):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"detected language '{language}' not supported"
+        )
+    return document
+
+
+def _to_response(
+    summary: Summary,
+    summary_id: str,
+    warnings: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Build the body of a response from a summary.
+
+    Args:
+        summary (:obj:`Summary`):
+            The summary.
+        summary_id (:obj:`str`):
+            The id returned to the client (the request id).
+        warnings (:obj:`dict`):
+            The warnings of the summary.
+
+    Returns:
+        :obj:`Dict[str, Any]`: The response, matching
+        :class:`models.ResponseSchema`.
+    """
     response = summary.dict().copy()
     # Match response attributes
     response.pop("id_")
     response["summary_id"] = summary_id  # match the request id
-    # response.update(warnings)  # TODO
-    response["warnings"] = {}  # TODO: delete
+    response["warnings"] = warnings or {}
     return response
+
+
+def _summary_events(request_id: str, stream: SummaryStream) -> Iterator[str]:
+    """Format the events of a summary stream as Server-Sent Events.
+
+    This is a regular generator, so Starlette iterates it in a thread pool,
+    and waiting for the next event does not block the event loop.
+
+    Args:
+        request_id (:obj:`str`):
+            The id of the request.
+        stream (:obj:`SummaryStream`):
+            The stream of the summary.
+
+    Yields:
+        :obj:`str`: The formatted events.
+    """
+    yield _format_event("request", json.dumps({"summary_id": request_id}))
+    for event, data in stream:
+        yield _format_event(event, json.dumps(data))
+    summary, warnings = get_summary(request_id)
+    if summary is not None:
+        response = ResponseSchema(**_to_response(summary, request_id, warnings))
+        yield _format_event("summary", response.json())
+
+
+def _format_event(event: str, data: str) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {data}\n\n"
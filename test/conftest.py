@@ -2,6 +2,7 @@ import sys
 from os.path import abspath, dirname, join
 
 paths = [
+    abspath(join(dirname(dirname(__file__)), "src")),
     abspath(join(dirname(dirname(__file__)), "src/jizt/summaries")),
     abspath(join(dirname(dirname(__file__)),
                  "pipeline/text_processing")),
@@ -0,0 +1,142 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Batch scheduler tests (with a fake generate function, no model)."""
+
+import time
+import threading
+import pytest
+from jizt.summaries.pipeline.text_summarization.batch_scheduling import \
+    BatchScheduler
+
+
+class FakeGenerate:
+    """Records the batches and "summarizes" each subdivision with its length."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, input_ids, **params):
+        with self.lock:
+            self.calls.append(([ids.tolist() for ids in input_ids], params))
+        if self.fail:
+            raise ValueError("generation failed")
+        return [str(len(ids)) for ids in input_ids]
+
+
+@pytest.fixture
+def generate():
+    return FakeGenerate()
+
+
+def make_scheduler(generate, **kwargs):
+    kwargs = dict(dict(max_batch_size=2, max_wait=10, bucket_width=64), **kwargs)
+    return BatchScheduler(generate, **kwargs)
+
+
+def test_same_params_are_batched_together(generate):
+    scheduler = make_scheduler(generate)
+    futures = (scheduler.submit([[1] * 10], max_length=90, min_length=70,
+                                num_beams=4)
+               + scheduler.submit([[2] * 20], max_length=90, min_length=70,
+                                  num_beams=4))
+    assert [future.result(timeout=5) for future in futures] == ["10", "20"]
+    scheduler.close()
+    assert len(generate.calls) == 1
+    batch, params = generate.calls[0]
+    assert batch == [[1] * 10, [2] * 20]
+    assert params == dict(max_length=90, min_length=70, num_beams=4)
+
+
+def test_lengths_are_not_rewritten(generate):
+    scheduler = make_scheduler(generate, max_wait=0.01)
+    futures = (scheduler.submit([[1] * 10], max_length=90, min_length=70)
+               + scheduler.submit([[2] * 10], max_length=120, min_length=100))
+    assert [future.result(timeout=5) for future in futures] == ["10"] * 2
+    scheduler.close()
+    assert sorted((params["max_length"], params["min_length"])
+                  for _, params in generate.calls) == [(90, 70), (120, 100)]
+
+
+def test_incompatible_params_are_not_batched_together(generate):
+    scheduler = make_scheduler(generate, max_wait=0.01)
+    futures = (scheduler.submit([[1] * 10], max_length=64, num_beams=4)
+               + scheduler.submit([[2] * 10], max_length=64, num_beams=1)
+               + scheduler.submit([[3] * 10], max_length=200, num_beams=4))
+    assert [future.result(timeout=5) for future in futures] == ["10"] * 3
+    scheduler.close()
+    assert sorted(batch for batch, _ in generate.calls) == [[[1] * 10],
+                                                            [[2] * 10],
+                                                            [[3] * 10]]
+
+
+def test_subdivisions_are_grouped_by_length(generate):
+    scheduler = make_scheduler(generate, max_wait=0.01)
+    futures = scheduler.submit([[1] * 10, [2] * 100], max_length=64)
+    assert [future.result(timeout=5) for future in futures] == ["10", "100"]
+    scheduler.close()
+    assert len(generate.calls) == 2
+
+
+def test_max_wait_flush(generate):
+    scheduler = make_scheduler(generate, max_batch_size=8, max_wait=0.05)
+    start = time.monotonic()
+    future, = scheduler.submit([[1, 2, 3]], max_length=64)
+    assert future.result(timeout=5) == "3"
+    assert time.monotonic() - start >= 0.05
+    scheduler.close()
+    assert len(generate.calls) == 1
+
+
+def test_waiting_group_is_not_starved():
+    stop = threading.Event()
+
+    def refilling_generate(input_ids, **params):
+        # Another full batch arrives while each batch is generated
+        if not stop.is_set():
+            scheduler.submit([[1] * 10, [1] * 10], max_length=64)
+        time.sleep(0.005)
+        return [str(len(ids)) for ids in input_ids]
+
+    scheduler = make_scheduler(refilling_generate, max_wait=0.05)
+    try:
+        scheduler.submit([[1] * 10, [1] * 10], max_length=64)
+        future, = scheduler.submit([[2] * 10], max_length=128)
+        assert future.result(timeout=2) == "10"
+    finally:
+        stop.set()
+        scheduler.close()
+
+
+def test_close_flushes_pending(generate):
+    scheduler = make_scheduler(generate, max_batch_size=8)
+    futures = scheduler.submit([[1], [2]], max_length=64)
+    scheduler.close()
+    assert [future.result(timeout=0) for future in futures] == ["1", "1"]
+    with pytest.raises(RuntimeError):
+        scheduler.submit([[1]], max_length=64)
+
+
+def test_generation_errors_are_propagated():
+    scheduler = make_scheduler(FakeGenerate(fail=True))
+    futures = scheduler.submit([[1], [2]], max_length=64)
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+    scheduler.close()
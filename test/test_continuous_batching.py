@@ -0,0 +1,80 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Continuous batching engine tests (parity with ``model.generate``)."""
+
+import pytest
+import torch
+from transformers import T5Config, T5ForConditionalGeneration
+from jizt.summaries.pipeline.text_summarization.continuous_batching import \
+    ContinuousBatchingEngine
+
+# Subdivisions of different lengths, each with its own maximum summary length,
+# so that sequences leave the batch and waiting ones join at different steps
+subdivisions = [
+    ([5, 6, 7, 8, 9, 10, 11, 1], 12),
+    ([12, 13, 1], 4),
+    ([14, 15, 16, 17, 1], 7),
+    ([18, 19, 20, 21, 22, 23, 24, 25, 26, 27, 1], 10),
+    ([28, 29, 1], 5),
+]
+
+
+class IdsTokenizer:
+    """Returns the generated ids instead of decoding them."""
+
+    pad_token_id = 0
+    eos_token_id = 1
+
+    def decode(self, ids, **kwargs):
+        return list(ids)
+
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    config = T5Config(vocab_size=32, d_model=16, d_kv=8, d_ff=32,
+                      num_layers=2, num_heads=2, decoder_start_token_id=0,
+                      pad_token_id=0, eos_token_id=1)
+    model = T5ForConditionalGeneration(config).eval()
+    # With the default initialization, the untrained model keeps generating
+    # the same token, which would hide misaligned caches
+    with torch.no_grad():
+        for parameter in model.parameters():
+            parameter.normal_(0, 0.3)
+    return model
+
+
+@pytest.mark.parametrize("max_batch_size", [1, 2, 3, 8])
+def test_greedy_parity(model, max_batch_size):
+    expected = [
+        model.generate(torch.tensor([ids]), max_length=max_length,
+                       num_beams=1, do_sample=False)[0].tolist()
+        for ids, max_length in subdivisions
+    ]
+    engine = ContinuousBatchingEngine(model, IdsTokenizer(),
+                                      max_batch_size=max_batch_size)
+    try:
+        futures = [
+            engine.submit([ids], max_length=max_length, num_beams=1,
+                          do_sample=False)[0]
+            for ids, max_length in subdivisions
+        ]
+        outputs = [future.result(timeout=60) for future in futures]
+    finally:
+        engine.close()
+    assert outputs == expected
@@ -0,0 +1,42 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Document tests."""
+
+from jizt.summaries.models import Document
+
+
+def test_normalization():
+    document = Document("  The fish\tdreamed of\n\nescaping the fishbowl. ")
+    assert document.normalized_text == ("The fish dreamed of escaping the "
+                                        "fishbowl.")
+    assert document.word_count == 7
+    assert document.sentences is None
+
+
+def test_sentence_spans():
+    sentences = ["Arguing with a fool proves there are two.",
+                 "A witty saying proves nothing.",
+                 "Bad decisions make good stories."]
+    document = Document(" ".join(sentences))
+    document.token_ids = [[1, 2], [3], [4, 5]]
+    document.set_sentences(sentences)
+    assert document.text == " ".join(sentences)
+    assert document.sentences == sentences
+    assert document.sentence_spans[1] == (42, 72)
+    # The token ids belong to the previous sentences
+    assert document.token_ids is None
@@ -0,0 +1,36 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Extractive summarization tests."""
+
+from jizt.summaries.pipeline.text_summarization.extractive import \
+    extractive_summarize
+
+
+def test_non_ascii_words_are_scored():
+    sentences = ["Der Bär schläft.",
+                 "Москва — столица России, Москва большая.",
+                 "Москва красивая.",
+                 "Погода хорошая."]
+    summary = extractive_summarize(sentences, relative_max_length=0.3)
+    assert summary == "Москва красивая."
+
+
+def test_digits_and_underscores_are_not_words():
+    sentences = ["1234 1234 1234 1234.", "____ ____ ____.", "Alpha beta."]
+    summary = extractive_summarize(sentences, relative_max_length=0.1)
+    assert summary == "Alpha beta."
@@ -0,0 +1,87 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Generation engine selection tests (with a fake engine, no model)."""
+
+import logging
+import pytest
+from concurrent.futures import Future
+from jizt.summaries.pipeline.text_summarization.continuous_batching import \
+    ContinuousBatchingEngine
+from jizt.summaries.pipeline.text_summarization.summarization import \
+    Summarizer
+
+subdivisions = [[21603, 10, 37, 1], [21603, 10, 8, 6, 5, 1]]
+
+
+class FakeEngine:
+    """Resolves each subdivision with ``"continuous"``."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, input_ids, **params):
+        self.calls.append(params)
+        futures = [Future() for _ in input_ids]
+        for future in futures:
+            future.set_result("continuous")
+        return futures
+
+
+@pytest.fixture
+def summarizer():
+    # The model is not needed to select the engine
+    summarizer = Summarizer.__new__(Summarizer)
+    summarizer._continuous_engine = FakeEngine()
+    summarizer._scheduler = None
+    summarizer._max_batch_size = 8
+    summarizer._warned_engine_fallback = False
+    summarizer._generate_batch = lambda ids, **params: ["static"] * len(ids)
+    summarizer.logger = logging.getLogger("Summarizer")
+    return summarizer
+
+
+def test_supports():
+    assert ContinuousBatchingEngine.supports({"num_beams": 1})
+    assert ContinuousBatchingEngine.supports({"num_beams": None})
+    assert not ContinuousBatchingEngine.supports({"num_beams": 4})
+    assert not ContinuousBatchingEngine.supports({"num_beams": 1,
+                                                  "num_return_sequences": 2})
+
+
+def test_greedy_requests_use_the_continuous_engine(summarizer):
+    summaries = summarizer.summarize_subdivisions(subdivisions, num_beams=1)
+    assert summaries == ["continuous", "continuous"]
+    assert summarizer._continuous_engine.calls[0]["num_beams"] == 1
+
+
+def test_beam_search_falls_back_loudly(summarizer, caplog):
+    with caplog.at_level(logging.DEBUG, logger="Summarizer"):
+        for _ in range(2):
+            summaries = summarizer.summarize_subdivisions(subdivisions)
+            assert summaries == ["static", "static"]
+    assert not summarizer._continuous_engine.calls
+    warnings = [record for record in caplog.records
+                if record.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "num_beams=4" in warnings[0].getMessage()
+
+
+def test_deadline_bypasses_the_continuous_engine(summarizer):
+    summaries = summarizer.summarize_subdivisions(subdivisions, num_beams=1,
+                                                  deadline=float("inf"))
+    assert summaries == ["static", "static"]
@@ -0,0 +1,77 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""ONNX Runtime backend tests (parity with the PyTorch backend)."""
+
+import pytest
+import torch
+from transformers import T5Config, T5ForConditionalGeneration
+from jizt.summaries.pipeline.text_summarization.backends.pytorch_backend \
+    import PyTorchBackend
+
+input_ids = torch.tensor([[5, 6, 7, 8, 9, 1], [10, 11, 12, 1, 0, 0]])
+attention_mask = (input_ids != 0).long()
+input_ids[1, 3:] = 0
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    torch.manual_seed(0)
+    config = T5Config(vocab_size=32, d_model=16, d_kv=8, d_ff=32,
+                      num_layers=2, num_heads=2, decoder_start_token_id=0,
+                      pad_token_id=0, eos_token_id=1)
+    path = tmp_path_factory.mktemp("tiny-t5")
+    T5ForConditionalGeneration(config).eval().save_pretrained(path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def backends(model_path, tmp_path_factory):
+    pytest.importorskip("onnxruntime")
+    from jizt.summaries.pipeline.text_summarization.backends.onnx_backend \
+        import OnnxRuntimeBackend
+    onnx_backend = OnnxRuntimeBackend(model_path,
+                                      tmp_path_factory.mktemp("onnx"))
+    return PyTorchBackend(model_path, quantization="none",
+                          draft_model_path=None), onnx_backend
+
+
+@pytest.mark.parametrize("params", [
+    dict(num_beams=1, do_sample=False),
+    dict(num_beams=3, do_sample=False, length_penalty=1.0,
+         early_stopping=True),
+    dict(num_beams=3, do_sample=True, top_k=8, temperature=0.7),
+    dict(num_beams=1, do_sample=True, top_p=0.9),
+], ids=["greedy", "beam-search", "beam-sample", "sample"])
+def test_parity(backends, params):
+    outputs = []
+    for backend in backends:
+        torch.manual_seed(0)
+        outputs.append(backend.generate(input_ids, attention_mask,
+                                        max_length=12, min_length=4,
+                                        **params).tolist())
+    assert outputs[0] == outputs[1]
+
+
+def test_export_dir_depends_on_checkpoint(backends, model_path, tmp_path):
+    from jizt.summaries.pipeline.text_summarization.backends.onnx_backend \
+        import OnnxRuntimeBackend
+    export_dir = OnnxRuntimeBackend._export_dir(model_path, tmp_path)
+    assert export_dir == OnnxRuntimeBackend._export_dir(model_path, tmp_path)
+    config_file = model_path / "config.json"
+    config_file.write_text(config_file.read_text() + " ")
+    assert export_dir != OnnxRuntimeBackend._export_dir(model_path, tmp_path)
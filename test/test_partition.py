@@ -0,0 +1,158 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Sentence partition tests."""
+
+from functools import lru_cache
+from hypothesis import given, settings, strategies as st
+from jizt.summaries.pipeline.text_encoding.partition import \
+    partition_sentences, partition_incrementally
+
+
+def divide_eagerly(sent2ntks, ntks_prefix, max_length):
+    """Previous implementation of the eager division (reference)."""
+    subdiv2ntks = []
+    split_points = [0]
+    subdiv_len = ntks_prefix + sent2ntks[0] + 1
+    for i in range(1, len(sent2ntks)):
+        subdiv_len += sent2ntks[i]
+        if subdiv_len > max_length:
+            split_points.append(i)
+            subdiv2ntks.append(subdiv_len - sent2ntks[i])
+            subdiv_len = ntks_prefix + sent2ntks[i] + 1
+    split_points.append(len(sent2ntks))
+    subdiv2ntks.append(subdiv_len)
+    return split_points, subdiv2ntks
+
+
+def balance_subdivisions(split_points, subdiv2ntks, sent2ntks, max_length):
+    """Previous implementation of the balancing (reference)."""
+    balanced_split_points = split_points[:]
+    balanced_subdiv2ntks = subdiv2ntks[:]
+    while True:
+        prev_balanced_split_points = balanced_split_points[:]
+        for i in range(len(balanced_split_points)-1, 1, -1):
+            diff_ntks = balanced_subdiv2ntks[i-2] - balanced_subdiv2ntks[i-1]
+            while diff_ntks > 0:
+                moved_sent_ntks = sent2ntks[balanced_split_points[i-1] - 1]
+                if ((balanced_subdiv2ntks[i-1] + moved_sent_ntks <= max_length)
+                        and moved_sent_ntks <= diff_ntks):
+                    balanced_split_points[i-1] -= 1
+                    balanced_subdiv2ntks[i-1] += moved_sent_ntks
+                    balanced_subdiv2ntks[i-2] -= moved_sent_ntks
+                    diff_ntks = (balanced_subdiv2ntks[i-2]
+                                 - balanced_subdiv2ntks[i-1])
+                else:
+                    break
+        if balanced_split_points == prev_balanced_split_points:
+            return balanced_split_points, balanced_subdiv2ntks
+
+
+def optimal_longest(sent2ntks, ntks_prefix, nsubdivs, max_length):
+    """Length of the longest subdivision of the best partition (brute force)."""
+    overhead = ntks_prefix + 1
+
+    @lru_cache(maxsize=None)
+    def best(start, parts):
+        if start == len(sent2ntks):
+            return 0 if parts == 0 else float("inf")
+        if parts == 0:
+            return float("inf")
+        result = float("inf")
+        for end in range(start + 1, len(sent2ntks) + 1):
+            length = sum(sent2ntks[start:end]) + overhead
+            if length > max_length and end - start > 1:
+                break
+            result = min(result, max(length, best(end, parts - 1)))
+        return result
+
+    return best(0, nsubdivs)
+
+
+max_lengths = st.integers(min_value=8, max_value=64)
+prefixes = st.integers(min_value=0, max_value=4)
+sentences = st.lists(st.integers(min_value=0, max_value=80), min_size=1,
+                     max_size=60)
+
+
+@given(sentences, prefixes, max_lengths)
+def test_valid_partition(sent2ntks, ntks_prefix, max_length):
+    split_points, subdiv2ntks = partition_sentences(sent2ntks, ntks_prefix,
+                                                    max_length)
+    assert split_points[0] == 0 and split_points[-1] == len(sent2ntks)
+    assert all(a < b for a, b in zip(split_points[:-1], split_points[1:]))
+    for start, end, ntks in zip(split_points[:-1], split_points[1:],
+                                subdiv2ntks):
+        assert ntks == sum(sent2ntks[start:end]) + ntks_prefix + 1
+        # Only sentences which do not fit on their own exceed the max. length
+        assert ntks <= max_length or end - start == 1
+
+
+@given(sentences, prefixes, max_lengths)
+def test_not_worse_than_previous(sent2ntks, ntks_prefix, max_length):
+    _, subdiv2ntks = partition_sentences(sent2ntks, ntks_prefix, max_length)
+    prev_split_points, prev_subdiv2ntks = divide_eagerly(sent2ntks,
+                                                         ntks_prefix,
+                                                         max_length)
+    prev_split_points, prev_subdiv2ntks = balance_subdivisions(
+        prev_split_points, prev_subdiv2ntks, sent2ntks, max_length)
+    assert len(subdiv2ntks) == len(prev_subdiv2ntks)
+    assert max(subdiv2ntks) <= max(prev_subdiv2ntks)
+
+
+@settings(max_examples=50)
+@given(st.lists(st.integers(min_value=0, max_value=30), min_size=1,
+                max_size=14),
+       prefixes, max_lengths)
+def test_optimal(sent2ntks, ntks_prefix, max_length):
+    _, subdiv2ntks = partition_sentences(sent2ntks, ntks_prefix, max_length)
+    assert max(subdiv2ntks) == optimal_longest(tuple(sent2ntks), ntks_prefix,
+                                               len(subdiv2ntks), max_length)
+
+
+def test_single_subdivision():
+    assert partition_sentences([3, 4, 5], 2, 512) == ([0, 3], [15])
+
+
+def test_oversized_sentence():
+    split_points, subdiv2ntks = partition_sentences([5, 5, 5, 20, 5], 0, 11)
+    assert split_points == [0, 2, 3, 4, 5]
+    assert subdiv2ntks == [11, 6, 21, 6]
+
+
+@given(st.lists(sentences, min_size=1, max_size=8), prefixes, max_lengths,
+       st.integers(min_value=2, max_value=5))
+def test_incremental_partition(chunks, ntks_prefix, max_length, window):
+    sent2ntks = [ntks for chunk in chunks for ntks in chunk]
+    ranges = list(partition_incrementally(iter(chunks), ntks_prefix,
+                                          max_length, window))
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(sent2ntks)
+    assert all(end == start for (_, end), (start, _)
+               in zip(ranges[:-1], ranges[1:]))
+    for start, end in ranges:
+        ntks = sum(sent2ntks[start:end]) + ntks_prefix + 1
+        assert start < end
+        assert ntks <= max_length or end - start == 1
+
+
+def test_incremental_partition_is_lazy():
+    def chunks():
+        yield [10] * 40
+        raise AssertionError("Only the first chunk should be consumed")
+
+    ranges = partition_incrementally(chunks(), 0, 51, window=2)
+    assert next(ranges) == (0, 5)
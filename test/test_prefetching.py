@@ -0,0 +1,55 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Prefetching tests."""
+
+import threading
+import pytest
+from jizt.summaries.utils.prefetching import prefetch
+
+
+def test_order():
+    assert list(prefetch(range(100), max_size=3)) == list(range(100))
+
+
+def test_producer_error():
+    def failing():
+        yield 1
+        raise RuntimeError("encoding failed")
+
+    items = prefetch(failing())
+    assert next(items) == 1
+    with pytest.raises(RuntimeError, match="encoding failed"):
+        next(items)
+
+
+def test_producer_stops_when_closed():
+    finished = threading.Event()
+
+    def endless():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            finished.set()
+
+    items = prefetch(endless(), max_size=2)
+    assert next(items) == 0
+    items.close()
+    assert finished.wait(timeout=5)
@@ -0,0 +1,93 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Oversized sentence splitting tests."""
+
+import random
+import pytest
+from hypothesis import given, strategies as st
+from jizt.summaries.pipeline.text_encoding.sentence_splitting import (
+    split_oversized_sentences, split_sentence)
+
+COMMA = 0  # token which ends a clause
+WORD_STARTS = frozenset(range(1, 100))  # tokens which start a word
+# The rest of the tokens (100 onwards) continue a word
+
+MAX_NTKS = 508  # max. sentence tokens of a T5 subdivision with the prefix
+
+
+def words(nwords, rng):
+    """Punctuation-free text, as tokens: 1 to 4 tokens per word."""
+    tks = []
+    for _ in range(nwords):
+        tks.append(rng.randrange(1, 100))
+        tks.extend(rng.randrange(100, 200) for _ in range(rng.randrange(4)))
+    return tks
+
+
+def check_pieces(tks, pieces, max_ntks):
+    assert [tk for piece in pieces for tk in piece] == tks
+    assert all(0 < len(piece) <= max_ntks for piece in pieces)
+
+
+def test_megabyte_without_punctuation():
+    # Roughly a megabyte of text (~6 characters per word)
+    tks = words(170_000, random.Random(0))
+    pieces = split_sentence(tks, MAX_NTKS, {COMMA}, WORD_STARTS)
+    check_pieces(tks, pieces, MAX_NTKS)
+    # Words are not split
+    assert all(piece[0] in WORD_STARTS for piece in pieces)
+    assert all(len(piece) > MAX_NTKS // 2 for piece in pieces[:-1])
+
+
+def test_megabyte_without_word_boundaries():
+    # E.g., an encoded blob: there is nowhere better to split
+    tks = [150] * 1_000_000
+    pieces = split_sentence(tks, MAX_NTKS, {COMMA}, WORD_STARTS)
+    check_pieces(tks, pieces, MAX_NTKS)
+    assert all(len(piece) == MAX_NTKS for piece in pieces[:-1])
+
+
+def test_split_after_clause():
+    rng = random.Random(1)
+    tks = words(30, rng) + [COMMA] + words(400, rng)
+    comma = tks.index(COMMA)
+    pieces = split_sentence(tks, comma + 10, {COMMA}, WORD_STARTS)
+    assert pieces[0] == tks[:comma + 1]
+
+
+@given(st.lists(st.integers(min_value=0, max_value=199), max_size=300),
+       st.integers(min_value=1, max_value=40))
+def test_valid_pieces(tks, max_ntks):
+    pieces = split_sentence(tks, max_ntks, {COMMA}, WORD_STARTS)
+    if tks:
+        check_pieces(tks, pieces, max_ntks)
+
+
+def test_only_oversized_sentences_are_split():
+    rng = random.Random(2)
+    sent_tks = [words(10, rng), words(1000, rng), words(20, rng)]
+    split_sent_tks = split_oversized_sentences(sent_tks, MAX_NTKS, {COMMA},
+                                               WORD_STARTS)
+    assert split_sent_tks[0] is sent_tks[0]
+    assert split_sent_tks[-1] is sent_tks[-1]
+    check_pieces(sent_tks[1], split_sent_tks[1:-1], MAX_NTKS)
+
+
+def test_invalid_max_ntks():
+    with pytest.raises(ValueError):
+        split_sentence([1, 2, 3], 0, {COMMA}, WORD_STARTS)
@@ -0,0 +1,59 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Subdivision buffer tests."""
+
+import pickle
+import pytest
+from jizt.summaries.pipeline.text_encoding.subdivision_buffer import \
+    SubdivisionBuffer
+
+subdivisions = [[21603, 10, 37, 1], [21603, 10, 8, 6, 5, 1], [21603, 10, 1]]
+
+
+@pytest.fixture
+def buffer():
+    return SubdivisionBuffer.from_sequences(subdivisions)
+
+
+def test_sequence(buffer):
+    assert len(buffer) == 3
+    assert buffer.tolist() == subdivisions
+    assert [ids.tolist() for ids in buffer] == subdivisions
+    assert buffer[-1].tolist() == subdivisions[-1]
+    assert buffer.lengths.tolist() == [4, 6, 3]
+    with pytest.raises(IndexError):
+        buffer[3]
+
+
+def test_views_share_storage(buffer):
+    ids = buffer.ids
+    assert buffer[1].data_ptr() == ids[4:].data_ptr()
+    assert buffer[1:].ids.data_ptr() == ids[4:].data_ptr()
+
+
+def test_slices(buffer):
+    assert buffer[1:].tolist() == subdivisions[1:]
+    assert buffer[1:].offsets.tolist() == [0, 6, 9]
+    assert buffer[1:2][0].tolist() == subdivisions[1]
+    assert len(buffer[2:1]) == 0
+    with pytest.raises(ValueError):
+        buffer[::2]
+
+
+def test_pickle(buffer):
+    assert pickle.loads(pickle.dumps(buffer[1:])).tolist() == subdivisions[1:]
@@ -0,0 +1,122 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Subdivision planning tests."""
+
+import pytest
+from jizt.summaries.pipeline.text_encoding.subdivision_planning import (
+    SubdivisionCostModel, SubdivisionPlanner, calibrate)
+
+
+def test_fit_recovers_coefficients():
+    true_model = SubdivisionCostModel(0.05, 2e-4, 3e-7)
+    samples = [(b, length, true_model.predict(b, length))
+               for b in (1, 8) for length in (64, 128, 256, 384, 512)]
+    model = SubdivisionCostModel.fit(samples)
+    assert model.fixed == pytest.approx(0.05)
+    assert model.linear == pytest.approx(2e-4)
+    assert model.quadratic == pytest.approx(3e-7)
+
+
+def test_fit_needs_enough_samples():
+    with pytest.raises(ValueError):
+        SubdivisionCostModel.fit([(1, 512, 1.0), (1, 512, 1.1)])
+
+
+def test_save_and_load(tmp_path):
+    model = SubdivisionCostModel(0.05, 2e-4, 3e-7)
+    model.save(tmp_path / "cost_model.json")
+    loaded = SubdivisionCostModel.load(tmp_path / "cost_model.json")
+    assert vars(loaded) == vars(model)
+
+
+def test_no_cost_model():
+    assert SubdivisionPlanner(max_length=512).target_length(10_000, 3) == 512
+
+
+def test_override():
+    planner = SubdivisionPlanner(SubdivisionCostModel(0, 0, 1),
+                                 max_length=512, target_length=300)
+    assert planner.target_length(10_000, 3) == 300
+    planner = SubdivisionPlanner(max_length=512, target_length=1024)
+    assert planner.target_length(10_000, 3) == 512
+
+
+def test_fixed_cost_favours_long_subdivisions():
+    planner = SubdivisionPlanner(SubdivisionCostModel(1.0, 1e-4, 0),
+                                 max_length=512, max_batch_size=8)
+    assert planner.target_length(100_000, 3) == 512
+    assert planner.target_length(None, 3) == 512
+
+
+def test_attention_cost_favours_short_subdivisions():
+    planner = SubdivisionPlanner(SubdivisionCostModel(0.01, 1e-5, 1e-6),
+                                 max_length=512, max_batch_size=8,
+                                 min_length=128)
+    assert planner.target_length(100_000, 3) < 512
+    assert planner.target_length(None, 3) < 512
+
+
+def test_short_text_fills_a_single_subdivision():
+    planner = SubdivisionPlanner(SubdivisionCostModel(0.5, 1e-4, 1e-7),
+                                 max_length=512, max_batch_size=8)
+    # Any length that holds the whole text gives a single subdivision; the
+    # longest one is preferred
+    assert planner.target_length(100, 3) == 512
+
+
+class FakeTokenizer:
+    eos_token_id = 1
+
+
+class FakeSummarizer:
+    """Summarizer whose time follows a known cost model."""
+
+    max_batch_size = 4
+    tokenizer = FakeTokenizer()
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.batches = []
+
+    def summarize_subdivisions(self, batch, **params):
+        self.batches.append(batch)
+        self.clock.now += SubdivisionCostModel(0.1, 1e-3, 1e-6).predict(
+            len(batch), len(batch[0]))
+        return [""] * len(batch)
+
+
+class FakeClock:
+    now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+
+def test_calibrate(monkeypatch):
+    from jizt.summaries.pipeline.text_encoding import subdivision_planning
+    clock = FakeClock()
+    monkeypatch.setattr(subdivision_planning.time, "perf_counter",
+                        clock.perf_counter)
+    summarizer = FakeSummarizer(clock)
+    model, samples = calibrate(summarizer, list(range(2, 100)),
+                               lengths=(64, 128, 256), repeat=1)
+    assert {(b, length) for b, length, _ in samples} == {
+        (b, length) for b in (1, 4) for length in (64, 128, 256)}
+    assert all(len(ids) == len(batch[0]) and ids[-1] == 1
+               for batch in summarizer.batches for ids in batch)
+    assert model.quadratic == pytest.approx(1e-6)
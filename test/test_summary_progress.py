@@ -0,0 +1,82 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Progress of hierarchical summaries (with the mock DAO, no model)."""
+
+import logging
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from jizt.supported_languages import SupportedLanguage
+from jizt.summaries.data.summary_dao_mock import SummaryDAOMock
+from jizt.summaries.models import ResponseSchema, Summary
+from jizt.summaries.pipeline.pipeline import SummarizationPipeline
+from jizt.summaries.utils.summary_status import SummaryStatus
+from jizt.summaries.utils.summary_stream import SummaryStream
+from jizt.summaries.utils.supported_models import SupportedModel
+
+request_id = "request"
+
+
+@pytest.fixture
+def pipeline():
+    # The models are not needed to update the progress
+    pipeline = SummarizationPipeline.__new__(SummarizationPipeline)
+    pipeline.db = SummaryDAOMock(logging.DEBUG)
+    pipeline.hierarchical_summarizer = SimpleNamespace(max_levels=3)
+    pipeline.logger = logging.getLogger("SummarizationPipeline")
+    summary = Summary("summary", "A long text.", None, SupportedModel.T5, {},
+                      SummaryStatus.SUMMARIZING, datetime.now(), None,
+                      SupportedLanguage.ENGLISH)
+    pipeline.db.insert_initial_request(request_id, summary, False, None)
+    return pipeline
+
+
+def test_progress_is_stored_for_every_level(pipeline):
+    for level, subdivisions in enumerate([12, 4]):
+        pipeline._update_level(request_id, level, subdivisions, None)
+        summary, _ = pipeline.db.get_summary_by_request_id(request_id)
+        assert summary.progress == {"level": level, "max_levels": 3,
+                                    "subdivisions": subdivisions}
+    assert summary.status == SummaryStatus.REDUCING.value
+
+
+def _get_response(pipeline) -> ResponseSchema:
+    # Same as the body returned by the view
+    summary, warnings = pipeline.db.get_summary_by_request_id(request_id)
+    response = summary.dict().copy()
+    response.pop("id_")
+    return ResponseSchema(**response, summary_id=request_id,
+                          warnings=warnings or {})
+
+
+def test_progress_is_returned(pipeline):
+    assert _get_response(pipeline).progress is None
+    pipeline._update_level(request_id, 1, 4, None)
+    response = _get_response(pipeline)
+    assert response.status == SummaryStatus.REDUCING
+    assert response.progress == {"level": 1, "max_levels": 3,
+                                 "subdivisions": 4}
+
+
+def test_progress_is_streamed(pipeline):
+    stream = SummaryStream()
+    pipeline._update_level(request_id, 0, 12, stream)
+    assert stream._events.get_nowait() == ("status", {
+        "status": "summarizing", "level": 0, "max_levels": 3,
+        "subdivisions": 12
+    })
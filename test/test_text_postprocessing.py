@@ -19,7 +19,7 @@
 """Text post-processing tests."""
 
 import pytest
-from text_postprocessor import text_postprocessing as tp
+from jizt.summaries.pipeline.text_processing import postprocessing as tp
 
 
 input_and_expected_texts = [
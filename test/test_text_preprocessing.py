@@ -18,7 +18,9 @@
 """Text pre-processing tests."""
 
 import pytest
-from text_preprocessor.utils.tokenization import sentence_tokenize
+from jizt.summaries.pipeline.text_processing.tokenization import (
+    ParallelSentenceSegmenter, SentenceSegmenter, create_segmenter,
+    sentence_tokenize)
 
 
 passing_sentences = [
@@ -65,4 +67,59 @@ def test_sentence_tokenize(input_sentences, expected):
 @pytest.mark.xfail(reason="for now, these errors cannot be fixed")
 @pytest.mark.parametrize("input_sentences, expected", failing_sentences)
 def test_sentence_tokenize_fail(input_sentences, expected):
-    assert sentence_tokenize(input_sentences) == expected
\ No newline at end of file
+    assert sentence_tokenize(input_sentences) == expected
+
+
+@pytest.fixture(scope="module")
+def parallel_segmenter():
+    segmenter = ParallelSentenceSegmenter(max_workers=2, shard_size=50)
+    yield segmenter
+    segmenter.close()
+
+
+def test_parallel_sentence_tokenize(parallel_segmenter):
+    text = " ".join(text for text, _ in passing_sentences + failing_sentences)
+    text = " ".join([text, "Mr.. Mr.. A. U.K.... Mr. Elster. Mr. .A. B."] * 5)
+    assert (parallel_segmenter.segment(text)
+            == SentenceSegmenter().segment(text))
+
+
+def test_parallel_sentence_tokenize_max_window():
+    text = " ".join(text for text, _ in passing_sentences + failing_sentences)
+    text = " ".join([text, "Mr.. Mr.. A. U.K.... Mr. Elster. Mr. .A. B."] * 5)
+    segmenter = ParallelSentenceSegmenter(max_workers=2, shard_size=50,
+                                          window=1, max_window=2)
+    try:
+        sentences = segmenter.segment(text)
+    finally:
+        segmenter.close()
+    assert "".join("".join(sentences).split()) == "".join(text.split())
+
+
+@pytest.mark.parametrize("input_sentences, expected", passing_sentences)
+def test_parallel_sentence_tokenize_short(parallel_segmenter, input_sentences,
+                                          expected):
+    assert parallel_segmenter.segment(input_sentences) == expected
+
+
+lowercase_sentences = [
+    ("it started in a movie. his wife gives him presents.",
+     ["it started in a movie.", "his wife gives him presents."]),
+    ("we'll try to change the way we do things for the kids.\" and the dad "
+     "was very surprised",
+     ["we'll try to change the way we do things for the kids.\"",
+      "and the dad was very surprised"]),
+    ("mr. smith went to washington, i.e. the capital . he said hi!",
+     ["mr. smith went to washington, i.e. the capital .", "he said hi!"]),
+]
+
+
+@pytest.mark.parametrize("input_sentences, expected", lowercase_sentences)
+def test_sentence_tokenize_lowercase(input_sentences, expected):
+    segmenter = create_segmenter("blingfire", split_lowercase=True)
+    assert segmenter.segment(input_sentences) == expected
+
+
+def test_unknown_segmenter():
+    with pytest.raises(ValueError):
+        create_segmenter("unknown")
@@ -0,0 +1,71 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Tokenizer registry tests."""
+
+import pytest
+from transformers import T5Tokenizer
+from jizt.summaries.pipeline.tokenizer_registry import get_tokenizer
+
+
+@pytest.fixture(scope="module")
+def tokenizers():
+    return T5Tokenizer.from_pretrained('t5-base'), get_tokenizer('t5-base')
+
+
+texts = [
+    "summarize: ",
+    "The fish dreamed of escaping the fishbowl and into the toilet where he "
+    "saw his friend go.",
+    "How would you spend $1,000 to give the most happiness to the most number "
+    "of people possible?",
+    "What part of your body currently doesn't feel 100%?",
+    "I’m a living furnace.",
+    "Dreams don’t work unless you do.",
+    "NLP (i.e. Natural Language Processing) is great!!! No kidding!",
+    "I was born in 02.28.1980 in N.Y. It's been quite some time!",
+    "Tact: the ability to describe others as they see themselves.",
+    "\"Everyone will be famous for 15 minutes.\" - Andy Warhol.",
+    "Münster, Zürich and São Paulo are cities.",
+    "Multiple    spaces\tand\nnew lines.",
+]
+
+
+def test_shared_instance():
+    assert get_tokenizer('t5-base') is get_tokenizer('t5-base')
+
+
+@pytest.mark.parametrize("text", texts)
+def test_encode_parity(tokenizers, text):
+    slow, fast = tokenizers
+    assert fast.encode(text) == slow.encode(text)
+
+
+@pytest.mark.parametrize("text", texts)
+def test_decode_parity(tokenizers, text):
+    slow, fast = tokenizers
+    ids = slow.encode(text)
+    for skip_special_tokens in (True, False):
+        assert (fast.decode(ids, skip_special_tokens=skip_special_tokens)
+                == slow.decode(ids, skip_special_tokens=skip_special_tokens))
+
+
+def test_batch_decode_parity(tokenizers):
+    slow, fast = tokenizers
+    ids = [slow.encode(text) for text in texts]
+    assert (fast.batch_decode(ids, skip_special_tokens=True)
+            == slow.batch_decode(ids, skip_special_tokens=True))
@@ -0,0 +1,179 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Truecaser tests."""
+
+import copy
+import pickle
+import random
+import re
+import pytest
+from collections import Counter, defaultdict
+from jizt.summaries.pipeline.text_processing.truecase.TrueCaser import \
+    TrueCaser
+from jizt.summaries.pipeline.text_processing.truecase.CompiledTrueCaser \
+    import CompiledTrueCaser, compile_model
+from jizt.summaries.pipeline.text_processing.truecase.MappedTrueCaser \
+    import MappedTrueCaser, save_mapped_model
+
+WORDS = ["apple", "the", "new", "york", "is", "a", "big", "city", "may",
+         "bill", "turkey", "china", "us", "it", "rose", "march", "i", "mark"]
+
+
+def train_distributions(sentences):
+    """Distributions as computed by the truecase trainer."""
+    dists = {"uni_dist": Counter(), "backward_bi_dist": Counter(),
+             "forward_bi_dist": Counter(), "trigram_dist": Counter(),
+             "word_casing_lookup": defaultdict(set)}
+    for tokens in sentences:
+        for i, token in enumerate(tokens):
+            dists["uni_dist"][token] += 1
+            dists["word_casing_lookup"][token.lower()].add(token)
+            if i > 0:
+                dists["backward_bi_dist"][f"{tokens[i-1]}_{token}"] += 1
+            if i < len(tokens) - 1:
+                next_token = tokens[i + 1].lower()
+                dists["forward_bi_dist"][f"{token}_{next_token}"] += 1
+                if i > 0:
+                    dists["trigram_dist"][
+                        f"{tokens[i-1]}_{token}_{next_token}"] += 1
+    dists["word_casing_lookup"] = dict(dists["word_casing_lookup"])
+    return dists
+
+
+def previous_get_true_case(truecaser, sentence):
+    """Previous implementation of ``get_true_case`` (reference)."""
+    tokens = re.findall(r"[A-Za-z]+", re.sub(r"'[A-Za-z]+", "", sentence))
+    tokens_true_case = []
+    for token_idx, token in enumerate(tokens):
+        token = token.lower()
+        prev_token = tokens_true_case[token_idx - 1] if token_idx else None
+        next_token = (tokens[token_idx + 1] if token_idx < len(tokens) - 1
+                      else None)
+        best_token = truecaser.get_token_case(prev_token, token, next_token)
+        if best_token is None:
+            tokens_true_case.append(token.title())
+        elif token_idx == 0:
+            tokens_true_case.append(truecaser.first_token_case(best_token))
+        else:
+            tokens_true_case.append(best_token)
+    spans = []
+    offset = 0
+    true_case_sentence = sentence_lower = sentence.lower()
+    for tk in tokens_true_case:
+        span = re.search(tk.lower(), sentence_lower[offset:]).span()
+        spans.append([s + offset for s in span])
+        offset += span[1]
+    for s, tk in zip(spans, tokens_true_case):
+        true_case_sentence = (f"{true_case_sentence[:s[0]]}{tk}"
+                              f"{true_case_sentence[s[1]:]}")
+    return true_case_sentence
+
+
+@pytest.fixture(scope="module")
+def truecasers(tmp_path_factory):
+    rng = random.Random(0)
+    casings = {word: [word, word.title(), word.upper()][:rng.randint(1, 3)]
+               for word in WORDS}
+    sentences = [[rng.choice(casings[rng.choice(WORDS)])
+                  for _ in range(rng.randint(1, 12))]
+                 for _ in range(3000)]
+    path = tmp_path_factory.mktemp("truecaser")
+    with open(path / "test.dist", "wb") as dist_file:
+        pickle.dump(train_distributions(sentences), dist_file)
+    compile_model(path / "test.dist", path / "test.compiled")
+    save_mapped_model(path / "test.dist", path / "test.mapped")
+    truecaser = TrueCaser(path / "test.dist")
+    # Break the ties as the compiled truecaser does (otherwise, they depend on
+    # the hash seed)
+    for lower, alternatives in truecaser.word_casing_lookup.items():
+        truecaser.word_casing_lookup[lower] = sorted(
+            alternatives, key=lambda alt: (-truecaser.uni_dist[alt], alt))
+    return {"original": truecaser,
+            "compiled": CompiledTrueCaser(path / "test.compiled"),
+            "mapped": MappedTrueCaser(path / "test.mapped")}
+
+
+@pytest.mark.parametrize("model", ["compiled", "mapped"])
+def test_same_scores(truecasers, model):
+    truecaser, compiled = truecasers["original"], truecasers[model]
+    rng = random.Random(1)
+    contexts = [None, "Unknown", "42"] + WORDS + [w.title() for w in WORDS]
+    for _ in range(2000):
+        possible_token = rng.choice(list(truecaser.word_casing_lookup[
+            rng.choice(WORDS)]))
+        prev_token, next_token = rng.choice(contexts), rng.choice(contexts)
+        assert (compiled.get_score(prev_token, possible_token, next_token)
+                == truecaser.get_score(prev_token, possible_token, next_token))
+
+
+@pytest.mark.parametrize("model", ["compiled", "mapped"])
+def test_same_true_case(truecasers, model):
+    truecaser, compiled = truecasers["original"], truecasers[model]
+    rng = random.Random(2)
+    for _ in range(500):
+        sentence = " ".join(rng.choice(WORDS + ["unknown", "don't"])
+                            for _ in range(rng.randint(1, 15))) + "."
+        assert (compiled.get_true_case(sentence)
+                == truecaser.get_true_case(sentence))
+
+
+def test_same_as_previous_reconstruction(truecasers):
+    truecaser = truecasers["original"]
+    rng = random.Random(3)
+    words = WORDS + ["don't", "It's", "U.S.", "42", "(new", "york)", "--"]
+    for _ in range(500):
+        sentence = "".join(rng.choice(words) + rng.choice([" ", ", ", "  "])
+                           for _ in range(rng.randint(1, 15))) + "."
+        assert (truecaser.get_true_case(sentence)
+                == previous_get_true_case(truecaser, sentence))
+
+
+def test_contraction_before_same_word(truecasers):
+    truecaser = truecasers["original"]
+    # The casing is not applied to the letters of the contraction
+    assert (truecaser.get_true_case("it'apple apple")
+            == truecaser.get_true_case("it apple").replace(" ", "'apple ", 1))
+
+
+def test_true_case_many(truecasers):
+    truecaser = truecasers["compiled"]
+    sentences = ["the apple is big.", "", "new york city.", "ÉTÉ İstanbul."]
+    assert (truecaser.get_true_case_many(sentences)
+            == [truecaser.get_true_case(sentence) for sentence in sentences])
+    # "İ" is two characters long when lowercased
+    assert (truecaser.get_true_case("ÉTÉ İstanbul.")
+            == previous_get_true_case(truecaser, "ÉTÉ İstanbul."))
+
+
+@pytest.mark.parametrize("model", ["original", "mapped"])
+def test_cache(truecasers, model):
+    truecaser = copy.copy(truecasers[model])
+    assert truecaser.cache_info() is None
+    rng = random.Random(4)
+    sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 15)))
+                 + "." for _ in range(200)]
+    expected = truecaser.get_true_case_many(sentences)
+    truecaser.set_cache_size(50)
+    assert truecaser.get_true_case_many(sentences) == expected
+    assert truecaser.get_true_case_many(sentences) == expected
+    cache_info = truecaser.cache_info()
+    assert cache_info.hits > 0 and cache_info.misses > 0
+    assert cache_info.currsize == 50
+    truecaser.set_cache_size(0)
+    assert truecaser.cache_info() is None
+    assert truecaser.get_true_case_many(sentences) == expected